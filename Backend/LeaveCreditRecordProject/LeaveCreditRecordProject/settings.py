@@ -6,6 +6,7 @@ Hardened for production deployment
 """
 
 from pathlib import Path
+from importlib.util import find_spec
 import os
 
 # ------------------------------------------------------------------------------
@@ -99,6 +100,20 @@ DATABASES = {
 
 
 
+# ------------------------------------------------------------------------------
+# CACHE
+# ------------------------------------------------------------------------------
+# Shared by every worker process on the host, so invalidate_dashboard_stats()
+# reaches them all; the per-process default (locmem) would leave the other
+# workers serving stale stats until DASHBOARD_STATS_CACHE_TTL runs out.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "django_cache",
+    }
+}
+
+
 # ------------------------------------------------------------------------------
 # PASSWORD VALIDATION
 # ------------------------------------------------------------------------------
@@ -148,10 +163,30 @@ REST_FRAMEWORK = {
         "rest_framework.authentication.SessionAuthentication",
     ],
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        "Main_App.renderers.FastJSONRenderer",
     ],
 }
 
+# MessagePack is opt-in per request (Accept: application/msgpack) and only
+# offered when the msgpack package is installed.
+if find_spec("msgpack"):
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"].append("Main_App.renderers.MessagePackRenderer")
+
+
+# ------------------------------------------------------------------------------
+# LEAVE REPORTS
+# ------------------------------------------------------------------------------
+# "inline" writes LeaveReport rows in the review transaction; "deferred" leaves
+# them to `manage.py project_leave_reports` (run from cron or with --interval).
+LEAVE_REPORT_PROJECTION = "inline"
+
+# Rendered archive PDFs, keyed by archive id, template version and row hash.
+ARCHIVE_PDF_CACHE_DIR = BASE_DIR / "pdf_cache"
+# Processes rendering cache misses during bulk exports (None: one per CPU, 1: render inline).
+PDF_EXPORT_WORKERS = None
+# Results of queued exports (`manage.py run_pdf_jobs`).
+PDF_JOB_DIR = BASE_DIR / "pdf_jobs"
+
 
 # ------------------------------------------------------------------------------
 # CORS & CSRF
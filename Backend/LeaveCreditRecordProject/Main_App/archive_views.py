@@ -1,38 +1,47 @@
 from rest_framework import viewsets, permissions
-from django.http import HttpResponse
-from .models import LeaveRequestArchive
-from .serializers import LeaveRequestArchiveSerializer
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date
+from .models import LeaveRequestArchive, PdfRenderJob
+from .serializers import LeaveRequestArchiveSerializer, PdfRenderJobSerializer
 from django.shortcuts import get_object_or_404
+from .conditional import ConditionalGetMixin
+from .pagination import KeysetPagination, PaginatedActionMixin
+from .roles import get_roles
 
-from .export_views import export_osmena_leave_application_pdf_non_teaching_format, export_osmena_leave_application_pdf_teaching_format
+from .bulk_export import BULK_EXPORT_LIMIT, MERGED_PDF_LIMIT, PDF_JOB_LIMIT, PdfWriter, merged_pdf, rendered_pdfs, stream_zip
+from .pdf_cache import archive_digest, cached_archive_pdf, file_response
 
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status, permissions
 
-class LeaveRequestArchiveViewSet(viewsets.ReadOnlyModelViewSet):
+class LeaveRequestArchiveViewSet(ConditionalGetMixin, PaginatedActionMixin, viewsets.ReadOnlyModelViewSet):
     queryset = LeaveRequestArchive.objects.all()
     serializer_class = LeaveRequestArchiveSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_field = 'archived_at'
+    validator_fields = ('archived_at',)
 
     def get_queryset(self):
-        user = self.request.user
+        roles = get_roles(self.request)
         qs = LeaveRequestArchive.objects.all()
 
-        if hasattr(user, 'dean_profile'):
-            qs = qs.filter(employee_department=user.dean_profile.department.name)
-        elif hasattr(user, 'hruser') or user.groups.filter(name='HR').exists():
+        if roles.dean is not None:
+            qs = qs.filter(employee_department=roles.dean.department.name)
+        elif roles.has_hr_access:
             qs = qs
 
         return qs
     
     def get_employee_archives(self, employee_id):
-        user = self.request.user
+        roles = get_roles(self.request)
         qs = LeaveRequestArchive.objects.all()
 
-        if hasattr(user, 'dean_profile'):
-            qs = qs.filter(employee_department=user.dean_profile.department.name)
-        elif hasattr(user, 'hruser') or user.groups.filter(name='HR').exists():
+        if roles.dean is not None:
+            qs = qs.filter(employee_department=roles.dean.department.name)
+        elif roles.has_hr_access:
             qs = qs
 
         if employee_id:
@@ -43,15 +52,45 @@ class LeaveRequestArchiveViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=['get'], url_path='by-employee/(?P<employee_id>[^/.]+)')
     def by_employee(self, request, employee_id=None):
         qs = self.get_employee_archives(employee_id)
-        serializer = self.get_serializer(qs, many=True)
-        return Response(serializer.data)
-
+        return self.paginated_or(qs, Response)
+
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """
+        Bulk PDF export of the archives filed in a department and/or date
+        range: ``?department=&date_from=&date_to=&output=zip|pdf``.
+        """
+        roles = get_roles(request)
+        if roles.dean is None and not roles.has_hr_access:
+            return Response({'success': False, 'message': 'HR or dean only'}, status=status.HTTP_403_FORBIDDEN)
+
+        qs, output, error = filter_export(self.get_queryset(), request.query_params)
+        if error:
+            return Response({'success': False, 'message': error}, status=status.HTTP_400_BAD_REQUEST)
+
+        archives = list(qs.order_by('date_filed', 'id')[:BULK_EXPORT_LIMIT + 1])
+        if not archives:
+            return Response({'success': False, 'message': 'No archives match'}, status=status.HTTP_404_NOT_FOUND)
+        if len(archives) > BULK_EXPORT_LIMIT:
+            return Response({
+                'success': False,
+                'message': f'More than {BULK_EXPORT_LIMIT} archives match; narrow the department or date range, '
+                           f'or queue a background export at /api/pdf-jobs/'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if output == 'pdf':
+            return FileResponse(
+                merged_pdf(rendered_pdfs(archives)), as_attachment=True,
+                filename='leave_archives.pdf', content_type='application/pdf',
+            )
+        response = StreamingHttpResponse(stream_zip(rendered_pdfs(archives)), content_type='application/zip')
+        response['Content-Disposition'] = 'attachment; filename="leave_archives.zip"'
+        return response
 
     @action(detail=True, methods=['delete'], url_path='delete', permission_classes=[permissions.IsAuthenticated])
     def delete_archive(self, request, pk=None):
-        user = request.user
-
-        if not (hasattr(user, 'hruser') or user.groups.filter(name='HR').exists()):
+        if not get_roles(request).has_hr_access:
             return Response({'success': False, 'message': 'Only HR can delete archives.'}, status=status.HTTP_403_FORBIDDEN)
 
         try:
@@ -61,17 +100,102 @@ class LeaveRequestArchiveViewSet(viewsets.ReadOnlyModelViewSet):
         except Exception as e:
             return Response({'success': False, 'message': f'Error deleting archive: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
 
+def filter_export(queryset, params):
+    """
+    Apply the bulk export parameters (department, date_from, date_to, output)
+    to ``queryset``. Returns ``(queryset, output, error message or None)``.
+    """
+    output = params.get('output', 'zip')
+    if output not in ('zip', 'pdf'):
+        return queryset, output, "output must be 'zip' or 'pdf'"
+    if output == 'pdf' and PdfWriter is None:
+        return queryset, output, 'Merged PDF export is not available'
+
+    department = params.get('department')
+    if department:
+        queryset = queryset.filter(employee_department=department)
+    for param, lookup in (('date_from', 'date_filed__gte'), ('date_to', 'date_filed__lte')):
+        value = params.get(param)
+        if value:
+            parsed = parse_date(str(value))
+            if parsed is None:
+                return queryset, output, f'{param} must be YYYY-MM-DD'
+            queryset = queryset.filter(**{lookup: parsed})
+    return queryset, output, None
+
+
+class PdfRenderJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Background bulk exports: POST the export parameters to enqueue a job,
+    poll it for status and progress, then fetch ``download/``. Jobs are
+    rendered by ``manage.py run_pdf_jobs``.
+    """
+    serializer_class = PdfRenderJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        qs = PdfRenderJob.objects.all()
+        if not get_roles(self.request).has_hr_access:
+            qs = qs.filter(requested_by=self.request.user)
+        return qs
+
+    def create(self, request):
+        roles = get_roles(request)
+        if roles.dean is None and not roles.has_hr_access:
+            return Response({'success': False, 'message': 'HR or dean only'}, status=status.HTTP_403_FORBIDDEN)
+
+        archives = LeaveRequestArchive.objects.all()
+        if roles.dean is not None:
+            archives = archives.filter(employee_department=roles.dean.department.name)
+        archives, output, error = filter_export(archives, request.data)
+        if error:
+            return Response({'success': False, 'message': error}, status=status.HTTP_400_BAD_REQUEST)
+
+        # pypdf holds every page of a merged PDF in memory; ZIPs are streamed.
+        limit = MERGED_PDF_LIMIT if output == 'pdf' else PDF_JOB_LIMIT
+        archive_ids = list(archives.order_by('date_filed', 'id').values_list('id', flat=True)[:limit + 1])
+        if not archive_ids:
+            return Response({'success': False, 'message': 'No archives match'}, status=status.HTTP_404_NOT_FOUND)
+        if len(archive_ids) > limit:
+            return Response({
+                'success': False,
+                'message': f'More than {limit} archives match for output={output}; '
+                           f'narrow the department or date range'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        job = PdfRenderJob.objects.create(
+            requested_by=request.user, output=output, archive_ids=archive_ids, total=len(archive_ids)
+        )
+        return Response({
+            'success': True,
+            'message': f'Export of {job.total} archive(s) queued',
+            'data': self.get_serializer(job).data
+        }, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        job = self.get_object()
+        if job.status != 'done':
+            return Response({'success': False, 'message': f'Job is {job.status}'}, status=status.HTTP_409_CONFLICT)
+        path = job.result_path
+        if not path.exists():
+            return Response({'success': False, 'message': 'The export has expired'}, status=status.HTTP_410_GONE)
+
+        etag = f'"job-{job.pk}-{int(job.finished_at.timestamp())}"'
+        content_type = 'application/pdf' if job.output == 'pdf' else 'application/zip'
+        return file_response(request, path, etag, job.filename, content_type)
+
+
 def export_archive_pdf_view(request, pk):
     archive = get_object_or_404(LeaveRequestArchive, pk=pk)
-    position = (archive.employee_position or "").lower()
-
-    teaching_keywords = ["instructor", "teacher", "educator", "coach"]
+    digest = archive_digest(archive)
+    etag = f'"{digest[:32]}"'
 
-    if any(keyword in position for keyword in teaching_keywords):
-        pdf_buffer = export_osmena_leave_application_pdf_teaching_format(archive)
-    else:
-        pdf_buffer = export_osmena_leave_application_pdf_non_teaching_format(archive)
+    # Answer revalidations before touching the cache or ReportLab.
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response["ETag"] = etag
+        return response
 
-    response = HttpResponse(pdf_buffer, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="leave_archive_{archive.id}.pdf"'
-    return response
+    path = cached_archive_pdf(archive, digest)
+    return file_response(request, path, etag, f"leave_archive_{archive.id}.pdf")
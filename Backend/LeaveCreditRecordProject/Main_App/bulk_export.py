@@ -0,0 +1,179 @@
+"""
+Bulk export of archive PDFs.
+
+Documents are rendered through the on-disk cache of ``pdf_cache``: cache
+misses are rendered by a pool of worker processes (ReportLab is CPU-bound
+and holds the GIL), and the response is assembled from the cached files, so
+no more than one chunk of one document is held in memory while streaming
+a ZIP.
+
+A merged PDF needs every object offset before it can write its trailer, so
+it is assembled by pypdf into a temporary file on disk and streamed from
+there. Sources are read and closed one at a time, but pypdf holds every page
+in memory until it writes, so merged output is capped at MERGED_PDF_LIMIT
+documents. pypdf is optional; without it only ZIP exports are offered.
+
+Exports too big to render inside a request are queued as ``PdfRenderJob``s
+and written to PDF_JOB_DIR by ``run_render_job``.
+"""
+import os
+import shutil
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from tempfile import TemporaryFile, mkstemp
+
+from django.conf import settings
+
+from .models import LeaveRequestArchive
+from .pdf_cache import archive_digest, cache_path, cached_archive_pdf
+
+try:
+    from pypdf import PdfWriter
+except ImportError:
+    PdfWriter = None
+
+BULK_EXPORT_LIMIT = 500
+MERGED_PDF_LIMIT = 500
+PDF_JOB_LIMIT = 10000
+PROGRESS_EVERY = 10
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _setup_worker():
+    # Spawned workers (Windows, macOS) start without Django configured.
+    import django
+    django.setup()
+
+
+def rendered_pdfs(archives, workers=None):
+    """
+    Yield ``(archive, path)`` in order. Cached documents are yielded as is;
+    misses are submitted to a process pool up front and yielded as they
+    finish. ``workers`` defaults to the PDF_EXPORT_WORKERS setting; with a
+    single worker everything renders in this process.
+    """
+    workers = workers or getattr(settings, 'PDF_EXPORT_WORKERS', None)
+    pool = None
+    pending = []
+    try:
+        for archive in archives:
+            digest = archive_digest(archive)
+            path = cache_path(archive, digest)
+            if path.exists() or workers == 1:
+                pending.append((archive, path if path.exists() else None, digest))
+                continue
+            if pool is None:
+                pool = ProcessPoolExecutor(max_workers=workers, initializer=_setup_worker)
+            pending.append((archive, pool.submit(cached_archive_pdf, archive, digest), digest))
+
+        for archive, result, digest in pending:
+            if result is None:
+                yield archive, cached_archive_pdf(archive, digest)
+            elif hasattr(result, 'result'):
+                yield archive, result.result()
+            else:
+                yield archive, result
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def archive_filename(archive):
+    return f"{archive.employee_id}_leave_archive_{archive.pk}.pdf"
+
+
+class _Buffer:
+    """Write-only sink for ``zipfile``; drained after every chunk."""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def stream_zip(items):
+    """Yield a ZIP of ``(archive, path)`` items chunk by chunk."""
+    buffer = _Buffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive_zip:
+        for archive, path in items:
+            with open(path, 'rb') as source, archive_zip.open(archive_filename(archive), 'w') as entry:
+                for chunk in iter(lambda: source.read(STREAM_CHUNK_SIZE), b''):
+                    entry.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+def merged_pdf(items):
+    """
+    One PDF with the pages of every item, in a temporary file rewound to 0.
+    Raises ValueError past MERGED_PDF_LIMIT items.
+    """
+    if PdfWriter is None:
+        raise RuntimeError("Merged PDF export needs the pypdf package")
+
+    output = TemporaryFile()
+    writer = PdfWriter()
+    try:
+        for count, (_, path) in enumerate(items, start=1):
+            if count > MERGED_PDF_LIMIT:
+                raise ValueError(f"A merged PDF holds at most {MERGED_PDF_LIMIT} documents")
+            # Given a path, pypdf reads the file and closes it straight away.
+            writer.append(str(path))
+        writer.write(output)
+    except BaseException:
+        output.close()
+        raise
+    finally:
+        writer.close()
+    output.seek(0)
+    return output
+
+
+def run_render_job(job, workers=None):
+    """
+    Render a claimed ``PdfRenderJob`` into PDF_JOB_DIR, reporting progress
+    every PROGRESS_EVERY documents, and mark it done, or failed with the error.
+    """
+    archives = list(LeaveRequestArchive.objects.filter(pk__in=job.archive_ids).order_by('date_filed', 'id'))
+
+    def counted(items):
+        rendered = 0
+        for rendered, item in enumerate(items, start=1):
+            yield item
+            if rendered % PROGRESS_EVERY == 0:
+                job.report_progress(rendered)
+        job.rendered = rendered
+
+    directory = Path(settings.PDF_JOB_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as result:
+            items = counted(rendered_pdfs(archives, workers))
+            if job.output == 'pdf':
+                with merged_pdf(items) as merged:
+                    shutil.copyfileobj(merged, result)
+            else:
+                for chunk in stream_zip(items):
+                    result.write(chunk)
+        os.replace(tmp_name, directory / job.filename)
+    except Exception as e:
+        Path(tmp_name).unlink(missing_ok=True)
+        job.finish(error=f'{type(e).__name__}: {e}')
+    else:
+        job.finish(result_file=job.filename)
+    return job
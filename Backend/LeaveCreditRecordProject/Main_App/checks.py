@@ -0,0 +1,29 @@
+from django.core.checks import Tags, Warning, register
+from django.db import DatabaseError
+from django.utils import timezone
+
+
+@register(Tags.database)
+def current_year_balances(app_configs=None, databases=None, **kwargs):
+    """
+    Warn (on migrate and ``check --database``) when active employees have no
+    leave balance for the current year, e.g. right after the first deployment
+    of the ledger: their leave requests are refused until one is opened.
+    """
+    if not databases:
+        return []
+    from .models import Employee
+
+    year = timezone.now().year
+    try:
+        missing = Employee.objects.filter(is_active=True).exclude(leave_balances__year=year).count()
+    except DatabaseError:
+        # Tables not migrated yet.
+        return []
+    if not missing:
+        return []
+    return [Warning(
+        f"{missing} active employee(s) have no leave balance for {year}; their leave requests will be refused.",
+        hint=f"Run: python manage.py rollover_leave_balances --year {year}",
+        id='Main_App.W001',
+    )]
@@ -0,0 +1,87 @@
+import hashlib
+
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from .pagination import KeysetPagination
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for ``list`` and ``retrieve``.
+
+    The validators come from one aggregate query over the filtered queryset:
+    the row count, the sum of ids (so swapping one row for another shows)
+    and the latest timestamp of each ``validator_fields`` entry. Those name
+    the ``updated_at`` of every related row the serializer emits, and
+    ``validator_queryset`` can annotate more. A matching If-None-Match /
+    If-Modified-Since is answered with 304 Not Modified before anything is
+    serialized.
+
+    Paginated lists aggregate over the keyset slice of the requested page
+    only, so every page costs the same. Lists send no Last-Modified: deleting
+    a row leaves the latest timestamp where it was.
+    """
+    validator_fields = ('updated_at',)
+
+    def validator_queryset(self, queryset):
+        """Annotate timestamps that ``validator_fields`` refer to."""
+        return queryset
+
+    def get_validators(self, queryset, with_last_modified=True):
+        aggregates = {
+            f'latest_{index}': Max(field)
+            for index, field in enumerate(self.validator_fields)
+        }
+        aggregates['count'] = Count('pk')
+        aggregates['ids'] = Sum('pk')
+        if not queryset.query.is_sliced:
+            queryset = queryset.order_by()
+        values = queryset.aggregate(**aggregates)
+
+        raw = '|'.join(
+            [
+                self.request.get_full_path(),
+                str(self.request.user.pk),
+                getattr(self.request, 'accepted_media_type', ''),
+            ]
+            + [f'{key}={values[key]}' for key in sorted(values)]
+        )
+        etag = 'W/"%s"' % hashlib.md5(raw.encode()).hexdigest()
+
+        timestamps = [
+            values[f'latest_{index}'] for index in range(len(self.validator_fields))
+            if values[f'latest_{index}'] is not None
+        ]
+        last_modified = int(max(timestamps).timestamp()) if timestamps and with_last_modified else None
+        return etag, last_modified
+
+    def conditional_response(self, queryset, render, with_last_modified=True):
+        etag, last_modified = self.get_validators(queryset, with_last_modified)
+
+        response = get_conditional_response(self.request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = render()
+            if response.status_code == 200:
+                response['ETag'] = etag
+                if last_modified is not None:
+                    response['Last-Modified'] = http_date(last_modified)
+        # JSON and MessagePack share the URL, so caches must key on Accept.
+        patch_vary_headers(response, ('Accept',))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.validator_queryset(self.filter_queryset(self.get_queryset()))
+        if isinstance(self.paginator, KeysetPagination) and self.paginator.is_requested(request):
+            queryset = self.paginator.page_slice(queryset, request, self)
+        return self.conditional_response(
+            queryset, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs), with_last_modified=False
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.validator_queryset(self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        ))
+        return self.conditional_response(queryset, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs))
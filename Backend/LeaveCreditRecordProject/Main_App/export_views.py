@@ -1,943 +1,380 @@
-from reportlab.lib.pagesizes import A4
+"""
+PDF leave application forms for archived leave requests.
+
+The form is described as data (paragraph styles, table styles and a tree of
+sections) and compiled once per process into a ``LeaveFormTemplate``: styles
+become ``ParagraphStyle``/``TableStyle`` objects, sizes are converted to
+points, placeholders are found up front, and the logo is decoded once,
+resampled to its print size and flattened to JPEG, which ReportLab embeds as
+is instead of re-encoding a 500px RGBA PNG for every document. Rendering an
+archive only binds its values and lays out the resulting flowables.
+
+Output is deterministic: documents are built with ReportLab's ``invariant``
+flag (fixed creation date and /ID) and dated from the archive, so the same
+row always renders to the same bytes and pdf_cache can give it a strong ETag.
+"""
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+from string import Formatter
+from typing import NamedTuple
+
+from PIL import Image as PILImage
 from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import mm
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
-from io import BytesIO
-from datetime import datetime
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.platypus import Image, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
 
+from django.utils import timezone
 
-def export_osmena_leave_application_pdf_non_teaching_format(archive_obj):
-    buffer = BytesIO()
-    
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        rightMargin=12*mm,
-        leftMargin=12*mm,
-        topMargin=10*mm,
-        bottomMargin=10*mm
-    )
-    
-    styles = getSampleStyleSheet()
-    story = []
-    
-    header_style = ParagraphStyle(
-        'HeaderStyle',
-        parent=styles['Normal'],
-        fontSize=11,
-        textColor=colors.HexColor("#333333"),
-        alignment=TA_CENTER,
-        spaceAfter=0.5*mm,
-        fontName='Helvetica-Bold'
-    )
-    
-    subheader_style = ParagraphStyle(
-        'SubHeaderStyle',
-        parent=styles['Normal'],
-        fontSize=8,
-        textColor=colors.HexColor("#555555"),
-        alignment=TA_CENTER,
-        spaceAfter=0
-    )
-    
-    section_header_style = ParagraphStyle(
-        'SectionHeaderStyle',
-        parent=styles['Normal'],
-        fontSize=9,
-        textColor=colors.black,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold',
-        spaceAfter=2*mm,
-        spaceBefore=2*mm
-    )
-    
-    small_text = ParagraphStyle(
-        'SmallText',
-        parent=styles['Normal'],
-        fontSize=7,
-        leading=8.5
-    )
-    
-    tiny_text = ParagraphStyle(
-        'TinyText',
-        parent=styles['Normal'],
-        fontSize=6.5,
-        leading=7.5,
-    )
-    
-    tiny_text2 = ParagraphStyle(
-        'TinyText',
-        parent=styles['Normal'],
-        fontSize=6.5,
-        leading=7.5,
-        alignment=TA_CENTER
-    )
-    
-    centered_name_style = ParagraphStyle(
-        'CenteredName',
-        parent=small_text,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    
-    centered_title_style = ParagraphStyle(
-        'CenteredTitle',
-        parent=small_text,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Oblique',
-        fontSize=6.5
-    )
-    
-    centered_line_style = ParagraphStyle(
-        'CenteredLine',
-        parent=small_text,
-        alignment=TA_CENTER
-    )
-    
-    centered_line_style2 = ParagraphStyle(
-        'CenteredLine',
-        parent=small_text,
-        alignment=TA_LEFT,
-        leftIndent=16*mm
-    )
-    
-    small_text_2 = ParagraphStyle(
-        'SmallText',
-        alignment=TA_LEFT,
-        parent=styles['Normal'],
-        fontSize=7,
-        leading=8.5,
-        leftIndent=10*mm
-    )
-    
-    centered_approved_style = ParagraphStyle(
-        'CenteredApproved',
-        parent=small_text,
-        alignment=TA_CENTER,
-        rightIndent=5*mm
-    )
-    
-    def safe_get_attr(obj, attr_name, default=""):
-        if hasattr(obj, attr_name):
-            value = getattr(obj, attr_name)
-            return value if value is not None else default
-        return default
-    
-    def truncate_text(text, max_length=50):
-        text_str = str(text) if text else ""
-        if len(text_str) > max_length:
-            return text_str[:max_length-3] + "..."
-        return text_str
-    
-    employee_name = safe_get_attr(archive_obj, 'employee_name', '')
-    employee_department = truncate_text(safe_get_attr(archive_obj, 'employee_department'), 30)
-    employee_position = truncate_text(safe_get_attr(archive_obj, 'employee_position'), 30)
-
-    date_filed = safe_get_attr(archive_obj, 'date_filed')
-    if hasattr(date_filed, 'strftime'):
-        date_filed_str = date_filed.strftime("%B %d, %Y")
-    else:
-        date_filed_str = str(date_filed) if date_filed else ""
-    
-    leave_type = str(safe_get_attr(archive_obj, 'leave_type', '')).lower()
-    number_of_days = str(safe_get_attr(archive_obj, 'number_of_days', ''))
-    leave_balance_after = safe_get_attr(archive_obj, 'leave_balance_after', '15')
-    
-    vacation_location = str(safe_get_attr(archive_obj, 'vacation_location', '')).lower()
-    sick_location = str(safe_get_attr(archive_obj, 'sick_location', '')).lower()
-    reason = safe_get_attr(archive_obj, 'reason', '')
-    
-    vacation_check = '[✔]' if leave_type == 'vacation' else '[ ]'
-    sick_check = '[✔]' if leave_type == 'sick' else '[ ]'
-    maternity_check = '[✔]' if leave_type in ['maternity', 'paternity'] else '[ ]'
-    
-    philippines_check = '[ ]'
-    abroad_check = '[ ]'
-    abroad_reason = '_________________________'
-    
-    if leave_type == 'vacation':
-        if vacation_location == 'philippines':
-            philippines_check = '[✔]'
-        elif vacation_location == 'abroad':
-            abroad_check = '[✔]'
-            abroad_reason = f'<u>{reason}</u>' if reason else '_________________________'
-    
-    hospital_check = '[ ]'
-    home_check = '[ ]'
-    hospital_reason = '_________________________'
-    
-    if leave_type == 'sick':
-        if sick_location == 'hospital':
-            hospital_check = '[✔]'
-            hospital_reason = f'<u>{reason}</u>' if reason else '_________________________'
-        elif sick_location == 'home':
-            home_check = '[✔]'
-    
-    others_check = '[ ]'
-    others_reason = '_________________________'
-    if leave_type == 'emergency':
-        others_check = '[✔]'
-        others_reason = f'<u>Emergency Leave: {reason}</u>' if reason else '_________________________'
-
-    logo = Image(r"C:\Users\buddy\OneDrive\Desktop\HR_LeaveManagement\Backend\LeaveCreditRecordProject\Main_App\oc_logo.png")
-    logo.drawHeight = 15*mm
-    logo.drawWidth = 15*mm
-
-    info_block = [
-        Paragraph("OSMEÑA COLLEGES", header_style),
-        Paragraph("City of Masbate, 5400, Philippines", subheader_style),
-        Paragraph("Tel: (056) 333-4444", subheader_style),
-        Paragraph('E-Mail: <font color="blue">osmenacolleges@yahoo.com.ph</font>', subheader_style),
-    ]
-
-    info_table = Table([[info_block]], colWidths=[186*mm])
-    info_table.setStyle(TableStyle([
-        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-    ]))
-
-    logo_table = Table([[logo]], colWidths=[186*mm])
-    logo_table.setStyle(TableStyle([
-        ('ALIGN', (0,0), (-1,-1), 'LEFT'),    
-        ('LEFTPADDING', (0,0), (0,0), 86*mm), 
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('MARGINTOP', (0,0), (-1,-1), 0*mm),
-    ]))
-
-    story.append(logo_table)
-    story.append(info_table)
-    story.append(Spacer(1, 2*mm))
-
-    line_table = Table([[""]], colWidths=[186*mm])
-    line_table.setStyle(TableStyle([
-        ('LINEABOVE', (0,0), (-1,0), 1.5, colors.black),
-    ]))
-    story.append(line_table)
-
-
-    line_table = Table([[""]], colWidths=[186*mm])
-    line_table.setStyle(TableStyle([
-        ('LINEABOVE', (0,0), (-1,0), 1.5, colors.black),
-        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-    ]))
-    story.append(line_table)
-        
-    title_data = [["APPLICATION FOR LEAVE"]]
-    title_table = Table(title_data, colWidths=[186*mm])
-    title_table.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,-1), colors.lightgrey),
-        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-        ('FONTNAME', (0,0), (-1,-1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0,0), (-1,-1), 10),
-        ('TOPPADDING', (0,0), (-1,-1), 3),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 3),
-    ]))
-    story.append(title_table)
-    
-    emp_header_data = [
-        [Paragraph("<b>Office / Agency</b>", tiny_text), Paragraph("<b>Full Name</b>", tiny_text)],
-        [Paragraph("OSMEÑA COLLEGES", tiny_text2), Paragraph(employee_name, tiny_text2)],
-    ]
-
-    emp_header_table = Table(emp_header_data, colWidths=[93*mm, 93*mm])
-    emp_header_table.setStyle(TableStyle([
-        ('GRID', (0,0), (-1,-1), 0.5, colors.black),
-        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('FONTSIZE', (0,0), (-1,-1), 7.5),
-        ('TOPPADDING', (0,0), (-1,-1), 4),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-    ]))
-    story.append(emp_header_table)
-    
-    dept_header_data = [
-        [Paragraph("<b>Department</b>", tiny_text), 
-         Paragraph("<b>Position</b>", tiny_text), 
-         Paragraph("<b>Date of Filing</b>", tiny_text)],
-    ]
-    dept_header_table = Table(dept_header_data, colWidths=[62*mm, 62*mm, 62*mm])
-    dept_header_table.setStyle(TableStyle([
-        ('GRID', (0,0), (-1,-1), 0.5, colors.black),
-        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('TOPPADDING', (0,0), (-1,-1), 2),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 2),
-    ]))
-    story.append(dept_header_table)
-    
-    dept_values_data = [[employee_department, employee_position, date_filed_str]]
-    dept_values_table = Table(dept_values_data, colWidths=[62*mm, 62*mm, 62*mm])
-    dept_values_table.setStyle(TableStyle([
-        ('GRID', (0,0), (-1,-1), 0.5, colors.black),
-        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('FONTSIZE', (0,0), (-1,-1), 7.5),
-        ('TOPPADDING', (0,0), (-1,-1), 4),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-    ]))
-    story.append(dept_values_table)
-    
-    details_header_data = [[Paragraph("<b>DETAILS OF APPLICATION</b>", section_header_style)]]
-    details_header_table = Table(details_header_data, colWidths=[186*mm])
-    details_header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,-1), colors.lightgrey),
-        ('TOPPADDING', (0,0), (-1,-1), 2),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 2),
-    ]))
-    story.append(details_header_table)
-    
-    left_column = f"""
+# Bump whenever the layout changes so cached PDFs (see pdf_cache) are re-rendered.
+PDF_TEMPLATE_VERSION = 3
+
+LOGO_PATH = Path(__file__).resolve().parent / 'oc_logo.png'
+LOGO_SIZE = 15 * mm
+# About 300 dpi at LOGO_SIZE.
+LOGO_PIXELS = 180
+
+BLANK = '_________________________'
+CHECKED, UNCHECKED = '[✔]', '[ ]'
+
+
+class P(NamedTuple):
+    """A paragraph; ``markup`` may contain ``{placeholders}``."""
+    style: str
+    markup: str
+
+
+class S(NamedTuple):
+    """Vertical space, in mm."""
+    height: float
+
+
+class T(NamedTuple):
+    """A table: rows of cells (text, P, a list of flowable specs, or LOGO), widths in mm and a table style."""
+    rows: list
+    widths: tuple
+    style: str
+
+
+LOGO = object()
+
+PARAGRAPH_STYLES = {
+    'header': dict(parent='Normal', fontSize=11, textColor=colors.HexColor("#333333"), alignment=TA_CENTER,
+                   spaceAfter=0.5 * mm, fontName='Helvetica-Bold'),
+    'subheader': dict(parent='Normal', fontSize=8, textColor=colors.HexColor("#555555"), alignment=TA_CENTER,
+                      spaceAfter=0),
+    'section_header': dict(parent='Normal', fontSize=9, textColor=colors.black, alignment=TA_CENTER,
+                           fontName='Helvetica-Bold', spaceAfter=2 * mm, spaceBefore=2 * mm),
+    'small': dict(parent='Normal', fontSize=7, leading=8.5),
+    'tiny': dict(parent='Normal', fontSize=6.5, leading=7.5),
+    'tiny_centered': dict(parent='Normal', fontSize=6.5, leading=7.5, alignment=TA_CENTER),
+    'centered_name': dict(parent='small', alignment=TA_CENTER, fontName='Helvetica-Bold'),
+    'centered_title': dict(parent='small', alignment=TA_CENTER, fontName='Helvetica-Oblique', fontSize=6.5),
+    'centered_line': dict(parent='small', alignment=TA_CENTER),
+    'indented_line': dict(parent='small', alignment=TA_LEFT, leftIndent=16 * mm),
+    'small_indented': dict(parent='Normal', alignment=TA_LEFT, fontSize=7, leading=8.5, leftIndent=10 * mm),
+    'centered_approved': dict(parent='small', alignment=TA_CENTER, rightIndent=5 * mm),
+    'president_left': dict(parent='small', alignment=TA_LEFT, leftIndent=45 * mm),
+}
+
+_GRID = ('GRID', (0, 0), (-1, -1), 0.5, colors.black)
+_MIDDLE = ('VALIGN', (0, 0), (-1, -1), 'MIDDLE')
+_CENTER = ('ALIGN', (0, 0), (-1, -1), 'CENTER')
+_GREY = ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey)
+
+
+def _padding(vertical, left=None, right=None):
+    commands = [('TOPPADDING', (0, 0), (-1, -1), vertical), ('BOTTOMPADDING', (0, 0), (-1, -1), vertical)]
+    if left is not None:
+        commands.append(('LEFTPADDING', (0, 0), (-1, -1), left))
+    if right is not None:
+        commands.append(('RIGHTPADDING', (0, 0), (-1, -1), right))
+    return commands
+
+
+TABLE_STYLES = {
+    'logo': [('ALIGN', (0, 0), (-1, -1), 'LEFT'), ('LEFTPADDING', (0, 0), (0, 0), 86 * mm), _MIDDLE,
+             ('MARGINTOP', (0, 0), (-1, -1), 0 * mm)],
+    'info': [_CENTER, _MIDDLE],
+    'rule': [('LINEABOVE', (0, 0), (-1, 0), 1.5, colors.black)],
+    'rule_centered': [('LINEABOVE', (0, 0), (-1, 0), 1.5, colors.black), _CENTER],
+    'title': [_GREY, _CENTER, ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'), ('FONTSIZE', (0, 0), (-1, -1), 10),
+              *_padding(3)],
+    'boxed_values': [_GRID, _CENTER, _MIDDLE, ('FONTSIZE', (0, 0), (-1, -1), 7.5), *_padding(4)],
+    'boxed_labels': [_GRID, _CENTER, _MIDDLE, *_padding(2)],
+    'section': [_GREY, *_padding(2)],
+    'boxed_top': [_GRID, ('VALIGN', (0, 0), (-1, -1), 'TOP'), *_padding(4, left=4, right=4)],
+    'summary': [_GRID, ('FONTSIZE', (0, 0), (-1, -1), 7), ('ALIGN', (0, 0), (1, -1), 'LEFT'), _MIDDLE,
+                ('LEFTPADDING', (0, 0), (-1, -1), 3), *_padding(2)],
+    'credits': [_GRID, ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey), _CENTER, _MIDDLE,
+                ('FONTSIZE', (0, 0), (-1, -1), 6), *_padding(2)],
+}
+
+NBSP = '&nbsp;'
+
+DETAILS_LEFT = f"""
         <b>TYPE OF LEAVE</b><br/>
         <br/>
-        {vacation_check} Vacation<br/>
+        {{vacation_check}} Vacation<br/>
         [ ] To seek employment<br/>
-        {others_check} Others (specify)<br/>
+        {{others_check}} Others (specify)<br/>
         <br/>
-                {others_reason}<br/>
+                {{others_reason}}<br/>
         <br/>
         <br/>
-        {sick_check} Sick<br/>
-        {maternity_check} Maternity/Paternity<br/>
+        {{sick_check}} Sick<br/>
+        {{maternity_check}} Maternity/Paternity<br/>
         <br/>
         <br/>
-        No. of Working Days: <b>{number_of_days} Day/s</b><br/>
+        No. of Working Days: <b>{{number_of_days}} Day/s</b><br/>
         <br/>
         <br/>
-        &nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;Inclusive Dates: ________ / ________
+        {NBSP * 25}Inclusive Dates: ________ / ________
     """
-    
-    right_column = f"""
+
+DETAILS_RIGHT = f"""
         <b>WHERE LEAVE WILL BE SPENT</b><br/>
         <i>*In case of vacation leave</i><br/>
-        {philippines_check} Within the Philippines<br/>
-        {abroad_check} Abroad (specify)<br/>
+        {{philippines_check}} Within the Philippines<br/>
+        {{abroad_check}} Abroad (specify)<br/>
         <br/>
-                {abroad_reason}<br/>
+                {{abroad_reason}}<br/>
         <br/>
         <i>*In case of sick leave</i><br/>
-        {hospital_check} In Hospital (specify)<br/>
+        {{hospital_check}} In Hospital (specify)<br/>
         <br/>
-                {hospital_reason}<br/>
+                {{hospital_reason}}<br/>
         <br/>
-        {home_check} Out Patient (specify)<br/>
+        {{home_check}} Out Patient (specify)<br/>
         <br/>
-        &nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;______________________________________________________
+        {NBSP * 12}______________________________________________________
         <br/>
         <br/>
-        &nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;_____________________________<br/>
-        &nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;<i>Signature of Applicant</i>
+        {NBSP * 59}_____________________________<br/>
+        {NBSP * 70}<i>Signature of Applicant</i>
     """
-    
-    details_data = [[
-        Paragraph(left_column, small_text),
-        Paragraph(right_column, small_text)
-    ]]
-    
-    details_table = Table(details_data, colWidths=[93*mm, 93*mm])
-    details_table.setStyle(TableStyle([
-        ('GRID', (0,0), (-1,-1), 0.5, colors.black),
-        ('VALIGN', (0,0), (-1,-1), 'TOP'),
-        ('LEFTPADDING', (0,0), (-1,-1), 4),
-        ('RIGHTPADDING', (0,0), (-1,-1), 4),
-        ('TOPPADDING', (0,0), (-1,-1), 4),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-    ]))
-    story.append(details_table)
-    
-    action_header_data = [[Paragraph("<b>DETAILS OF ACTION ON APPLICATION</b>", 
-                                    section_header_style)]]
-    action_header_table = Table(action_header_data, colWidths=[186*mm])
-    action_header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,-1), colors.lightgrey),
-        ('TOPPADDING', (0,0), (-1,-1), 2),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 2),
-    ]))
-    story.append(action_header_table)
-    
-    current_date = datetime.now().strftime("%B %d, %Y")
-    
-    summary_data = [
-        [Paragraph("<b>TOTAL NO. OF LEAVE CREDITS:</b>", tiny_text), 
-         Paragraph(f"<b>{number_of_days}-DAY</b>", tiny_text), 
-         ""],
-        [Paragraph("<b>LEAVE CREDITS AS OF:</b>", tiny_text), 
-         current_date, 
-         ""],
-        [Paragraph("<b>NO. OF LEAVE CREDITS:</b>", tiny_text), 
-         f"{leave_balance_after}-DAY", 
-         ""]
-    ]
-    summary_table = Table(summary_data, colWidths=[55*mm, 45*mm, 86*mm])
-    summary_table.setStyle(TableStyle([
-        ('GRID', (0,0), (-1,-1), 0.5, colors.black),
-        ('FONTSIZE', (0,0), (-1,-1), 7),
-        ('ALIGN', (0,0), (1,-1), 'LEFT'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('LEFTPADDING', (0,0), (-1,-1), 3),
-        ('TOPPADDING', (0,0), (-1,-1), 2),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 2),
-    ]))
-    story.append(summary_table)
-    
-    vacation_days = "0"
-    sick_days = "0"
-    
-    if leave_type in ['vacation', 'paternity', 'maternity', 'emergency']:
-        vacation_days = str(number_of_days)
-    elif leave_type == 'sick':
-        sick_days = str(number_of_days)
-    
-    credits_header = [
-        [Paragraph("<b>Vacation/others</b>", small_text),
-         Paragraph("<b>Sick</b>", small_text),
-         Paragraph("<b>Total</b>", small_text),
-         Paragraph("<b>Remaining</b>", small_text)]
-    ]
-    
-    credits_values = [
-        [Paragraph(f"{vacation_days} days", small_text),
-         Paragraph(f"{sick_days} days", small_text),
-         Paragraph(f"{number_of_days} days", small_text),
-         Paragraph(f"{leave_balance_after} days", small_text)]
-    ]
-    
-    credits_table = Table(credits_header + credits_values, 
-                         colWidths=[23*mm, 19*mm, 19*mm, 18.3*mm])
-    credits_table.setStyle(TableStyle([
-        ('GRID', (0,0), (-1,-1), 0.5, colors.black),
-        ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
-        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('FONTSIZE', (0,0), (-1,-1), 6),
-        ('TOPPADDING', (0,0), (-1,-1), 2),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 2),
-    ]))
-    
-    left_side_elements = [
-        credits_table,
-        Spacer(1, 2*mm),
-        Paragraph("<i>Personnel Officer:</i>", small_text),
-        Spacer(1, 2*mm),
-        Paragraph("<u><b>JUNESSA CEZANNE REYES, RPm, CHRA</b></u>", centered_name_style),
-        Paragraph("ACTING HR", centered_title_style),
-        Spacer(1, 2*mm),
-        Paragraph("<i>Approved for:</i>", small_text),
-        Paragraph("_______ days with pay", centered_approved_style),
-        Paragraph("_______ days without pay", centered_approved_style),
-        Paragraph("_______ others (specify)", centered_approved_style)
-    ]
-    
-    right_side_elements = [
-        Paragraph("<b>RECOMMENDATION:</b>", small_text),
-        Paragraph("[ ] Approval<br/>[ ] Disapproval due to", small_text_2),
-        Spacer(1, 1*mm),
-        Paragraph("__________________________________________________", centered_line_style2),
-        Spacer(1, 6*mm),
-        Paragraph("_________________________", centered_line_style),
-        Spacer(1, 1*mm),
-        Paragraph("<i>Authorized Official</i>", centered_title_style),
-        Spacer(1, 4*mm),
-        Paragraph("<i>Recommending approval:</i>", small_text),
-        Spacer(1, 2*mm),
-        Paragraph("<u><b>LORENZO GABRIEL V. PELIÑO</b></u>", centered_name_style),
-        Paragraph("<i>Vice President for Administration and Finance</i>", centered_title_style)
-    ]
-    
-    main_content_data = [[left_side_elements, right_side_elements]]
-    main_content_table = Table(main_content_data, colWidths=[82*mm, 104*mm])
-    main_content_table.setStyle(TableStyle([
-        ('GRID', (0,0), (-1,-1), 0.5, colors.black),
-        ('VALIGN', (0,0), (-1,-1), 'TOP'),
-        ('LEFTPADDING', (0,0), (-1,-1), 4),
-        ('RIGHTPADDING', (0,0), (-1,-1), 4),
-        ('TOPPADDING', (0,0), (-1,-1), 4),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-    ]))
-    story.append(main_content_table)
-    
-    story.append(Spacer(1, 3*mm))
-    
-    president_left_style = ParagraphStyle(
-        'PresidentLeft',
-        parent=small_text,
-        alignment=TA_LEFT,
-        leftIndent=45*mm,
-    )
-    
-    story.append(Paragraph("<i>Approved by:</i>", president_left_style))
-    story.append(Spacer(1, 2*mm))
-    story.append(Paragraph("<u><b>MIGUEL LUIS V. PELIÑO</b></u>", centered_name_style))
-    story.append(Paragraph("<i>President</i>", centered_title_style))
-    
-    doc.build(story)
-    buffer.seek(0)
-    return buffer
 
-def export_osmena_leave_application_pdf_teaching_format(archive_obj):
-    buffer = BytesIO()
-    
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        rightMargin=12*mm,
-        leftMargin=12*mm,
-        topMargin=10*mm,
-        bottomMargin=10*mm
-    )
-    
-    styles = getSampleStyleSheet()
-    story = []
-    
-    header_style = ParagraphStyle(
-        'HeaderStyle',
-        parent=styles['Normal'],
-        fontSize=11,
-        textColor=colors.HexColor("#333333"),
-        alignment=TA_CENTER,
-        spaceAfter=0.5*mm,
-        fontName='Helvetica-Bold'
-    )
-    
-    subheader_style = ParagraphStyle(
-        'SubHeaderStyle',
-        parent=styles['Normal'],
-        fontSize=8,
-        textColor=colors.HexColor("#555555"),
-        alignment=TA_CENTER,
-        spaceAfter=0
-    )
-    
-    section_header_style = ParagraphStyle(
-        'SectionHeaderStyle',
-        parent=styles['Normal'],
-        fontSize=9,
-        textColor=colors.black,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold',
-        spaceAfter=2*mm,
-        spaceBefore=2*mm
-    )
-    
-    small_text = ParagraphStyle(
-        'SmallText',
-        parent=styles['Normal'],
-        fontSize=7,
-        leading=8.5
-    )
-    
-    tiny_text = ParagraphStyle(
-        'TinyText',
-        parent=styles['Normal'],
-        fontSize=6.5,
-        leading=7.5,
-    )
-    
-    tiny_text2 = ParagraphStyle(
-        'TinyText',
-        parent=styles['Normal'],
-        fontSize=6.5,
-        leading=7.5,
-        alignment=TA_CENTER
-    )
-    
-    centered_name_style = ParagraphStyle(
-        'CenteredName',
-        parent=small_text,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    
-    centered_title_style = ParagraphStyle(
-        'CenteredTitle',
-        parent=small_text,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Oblique',
-        fontSize=6.5
-    )
-    
-    centered_line_style = ParagraphStyle(
-        'CenteredLine',
-        parent=small_text,
-        alignment=TA_CENTER
-    )
-    
-    centered_line_style2 = ParagraphStyle(
-        'CenteredLine',
-        parent=small_text,
-        alignment=TA_LEFT,
-        leftIndent=16*mm
-    )
-    
-    small_text_2 = ParagraphStyle(
-        'SmallText',
-        alignment=TA_LEFT,
-        parent=styles['Normal'],
-        fontSize=7,
-        leading=8.5,
-        leftIndent=10*mm
-    )
-    
-    centered_approved_style = ParagraphStyle(
-        'CenteredApproved',
-        parent=small_text,
-        alignment=TA_CENTER,
-        rightIndent=5*mm
-    )
-    
-    def safe_get_attr(obj, attr_name, default=""):
-        if hasattr(obj, attr_name):
-            value = getattr(obj, attr_name)
-            return value if value is not None else default
-        return default
-    
-    def truncate_text(text, max_length=50):
-        text_str = str(text) if text else ""
-        if len(text_str) > max_length:
-            return text_str[:max_length-3] + "..."
-        return text_str
-    
-    employee_name = safe_get_attr(archive_obj, 'employee_name', '')
-    employee_department = truncate_text(safe_get_attr(archive_obj, 'employee_department'), 30)
-    employee_position = truncate_text(safe_get_attr(archive_obj, 'employee_position'), 30)
-
-    date_filed = safe_get_attr(archive_obj, 'date_filed')
-    if hasattr(date_filed, 'strftime'):
-        date_filed_str = date_filed.strftime("%B %d, %Y")
-    else:
-        date_filed_str = str(date_filed) if date_filed else ""
-    
-    leave_type = str(safe_get_attr(archive_obj, 'leave_type', '')).lower()
-    number_of_days = str(safe_get_attr(archive_obj, 'number_of_days', ''))
-    leave_balance_after = safe_get_attr(archive_obj, 'leave_balance_after', '15')
-    
-    vacation_location = str(safe_get_attr(archive_obj, 'vacation_location', '')).lower()
-    sick_location = str(safe_get_attr(archive_obj, 'sick_location', '')).lower()
-    reason = safe_get_attr(archive_obj, 'reason', '')
-    
-    vacation_check = '[✔]' if leave_type == 'vacation' else '[ ]'
-    sick_check = '[✔]' if leave_type == 'sick' else '[ ]'
-    maternity_check = '[✔]' if leave_type in ['maternity', 'paternity'] else '[ ]'
-    
-    philippines_check = '[ ]'
-    abroad_check = '[ ]'
-    abroad_reason = '_________________________'
-    
-    if leave_type == 'vacation':
-        if vacation_location == 'philippines':
-            philippines_check = '[✔]'
-        elif vacation_location == 'abroad':
-            abroad_check = '[✔]'
-            abroad_reason = f'<u>{reason}</u>' if reason else '_________________________'
-    
-    hospital_check = '[ ]'
-    home_check = '[ ]'
-    hospital_reason = '_________________________'
-    
-    if leave_type == 'sick':
-        if sick_location == 'hospital':
-            hospital_check = '[✔]'
-            hospital_reason = f'<u>{reason}</u>' if reason else '_________________________'
-        elif sick_location == 'home':
-            home_check = '[✔]'
-    
-    others_check = '[ ]'
-    others_reason = '_________________________'
-    if leave_type == 'emergency':
-        others_check = '[✔]'
-        others_reason = f'<u>Emergency Leave: {reason}</u>' if reason else '_________________________'
-
-    logo = Image(r"C:\Users\buddy\OneDrive\Desktop\HR_LeaveManagement\Backend\LeaveCreditRecordProject\Main_App\oc_logo.png")
-    logo.drawHeight = 15*mm
-    logo.drawWidth = 15*mm
-
-    info_block = [
-        Paragraph("OSMEÑA COLLEGES", header_style),
-        Paragraph("City of Masbate, 5400, Philippines", subheader_style),
-        Paragraph("Tel: (056) 333-4444", subheader_style),
-        Paragraph('E-Mail: <font color="blue">osmenacolleges@yahoo.com.ph</font>', subheader_style),
-    ]
-
-    info_table = Table([[info_block]], colWidths=[186*mm])
-    info_table.setStyle(TableStyle([
-        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-    ]))
-
-    logo_table = Table([[logo]], colWidths=[186*mm])
-    logo_table.setStyle(TableStyle([
-        ('ALIGN', (0,0), (-1,-1), 'LEFT'),    
-        ('LEFTPADDING', (0,0), (0,0), 86*mm), 
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('MARGINTOP', (0,0), (-1,-1), 0*mm),
-    ]))
-
-    story.append(logo_table)
-    story.append(info_table)
-    story.append(Spacer(1, 2*mm))
-
-    line_table = Table([[""]], colWidths=[186*mm])
-    line_table.setStyle(TableStyle([
-        ('LINEABOVE', (0,0), (-1,0), 1.5, colors.black),
-    ]))
-    story.append(line_table)
-
-
-    line_table = Table([[""]], colWidths=[186*mm])
-    line_table.setStyle(TableStyle([
-        ('LINEABOVE', (0,0), (-1,0), 1.5, colors.black),
-        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-    ]))
-    story.append(line_table)
-        
-    title_data = [["APPLICATION FOR LEAVE"]]
-    title_table = Table(title_data, colWidths=[186*mm])
-    title_table.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,-1), colors.lightgrey),
-        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-        ('FONTNAME', (0,0), (-1,-1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0,0), (-1,-1), 10),
-        ('TOPPADDING', (0,0), (-1,-1), 3),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 3),
-    ]))
-    story.append(title_table)
-    
-    emp_header_data = [
-        [Paragraph("<b>Office / Agency</b>", tiny_text), Paragraph("<b>Full Name</b>", tiny_text)],
-        [Paragraph("OSMEÑA COLLEGES", tiny_text2), Paragraph(employee_name, tiny_text2)],
-    ]
-
-    emp_header_table = Table(emp_header_data, colWidths=[93*mm, 93*mm])
-    emp_header_table.setStyle(TableStyle([
-        ('GRID', (0,0), (-1,-1), 0.5, colors.black),
-        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('FONTSIZE', (0,0), (-1,-1), 7.5),
-        ('TOPPADDING', (0,0), (-1,-1), 4),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-    ]))
-    story.append(emp_header_table)
-    
-    dept_header_data = [
-        [Paragraph("<b>Department</b>", tiny_text), 
-         Paragraph("<b>Position</b>", tiny_text), 
-         Paragraph("<b>Date of Filing</b>", tiny_text)],
-    ]
-    dept_header_table = Table(dept_header_data, colWidths=[62*mm, 62*mm, 62*mm])
-    dept_header_table.setStyle(TableStyle([
-        ('GRID', (0,0), (-1,-1), 0.5, colors.black),
-        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('TOPPADDING', (0,0), (-1,-1), 2),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 2),
-    ]))
-    story.append(dept_header_table)
-    
-    dept_values_data = [[employee_department, employee_position, date_filed_str]]
-    dept_values_table = Table(dept_values_data, colWidths=[62*mm, 62*mm, 62*mm])
-    dept_values_table.setStyle(TableStyle([
-        ('GRID', (0,0), (-1,-1), 0.5, colors.black),
-        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('FONTSIZE', (0,0), (-1,-1), 7.5),
-        ('TOPPADDING', (0,0), (-1,-1), 4),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-    ]))
-    story.append(dept_values_table)
-    
-    details_header_data = [[Paragraph("<b>DETAILS OF APPLICATION</b>", section_header_style)]]
-    details_header_table = Table(details_header_data, colWidths=[186*mm])
-    details_header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,-1), colors.lightgrey),
-        ('TOPPADDING', (0,0), (-1,-1), 2),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 2),
-    ]))
-    story.append(details_header_table)
-    
-    left_column = f"""
-        <b>TYPE OF LEAVE</b><br/>
-        <br/>
-        {vacation_check} Vacation<br/>
-        [ ] To seek employment<br/>
-        {others_check} Others (specify)<br/>
-        <br/>
-                {others_reason}<br/>
-        <br/>
-        <br/>
-        {sick_check} Sick<br/>
-        {maternity_check} Maternity/Paternity<br/>
-        <br/>
-        <br/>
-        No. of Working Days: <b>{number_of_days} Day/s</b><br/>
-        <br/>
-        <br/>
-        &nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;Inclusive Dates: ________ / ________
+LEAVE_FORM = [
+    T([[LOGO]], (186,), 'logo'),
+    T([[[
+        P('header', "OSMEÑA COLLEGES"),
+        P('subheader', "City of Masbate, 5400, Philippines"),
+        P('subheader', "Tel: (056) 333-4444"),
+        P('subheader', 'E-Mail: <font color="blue">osmenacolleges@yahoo.com.ph</font>'),
+    ]]], (186,), 'info'),
+    S(2),
+    T([[""]], (186,), 'rule'),
+    T([[""]], (186,), 'rule_centered'),
+    T([["APPLICATION FOR LEAVE"]], (186,), 'title'),
+    T([
+        [P('tiny', "<b>Office / Agency</b>"), P('tiny', "<b>Full Name</b>")],
+        [P('tiny_centered', "OSMEÑA COLLEGES"), P('tiny_centered', "{employee_name}")],
+    ], (93, 93), 'boxed_values'),
+    T([[P('tiny', "<b>Department</b>"), P('tiny', "<b>Position</b>"), P('tiny', "<b>Date of Filing</b>")]],
+      (62, 62, 62), 'boxed_labels'),
+    T([["{employee_department}", "{employee_position}", "{date_filed}"]], (62, 62, 62), 'boxed_values'),
+    T([[P('section_header', "<b>DETAILS OF APPLICATION</b>")]], (186,), 'section'),
+    T([[P('small', DETAILS_LEFT), P('small', DETAILS_RIGHT)]], (93, 93), 'boxed_top'),
+    T([[P('section_header', "<b>DETAILS OF ACTION ON APPLICATION</b>")]], (186,), 'section'),
+    T([
+        [P('tiny', "<b>TOTAL NO. OF LEAVE CREDITS:</b>"), P('tiny', "<b>{number_of_days}-DAY</b>"), ""],
+        [P('tiny', "<b>LEAVE CREDITS AS OF:</b>"), "{current_date}", ""],
+        [P('tiny', "<b>NO. OF LEAVE CREDITS:</b>"), "{leave_balance_after}-DAY", ""],
+    ], (55, 45, 86), 'summary'),
+    T([[
+        [
+            T([
+                [P('small', "<b>Vacation/others</b>"), P('small', "<b>Sick</b>"),
+                 P('small', "<b>Total</b>"), P('small', "<b>Remaining</b>")],
+                [P('small', "{vacation_days} days"), P('small', "{sick_days} days"),
+                 P('small', "{number_of_days} days"), P('small', "{leave_balance_after} days")],
+            ], (23, 19, 19, 18.3), 'credits'),
+            S(2),
+            P('small', "<i>Personnel Officer:</i>"),
+            S(2),
+            P('centered_name', "<u><b>JUNESSA CEZANNE REYES, RPm, CHRA</b></u>"),
+            P('centered_title', "ACTING HR"),
+            S(2),
+            P('small', "<i>Approved for:</i>"),
+            P('centered_approved', "_______ days with pay"),
+            P('centered_approved', "_______ days without pay"),
+            P('centered_approved', "_______ others (specify)"),
+        ],
+        [
+            P('small', "<b>RECOMMENDATION:</b>"),
+            P('small_indented', "[ ] Approval<br/>[ ] Disapproval due to"),
+            S(1),
+            P('indented_line', "__________________________________________________"),
+            S(6),
+            P('centered_line', "_________________________"),
+            S(1),
+            P('centered_title', "<i>Authorized Official</i>"),
+            S(4),
+            P('small', "<i>Recommending approval:</i>"),
+            S(2),
+            P('centered_name', "<u><b>{recommending_name}</b></u>"),
+            P('centered_title', "<i>{recommending_title}</i>"),
+        ],
+    ]], (82, 104), 'boxed_top'),
+    S(3),
+    P('president_left', "<i>Approved by:</i>"),
+    S(2),
+    P('centered_name', "<u><b>MIGUEL LUIS V. PELIÑO</b></u>"),
+    P('centered_title', "<i>President</i>"),
+]
+
+
+@lru_cache(maxsize=None)
+def print_ready_logo():
+    """The logo decoded once, resampled to LOGO_PIXELS and flattened on white, as JPEG bytes."""
+    with PILImage.open(LOGO_PATH) as source:
+        logo = source.convert('RGBA').resize((LOGO_PIXELS, LOGO_PIXELS), PILImage.LANCZOS)
+    flattened = PILImage.new('RGB', logo.size, 'white')
+    flattened.paste(logo, mask=logo.getchannel('A'))
+    output = BytesIO()
+    flattened.save(output, 'JPEG', quality=95, subsampling=0)
+    return output.getvalue()
+
+
+class _Field(NamedTuple):
+    """A compiled text cell or paragraph: whether it has placeholders to fill."""
+    text: str
+    style: ParagraphStyle
+    dynamic: bool
+
+    def bind(self, values):
+        text = self.text.format_map(values) if self.dynamic else self.text
+        return text if self.style is None else Paragraph(text, self.style)
+
+
+class LeaveFormTemplate:
     """
-    
-    right_column = f"""
-        <b>WHERE LEAVE WILL BE SPENT</b><br/>
-        <i>*In case of vacation leave</i><br/>
-        {philippines_check} Within the Philippines<br/>
-        {abroad_check} Abroad (specify)<br/>
-        <br/>
-                {abroad_reason}<br/>
-        <br/>
-        <i>*In case of sick leave</i><br/>
-        {hospital_check} In Hospital (specify)<br/>
-        <br/>
-                {hospital_reason}<br/>
-        <br/>
-        {home_check} Out Patient (specify)<br/>
-        <br/>
-        &nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;______________________________________________________
-        <br/>
-        <br/>
-        &nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;_____________________________<br/>
-        &nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;<i>Signature of Applicant</i>
+    ``LEAVE_FORM`` compiled for one recommending official. Instances hold no
+    per-document state, so one can render any number of archives, from any
+    thread. ``logo`` is JPEG bytes (the default) or a path to embed as is.
     """
-    
-    details_data = [[
-        Paragraph(left_column, small_text),
-        Paragraph(right_column, small_text)
-    ]]
-    
-    details_table = Table(details_data, colWidths=[93*mm, 93*mm])
-    details_table.setStyle(TableStyle([
-        ('GRID', (0,0), (-1,-1), 0.5, colors.black),
-        ('VALIGN', (0,0), (-1,-1), 'TOP'),
-        ('LEFTPADDING', (0,0), (-1,-1), 4),
-        ('RIGHTPADDING', (0,0), (-1,-1), 4),
-        ('TOPPADDING', (0,0), (-1,-1), 4),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-    ]))
-    story.append(details_table)
-    
-    action_header_data = [[Paragraph("<b>DETAILS OF ACTION ON APPLICATION</b>", 
-                                    section_header_style)]]
-    action_header_table = Table(action_header_data, colWidths=[186*mm])
-    action_header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,-1), colors.lightgrey),
-        ('TOPPADDING', (0,0), (-1,-1), 2),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 2),
-    ]))
-    story.append(action_header_table)
-    
-    current_date = datetime.now().strftime("%B %d, %Y")
-    
-    summary_data = [
-        [Paragraph("<b>TOTAL NO. OF LEAVE CREDITS:</b>", tiny_text), 
-         Paragraph(f"<b>{number_of_days}-DAY</b>", tiny_text), 
-         ""],
-        [Paragraph("<b>LEAVE CREDITS AS OF:</b>", tiny_text), 
-         current_date, 
-         ""],
-        [Paragraph("<b>NO. OF LEAVE CREDITS:</b>", tiny_text), 
-         f"{leave_balance_after}-DAY", 
-         ""]
-    ]
-    summary_table = Table(summary_data, colWidths=[55*mm, 45*mm, 86*mm])
-    summary_table.setStyle(TableStyle([
-        ('GRID', (0,0), (-1,-1), 0.5, colors.black),
-        ('FONTSIZE', (0,0), (-1,-1), 7),
-        ('ALIGN', (0,0), (1,-1), 'LEFT'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('LEFTPADDING', (0,0), (-1,-1), 3),
-        ('TOPPADDING', (0,0), (-1,-1), 2),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 2),
-    ]))
-    story.append(summary_table)
-    
-    vacation_days = "0"
-    sick_days = "0"
-    
-    if leave_type in ['vacation', 'paternity', 'maternity', 'emergency']:
-        vacation_days = str(number_of_days)
-    elif leave_type == 'sick':
-        sick_days = str(number_of_days)
-    
-    credits_header = [
-        [Paragraph("<b>Vacation/others</b>", small_text),
-         Paragraph("<b>Sick</b>", small_text),
-         Paragraph("<b>Total</b>", small_text),
-         Paragraph("<b>Remaining</b>", small_text)]
-    ]
-    
-    credits_values = [
-        [Paragraph(f"{vacation_days} days", small_text),
-         Paragraph(f"{sick_days} days", small_text),
-         Paragraph(f"{number_of_days} days", small_text),
-         Paragraph(f"{leave_balance_after} days", small_text)]
-    ]
-    
-    credits_table = Table(credits_header + credits_values, 
-                         colWidths=[23*mm, 19*mm, 19*mm, 18.3*mm])
-    credits_table.setStyle(TableStyle([
-        ('GRID', (0,0), (-1,-1), 0.5, colors.black),
-        ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
-        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('FONTSIZE', (0,0), (-1,-1), 6),
-        ('TOPPADDING', (0,0), (-1,-1), 2),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 2),
-    ]))
-    
-    left_side_elements = [
-        credits_table,
-        Spacer(1, 2*mm),
-        Paragraph("<i>Personnel Officer:</i>", small_text),
-        Spacer(1, 2*mm),
-        Paragraph("<u><b>JUNESSA CEZANNE REYES, RPm, CHRA</b></u>", centered_name_style),
-        Paragraph("ACTING HR", centered_title_style),
-        Spacer(1, 2*mm),
-        Paragraph("<i>Approved for:</i>", small_text),
-        Paragraph("_______ days with pay", centered_approved_style),
-        Paragraph("_______ days without pay", centered_approved_style),
-        Paragraph("_______ others (specify)", centered_approved_style)
-    ]
-    
-    right_side_elements = [
-        Paragraph("<b>RECOMMENDATION:</b>", small_text),
-        Paragraph("[ ] Approval<br/>[ ] Disapproval due to", small_text_2),
-        Spacer(1, 1*mm),
-        Paragraph("__________________________________________________", centered_line_style2),
-        Spacer(1, 6*mm),
-        Paragraph("_________________________", centered_line_style),
-        Spacer(1, 1*mm),
-        Paragraph("<i>Authorized Official</i>", centered_title_style),
-        Spacer(1, 4*mm),
-        Paragraph("<i>Recommending approval:</i>", small_text),
-        Spacer(1, 2*mm),
-        Paragraph("<u><b>DR. FREDDIE T. BERNAL, CESO III</b></u>", centered_name_style),
-        Paragraph("<i>Vice President for Academic Affairs</i>", centered_title_style)
-    ]
-    
-    main_content_data = [[left_side_elements, right_side_elements]]
-    main_content_table = Table(main_content_data, colWidths=[82*mm, 104*mm])
-    main_content_table.setStyle(TableStyle([
-        ('GRID', (0,0), (-1,-1), 0.5, colors.black),
-        ('VALIGN', (0,0), (-1,-1), 'TOP'),
-        ('LEFTPADDING', (0,0), (-1,-1), 4),
-        ('RIGHTPADDING', (0,0), (-1,-1), 4),
-        ('TOPPADDING', (0,0), (-1,-1), 4),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-    ]))
-    story.append(main_content_table)
-    
-    story.append(Spacer(1, 3*mm))
-    
-    president_left_style = ParagraphStyle(
-        'PresidentLeft',
-        parent=small_text,
-        alignment=TA_LEFT,
-        leftIndent=45*mm,
-    )
-    
-    story.append(Paragraph("<i>Approved by:</i>", president_left_style))
-    story.append(Spacer(1, 2*mm))
-    story.append(Paragraph("<u><b>MIGUEL LUIS V. PELIÑO</b></u>", centered_name_style))
-    story.append(Paragraph("<i>President</i>", centered_title_style))
-    
-    doc.build(story)
-    buffer.seek(0)
-    return buffer
\ No newline at end of file
+
+    def __init__(self, recommending_name, recommending_title, logo=None, spec=LEAVE_FORM):
+        self.constants = {'recommending_name': recommending_name, 'recommending_title': recommending_title}
+        self.logo = print_ready_logo() if logo is None else logo
+        base = getSampleStyleSheet()
+        self.styles = {}
+        for name, options in PARAGRAPH_STYLES.items():
+            options = dict(options)
+            parent = options.pop('parent')
+            self.styles[name] = ParagraphStyle(name, parent=self.styles.get(parent) or base[parent], **options)
+        self.table_styles = {name: TableStyle(commands) for name, commands in TABLE_STYLES.items()}
+        self.story = [self._compile(item) for item in spec]
+
+    def _compile(self, item):
+        if item is LOGO:
+            return item
+        if isinstance(item, S):
+            return S(item.height * mm)
+        if isinstance(item, T):
+            rows = [[self._compile(cell) for cell in row] for row in item.rows]
+            return T(rows, [width * mm for width in item.widths], self.table_styles[item.style])
+        if isinstance(item, list):
+            return [self._compile(child) for child in item]
+        text, style = (item.markup, self.styles[item.style]) if isinstance(item, P) else (item, None)
+        dynamic = any(field for _, field, _, _ in Formatter().parse(text))
+        return _Field(text, style, dynamic)
+
+    def _bind(self, item, values):
+        if item is LOGO:
+            logo = Image(BytesIO(self.logo) if isinstance(self.logo, bytes) else str(self.logo))
+            logo.drawHeight = logo.drawWidth = LOGO_SIZE
+            return logo
+        if isinstance(item, S):
+            return Spacer(1, item.height)
+        if isinstance(item, T):
+            rows = [[self._bind(cell, values) for cell in row] for row in item.rows]
+            return Table(rows, colWidths=item.widths, style=item.style)
+        if isinstance(item, list):
+            return [self._bind(child, values) for child in item]
+        return item.bind(values)
+
+    def render(self, archive_obj):
+        """The filled-in form for ``archive_obj``, as a BytesIO rewound to 0."""
+        values = dict(self.constants, **form_values(archive_obj))
+        buffer = BytesIO()
+        doc = SimpleDocTemplate(
+            buffer, pagesize=A4, rightMargin=12 * mm, leftMargin=12 * mm, topMargin=10 * mm, bottomMargin=10 * mm,
+            invariant=1,
+        )
+        doc.build([self._bind(item, values) for item in self.story])
+        buffer.seek(0)
+        return buffer
+
+
+def form_values(archive_obj):
+    """The per-archive values the form's placeholders are filled with."""
+    def value(attr_name, default=""):
+        value = getattr(archive_obj, attr_name, None)
+        return default if value is None else value
+
+    def truncate(text, max_length=30):
+        text = str(text) if text else ""
+        return text[:max_length - 3] + "..." if len(text) > max_length else text
+
+    date_filed = value('date_filed')
+    # Credits are as of archiving, not of whenever the PDF happens to be rendered.
+    as_of = value('archived_at', None) or timezone.now()
+    leave_type = str(value('leave_type')).lower()
+    number_of_days = str(value('number_of_days'))
+    vacation_location = str(value('vacation_location')).lower()
+    sick_location = str(value('sick_location')).lower()
+    reason = value('reason')
+
+    def check(condition):
+        return CHECKED if condition else UNCHECKED
+
+    def specified(text):
+        return f'<u>{text}</u>' if reason else BLANK
+
+    is_vacation, is_sick = leave_type == 'vacation', leave_type == 'sick'
+    abroad = is_vacation and vacation_location == 'abroad'
+    hospital = is_sick and sick_location == 'hospital'
+    emergency = leave_type == 'emergency'
+
+    return {
+        'employee_name': value('employee_name'),
+        'employee_department': truncate(value('employee_department')),
+        'employee_position': truncate(value('employee_position')),
+        'date_filed': date_filed.strftime("%B %d, %Y") if hasattr(date_filed, 'strftime') else str(date_filed or ""),
+        'number_of_days': number_of_days,
+        'leave_balance_after': value('leave_balance_after', '15'),
+        'current_date': timezone.localtime(as_of).strftime("%B %d, %Y"),
+        'vacation_check': check(is_vacation),
+        'sick_check': check(is_sick),
+        'maternity_check': check(leave_type in ('maternity', 'paternity')),
+        'others_check': check(emergency),
+        'others_reason': specified(f'Emergency Leave: {reason}') if emergency else BLANK,
+        'philippines_check': check(is_vacation and vacation_location == 'philippines'),
+        'abroad_check': check(abroad),
+        'abroad_reason': specified(reason) if abroad else BLANK,
+        'hospital_check': check(hospital),
+        'hospital_reason': specified(reason) if hospital else BLANK,
+        'home_check': check(is_sick and sick_location == 'home'),
+        'vacation_days': number_of_days if leave_type in ('vacation', 'paternity', 'maternity', 'emergency') else "0",
+        'sick_days': number_of_days if is_sick else "0",
+    }
+
+
+NON_TEACHING_TEMPLATE = LeaveFormTemplate(
+    "LORENZO GABRIEL V. PELIÑO", "Vice President for Administration and Finance"
+)
+TEACHING_TEMPLATE = LeaveFormTemplate(
+    "DR. FREDDIE T. BERNAL, CESO III", "Vice President for Academic Affairs"
+)
+
+
+def export_osmena_leave_application_pdf_non_teaching_format(archive_obj):
+    return NON_TEACHING_TEMPLATE.render(archive_obj)
+
+
+def export_osmena_leave_application_pdf_teaching_format(archive_obj):
+    return TEACHING_TEMPLATE.render(archive_obj)
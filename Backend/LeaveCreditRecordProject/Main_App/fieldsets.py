@@ -0,0 +1,43 @@
+class FieldSelection:
+    """
+    The output fields a GET request asked for through ``?fields=a,b`` and/or
+    ``?omit=c``. Dotted names (``application.reason``) reach into nested
+    serializers. An empty selection keeps every field.
+    """
+
+    def __init__(self, include=None, exclude=()):
+        self.include = set(include) if include else None
+        self.exclude = set(exclude)
+
+    @classmethod
+    def from_request(cls, request):
+        if request is None or request.method != 'GET':
+            return cls()
+        params = getattr(request, 'query_params', request.GET)
+        return cls(
+            include=_split(params.get('fields')),
+            exclude=_split(params.get('omit')),
+        )
+
+    @property
+    def is_empty(self):
+        return self.include is None and not self.exclude
+
+    def wants(self, name):
+        prefixes = _prefixes(name)
+        if any(prefix in self.exclude for prefix in prefixes):
+            return False
+        if self.include is None:
+            return True
+        if any(prefix in self.include for prefix in prefixes):
+            return True
+        return any(field.startswith(name + '.') for field in self.include)
+
+
+def _split(value):
+    return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+
+def _prefixes(name):
+    parts = name.split('.')
+    return ['.'.join(parts[:i]) for i in range(1, len(parts) + 1)]
@@ -0,0 +1,52 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from Main_App.models import LeaveRequest, LeaveRequestArchive, Watermark
+from Main_App.utils import invalidate_dashboard_stats
+
+WATERMARK_NAME = 'auto_archive'
+
+
+class Command(BaseCommand):
+    help = (
+        "Archive leave requests finalized by HR since the last run. Progress is kept "
+        "in a watermark on (hr_reviewed_at, id), so each run only reads new rows; "
+        "safe to run from cron every minute."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--settle-seconds', type=int, default=30,
+            help="Leave requests reviewed more recently than this for the next run, "
+                 "so a slow transaction can't commit behind the watermark.",
+        )
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help="Keep running and poll every N seconds instead of exiting.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            archived = archive_new_requests(options['batch_size'], options['settle_seconds'])
+            if archived:
+                invalidate_dashboard_stats()
+            self.stdout.write(f"Archived {archived} leave request(s)")
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+
+def archive_new_requests(batch_size=500, settle_seconds=30):
+    """Archive finalized requests past the watermark, committing one batch at a time."""
+    cutoff = timezone.now() - timedelta(seconds=settle_seconds)
+    finalized = LeaveRequest.objects.filter(status__in=['approved', 'denied'])
+    archived = 0
+    for ids in Watermark.batches(WATERMARK_NAME, finalized, 'hr_reviewed_at', batch_size, cutoff):
+        archived += len(LeaveRequestArchive.archive_processed(
+            LeaveRequest.objects.filter(pk__in=ids), chunk_size=batch_size
+        ))
+    return archived
@@ -0,0 +1,67 @@
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+
+from Main_App.export_views import LOGO_PATH, NON_TEACHING_TEMPLATE, LeaveFormTemplate
+from Main_App.models import LeaveRequestArchive
+
+LEAVE_CASES = (
+    {'leave_type': 'vacation', 'vacation_location': 'philippines'},
+    {'leave_type': 'vacation', 'vacation_location': 'abroad'},
+    {'leave_type': 'sick', 'sick_location': 'hospital'},
+    {'leave_type': 'sick', 'sick_location': 'home'},
+    {'leave_type': 'emergency'},
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-document render time of archive PDFs when the form is compiled for "
+        "every document (styles, table styles and the full-size logo, as before) and "
+        "with the precompiled LeaveFormTemplate."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--documents', type=int, default=50)
+
+    def handle(self, *args, **options):
+        archives = build_archives(options['documents'])
+        self.stdout.write(f"{len(archives)} archive PDFs")
+
+        def compile_per_document(archive):
+            template = LeaveFormTemplate(
+                NON_TEACHING_TEMPLATE.constants['recommending_name'],
+                NON_TEACHING_TEMPLATE.constants['recommending_title'],
+                logo=LOGO_PATH,
+            )
+            return template.render(archive)
+
+        self.report('compiled per document', compile_per_document, archives)
+        self.report('precompiled template', NON_TEACHING_TEMPLATE.render, archives)
+
+    def report(self, label, render, archives):
+        render(archives[0])
+        total_bytes = 0
+        start = time.perf_counter()
+        for archive in archives:
+            total_bytes += len(render(archive).getvalue())
+        per_document = (time.perf_counter() - start) / len(archives)
+        self.stdout.write(
+            f"  {label:<24} {per_document * 1000:8.1f} ms/document  {total_bytes // len(archives):>10,} bytes"
+        )
+
+
+def build_archives(count):
+    """Unsaved archives cycling through the leave types and locations the form distinguishes."""
+    return [
+        LeaveRequestArchive(
+            id=i, original_leave_request_id=i, original_leave_application_id=i,
+            employee_id=f'OC-2024{i:05d}', employee_name=f'Employee {i}',
+            employee_department='College of Computer Studies', employee_position='Administrative Aide',
+            number_of_days=1 + i % 5, reason='Family matters', date_filed=date(2024, 1, 1) + timedelta(days=i % 365),
+            final_status='approved', leave_balance_before=15, leave_balance_after=14 - i % 5, leave_balance_year=2024,
+            **LEAVE_CASES[i % len(LEAVE_CASES)]
+        )
+        for i in range(1, count + 1)
+    ]
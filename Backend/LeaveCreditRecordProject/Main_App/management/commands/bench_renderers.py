@@ -0,0 +1,77 @@
+import json
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from Main_App.models import Dean, Department, Employee, LeaveApplication, LeaveRequest, Position
+from Main_App.renderers import FastJSONRenderer, MessagePackRenderer, dumps_json, msgpack, orjson
+from Main_App.serializers import LeaveRequestSerializer
+
+
+class Command(BaseCommand):
+    help = "Compare render time and payload size of the API renderers on a synthetic leave-request list."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        data = LeaveRequestSerializer(build_leave_requests(rows), many=True).data
+        self.stdout.write(f"{rows} leave requests, best of {repeat} runs (orjson: {orjson is not None}, msgpack: {msgpack is not None})")
+
+        self.report('JSONRenderer', lambda: JSONRenderer().render(data), repeat)
+        self.report('FastJSONRenderer', lambda: FastJSONRenderer().render(data), repeat)
+        if msgpack is not None:
+            self.report('MessagePackRenderer', lambda: MessagePackRenderer().render(data), repeat)
+
+        # Hand-rolled views hand raw model values (Decimal, datetime) to JsonResponse.
+        raw = [
+            {'id': i, 'height': Decimal('165.50'), 'weight': Decimal('60.25'), 'created_at': timezone.now()}
+            for i in range(rows)
+        ]
+        self.report('JsonResponse encoder (raw values)', lambda: json.dumps(raw, cls=DjangoJSONEncoder).encode(), repeat)
+        self.report('negotiated_response JSON (raw values)', lambda: dumps_json(raw, default=DjangoJSONEncoder().default), repeat)
+
+    def report(self, label, render, repeat):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            payload = render()
+            best = min(best, time.perf_counter() - start)
+        self.stdout.write(f"  {label:<40} {best * 1000:8.1f} ms  {len(payload):>10,} bytes")
+
+
+def build_leave_requests(count):
+    """Unsaved, fully linked LeaveRequests, so serializing them never touches the database."""
+    department = Department(id=1, code='CCS', name='College of Computer Studies')
+    position = Position(id=1, code='INS', title='Instructor')
+    dean_user = User(id=1, username='dean')
+    dean = Dean(id=1, user=dean_user, full_name='Dean Cruz', department=department, height=Decimal('170.00'))
+    hr_user = User(id=2, username='hr', first_name='Maria', last_name='Santos')
+    now = timezone.now()
+
+    leave_requests = []
+    for i in range(1, count + 1):
+        employee = Employee(
+            id=i, employee_id=f'OC-2024{i:05d}', full_name=f'Employee {i}', gender='female', age=30,
+            height=Decimal('160.25'), weight=Decimal('55.50'), department=department, position=position,
+        )
+        application = LeaveApplication(
+            id=i, employee=employee, leave_type='vacation', vacation_location='within_ph',
+            number_of_days=3, reason='Family matters', date_filed=date(2024, 1, 1) + timedelta(days=i % 365),
+            status='approved',
+        )
+        leave_requests.append(LeaveRequest(
+            id=i, application=application, status='approved',
+            dean_reviewer=dean, dean_reviewed_at=now, dean_comments='OK',
+            hr_reviewer=hr_user, hr_reviewed_at=now, hr_comments='Approved',
+            created_at=now, updated_at=now,
+        ))
+    return leave_requests
@@ -0,0 +1,53 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from Main_App.models import LeaveReport, LeaveRequest, Watermark
+
+WATERMARK_NAME = 'leave_reports'
+
+
+class Command(BaseCommand):
+    help = (
+        "Project leave requests changed since the last run into LeaveReport, "
+        "following a watermark on (updated_at, id). Needed when "
+        "LEAVE_REPORT_PROJECTION is 'deferred'; --rebuild re-derives every report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--settle-seconds', type=int, default=30,
+            help="Leave requests changed more recently than this for the next run, "
+                 "so a slow transaction can't commit behind the watermark.",
+        )
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help="Keep running and poll every N seconds instead of exiting.",
+        )
+        parser.add_argument('--rebuild', action='store_true',
+                            help="Rebuild the whole report table from leave requests and exit.")
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            written = LeaveReport.rebuild(options['batch_size'])
+            self.stdout.write(f"Rebuilt {written} leave report(s)")
+            return
+
+        while True:
+            projected = project_changed_requests(options['batch_size'], options['settle_seconds'])
+            self.stdout.write(f"Projected {projected} leave request(s)")
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+
+def project_changed_requests(batch_size=500, settle_seconds=30):
+    """Project requests changed past the watermark, committing one batch at a time."""
+    cutoff = timezone.now() - timedelta(seconds=settle_seconds)
+    projected = 0
+    for ids in Watermark.batches(WATERMARK_NAME, LeaveRequest.objects.all(), 'updated_at', batch_size, cutoff):
+        projected += LeaveReport.project(ids)
+    return projected
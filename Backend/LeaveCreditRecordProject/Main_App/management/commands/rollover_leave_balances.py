@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from Main_App.models import Employee, EmployeeLeaveBalance
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the leave balances of a new year for every active employee in one "
+        "pass, optionally carrying over unused days. Run before January 1st; "
+        "leave requests fail for employees without a balance for the current year. "
+        "On first deployment, run it once with --year set to the current year to "
+        "open balances for the employees already on file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help="Year to open (default: next year)")
+        parser.add_argument('--days', type=int, default=EmployeeLeaveBalance.DEFAULT_DAYS,
+                            help="Days granted to every employee")
+        parser.add_argument('--carry-over', type=int, default=0,
+                            help="Most unused days carried over from the previous year")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Show what would be created without writing anything")
+
+    def handle(self, *args, **options):
+        year = options['year'] or timezone.now().year + 1
+        existing = Employee.objects.filter(is_active=True, leave_balances__year=year).count()
+        balances = EmployeeLeaveBalance.open_year(
+            year,
+            days=options['days'],
+            carry_over=options['carry_over'],
+            dry_run=options['dry_run'],
+        )
+
+        if options['dry_run'] or options['verbosity'] > 1:
+            for balance in balances:
+                line = f"  + {balance.employee_code}: {balance.remaining_days} days"
+                if balance.carried_days:
+                    line += f" ({balance.carried_days} carried over)"
+                self.stdout.write(line)
+
+        carried = sum(1 for balance in balances if balance.carried_days)
+        verb = "Would create" if options['dry_run'] else "Created"
+        self.stdout.write(
+            f"{verb} {len(balances)} leave balance(s) for {year} "
+            f"({carried} with carry-over); {existing} active employee(s) already have one."
+        )
@@ -0,0 +1,55 @@
+import os
+import socket
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from Main_App.bulk_export import run_render_job
+from Main_App.models import PdfRenderJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Render queued bulk PDF exports (PdfRenderJob) one at a time. Several "
+        "workers can run side by side: each job is claimed with a guarded UPDATE."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help="Keep running and poll the queue every N seconds instead of exiting once it is empty.",
+        )
+        parser.add_argument('--workers', type=int, help="Render processes per job (default: PDF_EXPORT_WORKERS)")
+        parser.add_argument(
+            '--stale-minutes', type=int, default=15,
+            help="Requeue running jobs that have not reported progress for this long.",
+        )
+        parser.add_argument(
+            '--keep-days', type=int, default=7,
+            help="Delete finished jobs and their files after this many days.",
+        )
+
+    def handle(self, *args, **options):
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        while True:
+            now = timezone.now()
+            requeued = PdfRenderJob.requeue_stale(now - timedelta(minutes=options['stale_minutes']))
+            if requeued:
+                self.stdout.write(f"Requeued {requeued} stale job(s)")
+            self.purge(now - timedelta(days=options['keep_days']))
+
+            while (job := PdfRenderJob.claim(worker)) is not None:
+                run_render_job(job, options['workers'])
+                self.stdout.write(f"Job {job.pk}: {job.status} ({job.rendered}/{job.total}) {job.error}".rstrip())
+
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def purge(self, finished_before):
+        expired = PdfRenderJob.objects.filter(status__in=['done', 'failed'], finished_at__lt=finished_before)
+        for job in expired.exclude(result_file=''):
+            job.result_path.unlink(missing_ok=True)
+        expired.delete()
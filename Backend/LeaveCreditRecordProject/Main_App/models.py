@@ -1,4 +1,8 @@
-from django.db import models
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.db.models.functions import Length
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from django.contrib.auth.models import User
@@ -34,11 +38,39 @@ class AccessKey(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
 
+class SelectionQuerySetMixin:
+    """
+    ``with_related(selection)`` joins only the relations the selected serializer
+    fields read, as listed in the queryset's ``RELATED_FIELDS`` table.
+    """
+    RELATED_FIELDS = ()
+
+    def with_related(self, selection=None):
+        relations = {
+            relation for field, relation in self.RELATED_FIELDS
+            if selection is None or selection.wants(field)
+        }
+        # select_related() with no arguments would follow every foreign key.
+        return self.select_related(*relations) if relations else self
+
+
+class DepartmentQuerySet(models.QuerySet):
+    def with_stats(self):
+        active_dean = Dean.objects.filter(department=models.OuterRef('pk'), is_active=True)
+        return self.annotate(
+            active_employee_count=models.Count('employees', filter=models.Q(employees__is_active=True)),
+            active_dean_name=models.Subquery(active_dean.values('full_name')[:1]),
+        )
+
+
 class Department(models.Model):
     code = models.CharField(max_length=50, unique=True)
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = DepartmentQuerySet.as_manager()
 
     class Meta:
         ordering = ['name']
@@ -46,11 +78,24 @@ class Department(models.Model):
     def __str__(self):
         return self.name
 
+class PositionQuerySet(models.QuerySet):
+    def with_occupancy(self):
+        occupant = Employee.objects.filter(position=models.OuterRef('pk'), is_active=True)
+        return self.annotate(
+            occupant_id=models.Subquery(occupant.values('id')[:1]),
+            occupant_name=models.Subquery(occupant.values('full_name')[:1]),
+            occupant_employee_id=models.Subquery(occupant.values('employee_id')[:1]),
+        )
+
+
 class Position(models.Model):
     code = models.CharField(max_length=50, unique=True)
     title = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = PositionQuerySet.as_manager()
 
     class Meta:
         ordering = ['title']
@@ -58,6 +103,91 @@ class Position(models.Model):
     def __str__(self):
         return self.title
 
+class EmployeeIdSequence(models.Model):
+    """
+    Last employee number handed out per year. ``reserve`` bumps it with a
+    single UPDATE ... RETURNING, so allocating IDs neither scans the employee
+    table nor races with concurrent registrations.
+    """
+    year = models.PositiveIntegerField(primary_key=True)
+    last_number = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.year}: {self.last_number}"
+
+    @staticmethod
+    def prefix(year):
+        return f'OC-{year}'
+
+    @classmethod
+    def format(cls, year, number):
+        return f'{cls.prefix(year)}{number:04d}'
+
+    @classmethod
+    def reserve(cls, count=1, year=None):
+        """Reserve ``count`` consecutive employee IDs for ``year`` and return them."""
+        year = year or timezone.now().year
+        table = connection.ops.quote_name(cls._meta.db_table)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} SET last_number = last_number + %s WHERE year = %s RETURNING last_number',
+                [count, year],
+            )
+            row = cursor.fetchone()
+        if row is None:
+            # First allocation of the year; a concurrent creator just makes
+            # get_or_create fall back to the existing row.
+            cls.objects.get_or_create(year=year, defaults={'last_number': cls.seed(year)})
+            return cls.reserve(count, year)
+
+        last = row[0]
+        return [cls.format(year, number) for number in range(last - count + 1, last + 1)]
+
+    @classmethod
+    def seed(cls, year):
+        """Highest number already used for ``year``, read once when the year's row is created."""
+        prefix = cls.prefix(year)
+        last_id = (
+            Employee.objects.filter(employee_id__startswith=prefix)
+            .order_by(Length('employee_id').desc(), '-employee_id')
+            .values_list('employee_id', flat=True)
+            .first()
+        )
+        suffix = last_id[len(prefix):] if last_id else ''
+        return int(suffix) if suffix.isdigit() else 0
+
+
+class EmployeeQuerySet(SelectionQuerySetMixin, models.QuerySet):
+    # Serializer field -> relation it reads.
+    RELATED_FIELDS = (
+        ('department_name', 'department'),
+        ('department_code', 'department'),
+        ('position_title', 'position'),
+        ('position_code', 'position'),
+    )
+
+    def with_current_balance(self, year=None):
+        year = year or timezone.now().year
+        balance = EmployeeLeaveBalance.objects.filter(employee=models.OuterRef('pk'), year=year)
+        return self.annotate(
+            current_remaining_days=models.Subquery(balance.values('remaining_days')[:1]),
+        )
+
+    def with_balance_changed_at(self):
+        """Time of each employee's latest leave ledger entry; every balance change writes one."""
+        entries = LeaveBalanceTransaction.objects.filter(balance__employee=models.OuterRef('pk')).order_by('-id')
+        return self.annotate(balance_changed_at=models.Subquery(entries.values('created_at')[:1]))
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        missing = [employee for employee in objs if not employee.employee_id]
+        if missing:
+            for employee, employee_id in zip(missing, EmployeeIdSequence.reserve(len(missing))):
+                employee.employee_id = employee_id
+        return super().bulk_create(objs, *args, **kwargs)
+
+
 class Employee(models.Model):
     GENDER_CHOICES = [('male', 'Male'), ('female', 'Female'), ('other', 'Other')]
     employee_id = models.CharField(max_length=20, unique=True, editable=False)
@@ -75,30 +205,45 @@ class Employee(models.Model):
     date_created = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = EmployeeQuerySet.as_manager()
+
     class Meta:
         ordering = ['-date_created']
         verbose_name = 'Employee'
         verbose_name_plural = 'Employees'
+        indexes = [
+            models.Index(fields=['-date_created', '-id']),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.employee_id:
-            year = timezone.now().year
-            last_employee = Employee.objects.filter(employee_id__startswith=f'OC-{year}').order_by('employee_id').last()
-            if last_employee:
-                last_number = int(last_employee.employee_id.split('-')[1][4:])
-                new_number = last_number + 1
-            else:
-                new_number = 1
-            self.employee_id = f'OC-{year}{new_number:04d}'
+            self.employee_id = EmployeeIdSequence.reserve()[0]
         super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.employee_id} - {self.full_name}"
 
+class InsufficientLeaveBalance(ValueError):
+    def __init__(self, remaining_days):
+        self.remaining_days = remaining_days
+        super().__init__("Cannot deduct more days than remaining")
+
+
+class StaleTransition(ValueError):
+    """A leave request was reviewed by someone else since it was loaded."""
+
+
 class EmployeeLeaveBalance(models.Model):
+    """
+    Materialized leave balance for one employee and year. Every change goes
+    through ``apply``: a single conditional UPDATE that can't overdraw, plus an
+    entry in the ``LeaveBalanceTransaction`` ledger.
+    """
+    DEFAULT_DAYS = 15
+
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='leave_balances')
     year = models.PositiveIntegerField()
-    remaining_days = models.PositiveIntegerField(default=15)
+    remaining_days = models.PositiveIntegerField(default=DEFAULT_DAYS)
 
     class Meta:
         unique_together = ('employee', 'year')
@@ -106,11 +251,224 @@ class EmployeeLeaveBalance(models.Model):
     def __str__(self):
         return f"{self.employee.full_name} - {self.year}: {self.remaining_days} days left"
 
-    def deduct_days(self, days):
-        if days > self.remaining_days:
-            raise ValueError("Cannot deduct more days than remaining")
-        self.remaining_days -= days
-        self.save()
+    def deduct_days(self, days, leave_application=None):
+        self.remaining_days = self.apply(self.employee_id, self.year, -days, 'deduct', leave_application)
+
+    @classmethod
+    def apply(cls, employee_id, year, days, kind, leave_application=None):
+        """
+        Add ``days`` (negative to deduct) to the employee's balance for ``year``
+        and record it in the ledger. Returns the new remaining days, or None
+        when there is no balance for that year. Raises InsufficientLeaveBalance
+        (and changes nothing) if a deduction would go below zero.
+        """
+        table = connection.ops.quote_name(cls._meta.db_table)
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'UPDATE {table} SET remaining_days = remaining_days + %s '
+                    f'WHERE employee_id = %s AND year = %s AND remaining_days + %s >= 0 '
+                    f'RETURNING id, remaining_days',
+                    [days, employee_id, year, days],
+                )
+                row = cursor.fetchone()
+
+            if row is None:
+                remaining = cls.objects.filter(employee_id=employee_id, year=year).values_list(
+                    'remaining_days', flat=True
+                ).first()
+                if remaining is None:
+                    return None
+                raise InsufficientLeaveBalance(remaining)
+
+            balance_id, remaining = row
+            LeaveBalanceTransaction.objects.create(
+                balance_id=balance_id,
+                kind=kind,
+                days=days,
+                remaining_after=remaining,
+                leave_application=leave_application,
+            )
+        return remaining
+
+    @classmethod
+    def open_year(cls, year, employees=None, days=DEFAULT_DAYS, carry_over=0, dry_run=False):
+        """
+        Create the ``year`` balance of every employee in ``employees`` (default:
+        all active ones) that doesn't have one yet, in one set-based pass. Each
+        starts with ``days`` plus up to ``carry_over`` days left from the year
+        before. Returns the balances, unsaved when ``dry_run``, with
+        ``employee_code`` and ``carried_days`` set for reporting.
+        """
+        if employees is None:
+            employees = Employee.objects.filter(is_active=True)
+        previous = cls.objects.filter(employee=models.OuterRef('pk'), year=year - 1)
+        rows = (
+            employees.exclude(leave_balances__year=year)
+            .annotate(previous_remaining=models.Subquery(previous.values('remaining_days')[:1]))
+            .order_by('employee_id')
+            .values_list('pk', 'employee_id', 'previous_remaining')
+        )
+
+        balances = []
+        for pk, employee_code, previous_remaining in rows:
+            carried = min(previous_remaining or 0, carry_over)
+            balance = cls(employee_id=pk, year=year, remaining_days=days + carried)
+            balance.employee_code = employee_code
+            balance.carried_days = carried
+            balances.append(balance)
+
+        if dry_run or not balances:
+            return balances
+
+        with transaction.atomic():
+            cls.objects.bulk_create(balances, batch_size=1000)
+            entries = []
+            for balance in balances:
+                entries.append(LeaveBalanceTransaction(
+                    balance=balance, kind='grant', days=days, remaining_after=days
+                ))
+                if balance.carried_days:
+                    entries.append(LeaveBalanceTransaction(
+                        balance=balance, kind='carry_over', days=balance.carried_days,
+                        remaining_after=balance.remaining_days
+                    ))
+            LeaveBalanceTransaction.objects.bulk_create(entries, batch_size=1000)
+        return balances
+
+    @classmethod
+    def deduct(cls, employee_id, year, days, leave_application=None):
+        remaining = cls.apply(employee_id, year, -days, 'deduct', leave_application)
+        if remaining is None:
+            raise cls.DoesNotExist(f"No leave balance for {year}")
+        return remaining
+
+    @classmethod
+    def charged_balances(cls, applications):
+        """
+        ``{leave_application_id: balance_id}`` of the balance each application
+        was deducted from, read from its 'deduct' ledger entry; after a
+        rollover that is not the current year's. Applications deducted before
+        the ledger existed fall back to the balance of the year they were
+        filed. ``applications`` are ``(id, employee_id, date_filed)`` tuples.
+        """
+        applications = list(applications)
+        charged = dict(LeaveBalanceTransaction.objects.filter(
+            leave_application_id__in=[pk for pk, _, _ in applications], kind='deduct'
+        ).values_list('leave_application_id', 'balance_id'))
+
+        untracked = [application for application in applications if application[0] not in charged]
+        if untracked:
+            by_year = {
+                (employee_id, year): pk for pk, employee_id, year in cls.objects.filter(
+                    employee_id__in={employee_id for _, employee_id, _ in untracked},
+                    year__in={date_filed.year for _, _, date_filed in untracked},
+                ).values_list('pk', 'employee_id', 'year')
+            }
+            for pk, employee_id, date_filed in untracked:
+                if (employee_id, date_filed.year) in by_year:
+                    charged[pk] = by_year[employee_id, date_filed.year]
+        return charged
+
+    @classmethod
+    def entitlements(cls, balance_ids):
+        """
+        ``{balance_id: days}`` granted to each balance (grant, carry-over and
+        positive adjustments), and at least DEFAULT_DAYS for balances opened
+        before the ledger. Restores never lift a balance above this.
+        """
+        credited = dict(LeaveBalanceTransaction.objects.filter(
+            balance_id__in=balance_ids, kind__in=('grant', 'carry_over', 'adjust'), days__gt=0
+        ).values('balance_id').annotate(total=models.Sum('days')).values_list('balance_id', 'total'))
+        return {pk: max(credited.get(pk, 0), cls.DEFAULT_DAYS) for pk in balance_ids}
+
+    @classmethod
+    def restore_many(cls, items, charged=None):
+        """
+        Give back ``(leave_application_id, employee_id, date_filed, days)``
+        items to the balances they were deducted from (``charged``, looked up
+        with ``charged_balances`` if not given) with one UPDATE, then log them
+        in the ledger. Restores never lift a balance above its entitlement;
+        items with no balance are skipped. Returns ``{leave_application_id:
+        remaining days}``.
+        """
+        items = list(items)
+        if charged is None:
+            charged = cls.charged_balances((pk, employee_id, date_filed) for pk, employee_id, date_filed, _ in items)
+
+        with transaction.atomic():
+            remaining = dict(cls.objects.select_for_update().filter(
+                pk__in=set(charged.values())
+            ).values_list('pk', 'remaining_days'))
+            ceilings = cls.entitlements(list(remaining))
+
+            results = {}
+            entries = []
+            for leave_application_id, _, _, days in items:
+                balance_id = charged.get(leave_application_id)
+                if balance_id not in remaining:
+                    continue
+                days = max(min(days, ceilings[balance_id] - remaining[balance_id]), 0)
+                remaining[balance_id] += days
+                results[leave_application_id] = remaining[balance_id]
+                entries.append(LeaveBalanceTransaction(
+                    balance_id=balance_id, kind='restore', days=days,
+                    remaining_after=remaining[balance_id], leave_application_id=leave_application_id,
+                ))
+            if not entries:
+                return results
+
+            cls.objects.filter(pk__in=remaining).update(remaining_days=models.Case(
+                *[models.When(pk=pk, then=models.Value(days)) for pk, days in remaining.items()],
+                output_field=models.IntegerField(),
+            ))
+            LeaveBalanceTransaction.objects.bulk_create(entries)
+        return results
+
+    @classmethod
+    def restore(cls, leave_application):
+        """
+        Give the days of a denied or cancelled application back to the balance
+        they were deducted from. Returns the new remaining days.
+        """
+        item = (
+            leave_application.pk, leave_application.employee_id,
+            leave_application.date_filed, leave_application.number_of_days,
+        )
+        remaining = cls.restore_many([item])
+        if leave_application.pk not in remaining:
+            raise cls.DoesNotExist(f"No leave balance for {leave_application.date_filed.year}")
+        return remaining[leave_application.pk]
+
+
+class LeaveBalanceTransaction(models.Model):
+    """Append-only ledger of leave balance changes; rows are never updated."""
+    KIND_CHOICES = [
+        ('grant', 'Yearly grant'),
+        ('carry_over', 'Carried over from the previous year'),
+        ('deduct', 'Deducted for a leave application'),
+        ('restore', 'Restored after denial or cancellation'),
+        ('adjust', 'Manual adjustment'),
+    ]
+
+    balance = models.ForeignKey(EmployeeLeaveBalance, on_delete=models.CASCADE, related_name='transactions')
+    leave_application = models.ForeignKey(
+        'LeaveApplication',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='balance_transactions'
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    days = models.IntegerField(help_text="Signed change in remaining days")
+    remaining_after = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.days:+d} -> {self.remaining_after}"
 
 class LeaveApplication(models.Model):
     LEAVE_TYPES = [
@@ -135,6 +493,7 @@ class LeaveApplication(models.Model):
         choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected')],
         default='pending'
     )
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-date_filed']
@@ -184,6 +543,21 @@ class Dean(models.Model):
         return f"{self.full_name} - Dean of {self.department.name}"
 
 
+class LeaveRequestQuerySet(SelectionQuerySetMixin, models.QuerySet):
+    # Serializer field -> relation it reads, most specific first.
+    RELATED_FIELDS = (
+        ('application.department_name', 'application__employee__department'),
+        ('application.position_title', 'application__employee__position'),
+        ('application.employee_name', 'application__employee'),
+        ('application.employee_id_display', 'application__employee'),
+        ('application.employee_photo_url', 'application__employee'),
+        ('application', 'application'),
+        ('dean_reviewer_name', 'dean_reviewer'),
+        ('dean_reviewer_username', 'dean_reviewer__user'),
+        ('hr_reviewer_name', 'hr_reviewer'),
+    )
+
+
 class LeaveRequest(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -229,95 +603,154 @@ class LeaveRequest(models.Model):
         help_text="True if auto-archived, False if manually archived"
     )
 
+    objects = LeaveRequestQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Leave Request'
         verbose_name_plural = 'Leave Requests'
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['hr_reviewed_at', 'id']),
+            models.Index(fields=['updated_at', 'id']),
+        ]
 
-    def _create_report(self, reviewer_type, reviewer, comments=None):
-        application = self.application
-
-        report, created = LeaveReport.objects.get_or_create(
-            leave_request=self,
-            defaults={
-                'employee': application.employee,
-                'leave_type': application.leave_type,
-                'number_of_days': application.number_of_days,
-                'location': application.vacation_location or application.sick_location or 'N/A',
-                'date_filed': application.date_filed,
-            }
-        )
+    # new status: (status it must currently have, resulting application status)
+    TRANSITIONS = {
+        'dean_approved': ('pending', 'pending'),
+        'dean_denied': ('pending', 'rejected'),
+        'approved': ('dean_approved', 'approved'),
+        'denied': ('dean_approved', 'rejected'),
+    }
+
+    def _transition(self, status, reviewer_type, reviewer, comments=None):
+        """
+        Move to ``status`` with one UPDATE guarded by the expected current
+        status, so of two reviewers acting at once only the first succeeds;
+        the other gets a StaleTransition and nothing is written. The UPDATE
+        sends no post_save, so the cached dashboard stats are cleared on commit.
+        """
+        from .utils import invalidate_dashboard_stats
+
+        expected, application_status = self.TRANSITIONS[status]
+        now = timezone.now()
+        changes = {
+            'status': status,
+            f'{reviewer_type}_reviewer': reviewer,
+            f'{reviewer_type}_reviewed_at': now,
+            'updated_at': now,
+        }
+        if comments is not None:
+            changes[f'{reviewer_type}_comments'] = comments
+
+        with transaction.atomic():
+            if not LeaveRequest.objects.filter(pk=self.pk, status=expected).update(**changes):
+                raise StaleTransition(f"Leave request is no longer {expected.replace('_', '-')}")
+            for field, value in changes.items():
+                setattr(self, field, value)
+
+            LeaveApplication.objects.filter(pk=self.application_id).update(status=application_status, updated_at=now)
+            if LeaveRequest.application.is_cached(self):
+                self.application.status = application_status
+
+            LeaveReport.on_transition([self.pk], reviewer_type)
+            transaction.on_commit(invalidate_dashboard_stats)
 
-        if reviewer_type == 'dean':
-            report.dean_reviewer = reviewer
-            report.dean_status = 'denied' if self.status == 'dean_denied' else 'approved'
-            report.dean_reviewed_at = self.dean_reviewed_at
-            report.dean_comments = comments or ''
 
-        elif reviewer_type == 'hr':
-            report.hr_reviewer = reviewer
-            report.hr_status = 'denied' if self.status == 'denied' else 'approved'
-            report.hr_reviewed_at = self.hr_reviewed_at
-            report.hr_comments = comments or ''
+    @classmethod
+    def bulk_transition(cls, ids, status, reviewer_type, reviewer, comments=None, queryset=None):
+        """
+        Apply one transition to many requests set-wise in a single transaction:
+        one locking read, one guarded UPDATE of the requests, one of their
+        applications, one report upsert and, for denials, one UPDATE of the
+        balances the days were deducted from, with its ledger entries. The
+        dashboard stats cache is cleared on commit.
+
+        ``queryset`` limits which requests may be touched (e.g. a dean's
+        department). Returns ``{id: None}`` for every request moved and
+        ``{id: reason}`` for those skipped.
+        """
+        from .utils import invalidate_dashboard_stats
+
+        expected, application_status = cls.TRANSITIONS[status]
+        queryset = cls.objects.all() if queryset is None else queryset
+        results = {pk: "Leave request not found" for pk in ids}
+
+        with transaction.atomic():
+            rows = list(
+                queryset.filter(pk__in=ids).select_for_update(of=('self',)).values(
+                    'id', 'status', 'application_id', 'application__employee_id',
+                    'application__date_filed', 'application__number_of_days',
+                )
+            )
+            if status in ('dean_denied', 'denied'):
+                charged = EmployeeLeaveBalance.charged_balances(
+                    (row['application_id'], row['application__employee_id'], row['application__date_filed'])
+                    for row in rows
+                )
+            else:
+                charged = None
+
+            moving = []
+            for row in rows:
+                if row['status'] != expected:
+                    results[row['id']] = f"Request already {row['status']}"
+                elif charged is not None and row['application_id'] not in charged:
+                    results[row['id']] = f"No leave balance for {row['application__date_filed'].year}"
+                else:
+                    results[row['id']] = None
+                    moving.append(row)
+            if not moving:
+                return results
+
+            now = timezone.now()
+            changes = {
+                'status': status,
+                f'{reviewer_type}_reviewer': reviewer,
+                f'{reviewer_type}_reviewed_at': now,
+                'updated_at': now,
+            }
+            if comments is not None:
+                changes[f'{reviewer_type}_comments'] = comments
+            request_ids = [row['id'] for row in moving]
+            cls.objects.filter(pk__in=request_ids, status=expected).update(**changes)
+            LeaveApplication.objects.filter(pk__in=[row['application_id'] for row in moving]).update(
+                status=application_status, updated_at=now
+            )
 
-        report.save()
-        return report
+            if charged is not None:
+                EmployeeLeaveBalance.restore_many([
+                    (row['application_id'], row['application__employee_id'],
+                     row['application__date_filed'], row['application__number_of_days'])
+                    for row in moving
+                ], charged)
 
+            LeaveReport.on_transition(request_ids, reviewer_type)
+            transaction.on_commit(invalidate_dashboard_stats)
 
-    def dean_approve(self, dean):
-        self.status = 'dean_approved'
-        self.dean_reviewer = dean
-        self.dean_reviewed_at = timezone.now()
-        self.save()
+        return results
 
-        self.application.status = 'pending'
-        self.application.save()
 
-        self._create_report('dean', dean, self.dean_comments)
+    def dean_approve(self, dean):
+        self._transition('dean_approved', 'dean', dean)
 
 
     def dean_deny(self, dean, comments=''):
-        self.status = 'dean_denied'
-        self.dean_reviewer = dean
-        self.dean_reviewed_at = timezone.now()
-        self.dean_comments = comments
-        self.save()
-
-        self.application.status = 'rejected'
-        self.application.save()
-
-        self._create_report('dean', dean, comments)
+        self._transition('dean_denied', 'dean', dean, comments)
 
 
-    def hr_approve(self, hr_user):
+    def hr_approve(self, hr_user, comments=None):
         if self.status != 'dean_approved':
             raise ValueError("Leave request must be dean-approved first")
 
-        self.status = 'approved'
-        self.hr_reviewer = hr_user
-        self.hr_reviewed_at = timezone.now()
-        self.save()
-
-        self.application.status = 'approved'
-        self.application.save()
-
-        self._create_report('hr', hr_user, self.hr_comments)
+        self._transition('approved', 'hr', hr_user, comments)
 
 
     def hr_deny(self, hr_user, comments=''):
         if self.status != 'dean_approved':
             raise ValueError("Leave request must be dean-approved first")
 
-        self.status = 'denied'
-        self.hr_reviewer = hr_user
-        self.hr_reviewed_at = timezone.now()
-        self.hr_comments = comments
-        self.save()
-
-        self.application.status = 'rejected'
-        self.application.save()
-
-        self._create_report('hr', hr_user, comments)
+        self._transition('denied', 'hr', hr_user, comments)
 
 
     @property
@@ -331,6 +764,17 @@ class LeaveRequest(models.Model):
     def __str__(self):
         return f"{self.application.employee.full_name} - {self.status}"
 
+class LeaveReportQuerySet(models.QuerySet):
+    def with_related(self):
+        return self.select_related(
+            'employee__department',
+            'employee__position',
+            'dean_reviewer',
+            'hr_reviewer',
+            'leave_request__application',
+        )
+
+
 class LeaveReport(models.Model):
     DEAN_STATUS_CHOICES = [
         ('pending', 'Pending Dean Review'),
@@ -342,6 +786,28 @@ class LeaveReport(models.Model):
         ('approved', 'HR Approved'),
         ('denied', 'HR Denied'),
     ]
+    DEAN_STATUS_BY_REQUEST_STATUS = {
+        'dean_approved': 'approved',
+        'dean_denied': 'denied',
+        'approved': 'approved',
+        'denied': 'approved',
+    }
+    HR_STATUS_BY_REQUEST_STATUS = {
+        'approved': 'approved',
+        'denied': 'denied',
+    }
+    PROJECTION_SOURCE_FIELDS = (
+        'id', 'status',
+        'application__employee_id', 'application__leave_type', 'application__number_of_days',
+        'application__vacation_location', 'application__sick_location', 'application__date_filed',
+        'dean_reviewer_id', 'dean_reviewed_at', 'dean_comments',
+        'hr_reviewer_id', 'hr_reviewed_at', 'hr_comments',
+    )
+    PROJECTION_STAGE_FIELDS = {
+        'application': ('employee', 'leave_type', 'number_of_days', 'location', 'date_filed'),
+        'dean': ('dean_reviewer', 'dean_status', 'dean_reviewed_at', 'dean_comments'),
+        'hr': ('hr_reviewer', 'hr_status', 'hr_reviewed_at', 'hr_comments'),
+    }
 
     leave_request = models.OneToOneField(
         'LeaveRequest', on_delete=models.CASCADE, related_name='report'
@@ -371,41 +837,95 @@ class LeaveReport(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = LeaveReportQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Leave Report'
         verbose_name_plural = 'Leave Reports'
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+        ]
 
     def __str__(self):
         return f"{self.employee.full_name} - {self.leave_type} Report"
 
     @classmethod
-    def create_or_update_from_leave_request(cls, leave_request):
-        report, created = cls.objects.get_or_create(
-            leave_request=leave_request,
-            defaults={
-                'employee': leave_request.application.employee,
-                'leave_type': leave_request.application.leave_type,
-                'number_of_days': leave_request.application.number_of_days,
-                'location': leave_request.application.vacation_location or leave_request.application.sick_location or 'N/A',
-                'date_filed': leave_request.application.date_filed,
-            }
-        )
+    def projection_mode(cls):
+        return getattr(settings, 'LEAVE_REPORT_PROJECTION', 'inline')
+
+    @classmethod
+    def on_transition(cls, leave_request_ids, reviewer_type):
+        """
+        Called by the workflow after a review. Inline mode projects the
+        reviewer's columns in the same transaction; deferred mode leaves it to
+        the ``project_leave_reports`` command.
+        """
+        if cls.projection_mode() == 'inline':
+            cls.project(leave_request_ids, stages=(reviewer_type,))
 
-        if leave_request.dean_reviewer:
-            report.dean_reviewer = leave_request.dean_reviewer
-            report.dean_status = 'approved' if leave_request.status != 'dean_denied' else 'denied'
-            report.dean_reviewed_at = leave_request.dean_reviewed_at
-            report.dean_comments = leave_request.dean_comments or ''
+    @classmethod
+    def from_request_values(cls, row):
+        status = row['status']
+        return cls(
+            leave_request_id=row['id'],
+            employee_id=row['application__employee_id'],
+            leave_type=row['application__leave_type'],
+            number_of_days=row['application__number_of_days'],
+            location=row['application__vacation_location'] or row['application__sick_location'] or 'N/A',
+            date_filed=row['application__date_filed'],
+            dean_reviewer_id=row['dean_reviewer_id'],
+            dean_status=cls.DEAN_STATUS_BY_REQUEST_STATUS.get(status, 'pending'),
+            dean_reviewed_at=row['dean_reviewed_at'],
+            dean_comments=row['dean_comments'] or '',
+            hr_reviewer_id=row['hr_reviewer_id'],
+            hr_status=cls.HR_STATUS_BY_REQUEST_STATUS.get(status, 'pending'),
+            hr_reviewed_at=row['hr_reviewed_at'],
+            hr_comments=row['hr_comments'] or '',
+        )
 
-        if leave_request.hr_reviewer:
-            report.hr_reviewer = leave_request.hr_reviewer
-            report.hr_status = 'approved' if leave_request.status == 'approved' else 'denied'
-            report.hr_reviewed_at = leave_request.hr_reviewed_at
-            report.hr_comments = leave_request.hr_comments or ''
+    @classmethod
+    def project(cls, leave_request_ids, stages=('dean', 'hr')):
+        """
+        Bring the reports of the given requests up to date from ``LeaveRequest``
+        with one read and one upsert. Existing reports only get the columns of
+        ``stages`` (keys of PROJECTION_STAGE_FIELDS) rewritten; requests still
+        pending have no report. Returns the number of reports written.
+        """
+        reports = [
+            cls.from_request_values(row)
+            for row in LeaveRequest.objects.filter(pk__in=leave_request_ids)
+            .exclude(status='pending')
+            .values(*cls.PROJECTION_SOURCE_FIELDS)
+        ]
+        if not reports:
+            return 0
+        cls.objects.bulk_create(
+            reports,
+            update_conflicts=True,
+            unique_fields=['leave_request'],
+            update_fields=[field for name in stages for field in cls.PROJECTION_STAGE_FIELDS[name]] + ['updated_at'],
+        )
+        return len(reports)
 
-        report.save()
-        return report
+    @classmethod
+    def rebuild(cls, batch_size=500):
+        """
+        Re-derive the whole report table from ``LeaveRequest`` in one
+        transaction, upserting every column in id-ordered batches and dropping
+        reports whose request is pending again. Returns the number of reports.
+        """
+        written = 0
+        with transaction.atomic():
+            cls.objects.filter(leave_request__status='pending').delete()
+            ids = LeaveRequest.objects.exclude(status='pending').order_by('pk').values_list('pk', flat=True)
+            last_id = 0
+            while True:
+                batch = list(ids.filter(pk__gt=last_id)[:batch_size])
+                if not batch:
+                    return written
+                written += cls.project(batch, stages=tuple(cls.PROJECTION_STAGE_FIELDS))
+                last_id = batch[-1]
 
 class LeaveRequestArchive(models.Model):
     STATUS_CHOICES = [
@@ -421,7 +941,7 @@ class LeaveRequestArchive(models.Model):
         ('emergency', 'Emergency Leave'),
     ]
     
-    original_leave_request_id = models.IntegerField(help_text="Original LeaveRequest ID")
+    original_leave_request_id = models.IntegerField(unique=True, help_text="Original LeaveRequest ID")
     original_leave_application_id = models.IntegerField(help_text="Original LeaveApplication ID")
     
     employee_id = models.CharField(max_length=20, help_text="Employee ID from original employee")
@@ -460,6 +980,7 @@ class LeaveRequestArchive(models.Model):
         verbose_name = 'Leave Request Archive'
         verbose_name_plural = 'Leave Request Archives'
         indexes = [
+            models.Index(fields=['-archived_at', '-id']),
             models.Index(fields=['employee_id', '-archived_at']),
             models.Index(fields=['final_status', '-archived_at']),
             models.Index(fields=['-date_filed']),
@@ -468,6 +989,8 @@ class LeaveRequestArchive(models.Model):
     def __str__(self):
         return f"{self.employee_name} ({self.employee_id}) - {self.leave_type} - {self.final_status}"
     
+    ARCHIVE_CHUNK_SIZE = 500
+
     @classmethod
     def archive_leave_request(cls, leave_request):
         if leave_request.status not in ['approved', 'denied']:
@@ -475,25 +998,85 @@ class LeaveRequestArchive(models.Model):
         
         if not leave_request.dean_reviewer or not leave_request.hr_reviewer:
             raise ValueError("Leave request must be reviewed by both dean and HR")
-        
+
+        existing = cls.objects.filter(original_leave_request_id=leave_request.id).first()
+        if existing:
+            return existing
+
+        year = timezone.now().year
+        balance = EmployeeLeaveBalance.objects.filter(
+            employee_id=leave_request.application.employee_id, year=year
+        ).values_list('remaining_days', flat=True).first()
+
+        archive = cls.from_leave_request(leave_request, balance, year)
+        archive.save()
+        return archive
+
+    @classmethod
+    def archive_processed(cls, queryset, chunk_size=None):
+        """
+        Archive the approved/denied, not yet archived requests in ``queryset``.
+
+        Each chunk is loaded with its relations and balances up front, then
+        written with one ``bulk_create`` and one ``update(is_archived=True)``
+        in a transaction. The unique ``original_leave_request_id`` makes a
+        rerun (or a concurrent run) skip requests that already have an archive.
+        Returns the ids of the archives for the requests processed.
+        """
+        chunk_size = chunk_size or cls.ARCHIVE_CHUNK_SIZE
+        pending = queryset.filter(
+            status__in=['approved', 'denied'],
+            is_archived=False,
+            dean_reviewer__isnull=False,
+            hr_reviewer__isnull=False,
+        ).select_related(
+            'application__employee__department',
+            'application__employee__position',
+            'dean_reviewer__department',
+            'hr_reviewer',
+        ).order_by('id')
+
+        year = timezone.now().year
+        archive_ids = []
+        while True:
+            with transaction.atomic():
+                chunk = list(pending[:chunk_size])
+                if not chunk:
+                    break
+
+                employee_ids = {leave_request.application.employee_id for leave_request in chunk}
+                balances = dict(
+                    EmployeeLeaveBalance.objects.filter(employee_id__in=employee_ids, year=year)
+                    .values_list('employee_id', 'remaining_days')
+                )
+                cls.objects.bulk_create(
+                    [
+                        cls.from_leave_request(leave_request, balances.get(leave_request.application.employee_id), year)
+                        for leave_request in chunk
+                    ],
+                    ignore_conflicts=True,
+                )
+
+                request_ids = [leave_request.id for leave_request in chunk]
+                LeaveRequest.objects.filter(pk__in=request_ids).update(is_archived=True, updated_at=timezone.now())
+                archive_ids += cls.objects.filter(
+                    original_leave_request_id__in=request_ids
+                ).values_list('id', flat=True)
+
+        return archive_ids
+
+    @classmethod
+    def from_leave_request(cls, leave_request, remaining_days, year):
+        """Unsaved archive of ``leave_request``; its relations must already be loaded."""
         application = leave_request.application
         employee = application.employee
-        
-        year = timezone.now().year
-        try:
-            balance = EmployeeLeaveBalance.objects.get(employee=employee, year=year)
-            balance_before = balance.remaining_days
-            if leave_request.status == 'approved':
-                balance_after = balance.remaining_days 
-            else:
-                balance_after = balance.remaining_days 
-        except EmployeeLeaveBalance.DoesNotExist:
-            balance_before = 0
-            balance_after = 0
+
+        balance_before = remaining_days or 0
+        balance_after = remaining_days or 0
 
         final_status = 'approved' if leave_request.status == 'approved' else 'denied'
         
-        archive = cls.objects.create(
+        return cls(
             original_leave_request_id=leave_request.id,
             original_leave_application_id=application.id,
             
@@ -524,8 +1107,6 @@ class LeaveRequestArchive(models.Model):
             leave_balance_after=balance_after if final_status == 'approved' else None,
             leave_balance_year=year,
         )
-        
-        return archive
     
     def get_summary(self):
         return {
@@ -543,4 +1124,138 @@ class LeaveRequestArchive(models.Model):
             'hr_date': self.hr_reviewed_at,
             'final_outcome': self.get_final_status_display(),
             'archived_on': self.archived_at,
-        }
\ No newline at end of file
+        }
+
+
+class Watermark(models.Model):
+    """
+    How far a background job has processed a table, as the ``(position, last_id)``
+    of the last row it handled. Jobs resume with a keyset filter after it.
+    """
+    name = models.CharField(max_length=100, primary_key=True)
+    position = models.DateTimeField(null=True, blank=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.position} / {self.last_id}"
+
+    def after(self, field):
+        """Filter matching rows ordered after this watermark on ``(field, id)``."""
+        if self.position is None:
+            return models.Q()
+        return models.Q(**{f'{field}__gt': self.position}) | models.Q(**{field: self.position, 'id__gt': self.last_id})
+
+    @classmethod
+    def batches(cls, name, queryset, field, batch_size, cutoff):
+        """
+        Yield ids of the ``queryset`` rows past watermark ``name`` on ``(field, id)``,
+        up to ``cutoff``, ``batch_size`` at a time. Each batch runs in a transaction
+        holding the watermark row lock, so overlapping runs never share one; the
+        watermark moves past it when the caller asks for the next batch.
+        """
+        cls.objects.get_or_create(name=name)
+        while True:
+            with transaction.atomic():
+                watermark = cls.objects.select_for_update().get(name=name)
+                batch = list(
+                    queryset
+                    .filter(**{f'{field}__lte': cutoff})
+                    .filter(watermark.after(field))
+                    .order_by(field, 'id')
+                    .values_list('id', field)[:batch_size]
+                )
+                if not batch:
+                    return
+
+                yield [pk for pk, _ in batch]
+                watermark.last_id, watermark.position = batch[-1]
+                watermark.save()
+
+
+
+class PdfRenderJob(models.Model):
+    """
+    A queued bulk PDF export. The request that enqueues it returns at once;
+    ``run_pdf_jobs`` workers claim queued jobs, render them and record progress.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    OUTPUT_CHOICES = [
+        ('zip', 'ZIP of PDFs'),
+        ('pdf', 'Merged PDF'),
+    ]
+
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='pdf_render_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    output = models.CharField(max_length=10, choices=OUTPUT_CHOICES, default='zip')
+    # Archives to render, fixed when the job is enqueued.
+    archive_ids = models.JSONField(default=list)
+    total = models.PositiveIntegerField(default=0)
+    rendered = models.PositiveIntegerField(default=0)
+    result_file = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['status', 'id']),
+        ]
+
+    def __str__(self):
+        return f"PDF job {self.pk} ({self.status}, {self.rendered}/{self.total})"
+
+    @property
+    def progress(self):
+        return round(self.rendered / self.total, 3) if self.total else 0.0
+
+    @property
+    def filename(self):
+        return f"leave_archives_{self.pk}.{self.output}"
+
+    @property
+    def result_path(self):
+        return Path(settings.PDF_JOB_DIR) / self.result_file
+
+    @classmethod
+    def claim(cls, worker):
+        """
+        Take the oldest queued job for ``worker``. The claim is one UPDATE
+        guarded by ``status='queued'``, so two workers never get the same job.
+        Returns None when the queue is empty.
+        """
+        while True:
+            pk = cls.objects.filter(status='queued').order_by('id').values_list('pk', flat=True).first()
+            if pk is None:
+                return None
+            now = timezone.now()
+            if cls.objects.filter(pk=pk, status='queued').update(
+                status='running', worker=worker, started_at=now, updated_at=now
+            ):
+                return cls.objects.get(pk=pk)
+
+    @classmethod
+    def requeue_stale(cls, older_than):
+        """Put back running jobs whose worker stopped reporting progress (e.g. it was killed)."""
+        return cls.objects.filter(status='running', updated_at__lt=older_than).update(
+            status='queued', worker='', rendered=0, updated_at=timezone.now()
+        )
+
+    def report_progress(self, rendered):
+        self.rendered = rendered
+        PdfRenderJob.objects.filter(pk=self.pk).update(rendered=rendered, updated_at=timezone.now())
+
+    def finish(self, result_file='', error=''):
+        self.status = 'failed' if error else 'done'
+        self.result_file, self.error, self.finished_at = result_file, error, timezone.now()
+        self.save(update_fields=['status', 'result_file', 'error', 'finished_at', 'rendered', 'updated_at'])
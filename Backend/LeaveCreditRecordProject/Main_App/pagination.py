@@ -0,0 +1,131 @@
+import base64
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def encode_cursor(value, pk):
+    raw = f"{value.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        value, pk = raw.rsplit('|', 1)
+        position = parse_datetime(value)
+        if position is None:
+            raise ValueError
+        return position, int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+def keyset_slice(queryset, cursor, limit, field='created_at'):
+    """
+    ``queryset`` ordered newest-first on ``(field, id)``, starting after
+    ``cursor`` and cut to ``limit`` rows. Raises ValueError on a bad cursor.
+    """
+    queryset = queryset.order_by(f'-{field}', '-id')
+
+    if cursor:
+        position, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(**{f'{field}__lt': position}) | Q(**{field: position, 'id__lt': pk})
+        )
+    return queryset[:limit]
+
+
+def keyset_page(queryset, cursor, limit, field='created_at'):
+    """
+    Return one page of ``queryset`` ordered newest-first on ``(field, id)``
+    along with the cursor of the next page (or None on the last page).
+    """
+    rows = list(keyset_slice(queryset, cursor, limit + 1, field))
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, field), last.pk)
+
+    return rows, next_cursor
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opt-in keyset pagination on ``(<cursor_field>, id)``, newest first.
+
+    Only used when the request carries ``cursor`` or ``page_size``; without
+    them the full list is returned as before. Views pick the timestamp to
+    page on with a ``cursor_field`` attribute (default ``created_at``).
+    """
+    page_size = 50
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def page_slice(self, queryset, request, view=None):
+        """
+        The rows ``paginate_queryset`` reads for this request, plus the one
+        that decides the next link, as an unevaluated sliced queryset.
+        """
+        try:
+            return keyset_slice(
+                queryset, request.query_params.get(self.cursor_query_param), self.get_page_size(request) + 1,
+                field=getattr(view, 'cursor_field', 'created_at'),
+            )
+        except ValueError:
+            raise NotFound("Invalid cursor")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        field = getattr(view, 'cursor_field', 'created_at')
+        try:
+            rows, self.next_cursor = keyset_page(
+                queryset, params.get(self.cursor_query_param), self.get_page_size(request), field=field
+            )
+        except ValueError:
+            raise NotFound("Invalid cursor")
+        return rows
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+
+class PaginatedActionMixin:
+    """Shared body of list-style ``@action`` views on a ``KeysetPagination`` viewset."""
+
+    def paginated_or(self, queryset, legacy):
+        """
+        A keyset page of ``queryset`` when the request asks for one; otherwise
+        all of it serialized and passed to ``legacy`` to build the response.
+        """
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return legacy(self.get_serializer(queryset, many=True).data)
@@ -0,0 +1,126 @@
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+
+from .export_views import (
+    PDF_TEMPLATE_VERSION,
+    export_osmena_leave_application_pdf_non_teaching_format,
+    export_osmena_leave_application_pdf_teaching_format,
+)
+
+TEACHING_KEYWORDS = ("instructor", "teacher", "educator", "coach")
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def render_archive_pdf(archive):
+    """Render the leave form of an archive with ReportLab, as bytes."""
+    position = (archive.employee_position or "").lower()
+    if any(keyword in position for keyword in TEACHING_KEYWORDS):
+        buffer = export_osmena_leave_application_pdf_teaching_format(archive)
+    else:
+        buffer = export_osmena_leave_application_pdf_non_teaching_format(archive)
+    return buffer.getvalue()
+
+
+def archive_digest(archive):
+    """
+    Hash of everything the PDF is rendered from: the template version and
+    every column of the archive row. Any edit gives a new cache key.
+    """
+    digest = hashlib.sha256(f"v{PDF_TEMPLATE_VERSION}".encode())
+    for field in archive._meta.concrete_fields:
+        digest.update(f"|{field.attname}={getattr(archive, field.attname)!r}".encode())
+    return digest.hexdigest()
+
+
+def cache_dir():
+    return Path(settings.ARCHIVE_PDF_CACHE_DIR)
+
+
+def cache_path(archive, digest=None):
+    digest = digest or archive_digest(archive)
+    return cache_dir() / f"{archive.pk}-v{PDF_TEMPLATE_VERSION}-{digest[:32]}.pdf"
+
+
+def cached_archive_pdf(archive, digest=None):
+    """
+    Path of the archive's PDF, rendering it on a cache miss. Renders are
+    written to a temporary file and renamed into place, so readers never see
+    a partial PDF; copies for older versions of the row are removed.
+    """
+    path = cache_path(archive, digest)
+    if path.exists():
+        return path
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    content = render_archive_pdf(archive)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as tmp:
+        tmp.write(content)
+    os.replace(tmp_name, path)
+
+    for stale in path.parent.glob(f"{archive.pk}-v*.pdf"):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+    return path
+
+
+def requested_range(request, etag, size):
+    """
+    ``(start, end)`` of a single-range request, ``None`` to send the whole
+    file (no Range, a stale If-Range, or a form we don't serve such as
+    multiple ranges), or ``False`` when the range can't be satisfied.
+    """
+    header = request.META.get("HTTP_RANGE")
+    if not header:
+        return None
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if if_range and if_range != etag:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+
+    start, end = match.groups()
+    if not start:
+        length = int(end)
+        return (max(size - length, 0), size - 1) if length else False
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size:
+        return False
+    return (start, end) if start <= end else None
+
+
+def file_response(request, path, etag, filename, content_type="application/pdf"):
+    """
+    Serve a cached file with a strong ETag: 304 on a matching If-None-Match,
+    206 for a byte range, otherwise a streamed ``FileResponse``.
+    """
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        size = path.stat().st_size
+        byte_range = requested_range(request, etag, size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+        elif byte_range is not None:
+            start, end = byte_range
+            with open(path, "rb") as f:
+                f.seek(start)
+                response = HttpResponse(f.read(end - start + 1), status=206, content_type=content_type)
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+            response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        else:
+            response = FileResponse(open(path, "rb"), as_attachment=True, filename=filename, content_type=content_type)
+
+    response["ETag"] = etag
+    response["Accept-Ranges"] = "bytes"
+    response["Cache-Control"] = "private, no-cache"
+    return response
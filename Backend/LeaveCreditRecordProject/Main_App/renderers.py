@@ -0,0 +1,114 @@
+"""
+Renderers for large list payloads.
+
+``FastJSONRenderer`` is a drop-in for DRF's ``JSONRenderer`` that encodes with
+orjson: dicts, lists, strings, numbers and UUIDs are written in C, and only
+Decimals, lazy strings and dates/times go through a Python ``default`` hook.
+orjson would write datetimes with full microseconds where DRF and Django
+truncate to milliseconds, so they are passed through to keep the bytes the
+same.
+``MessagePackRenderer`` serves the same data as MessagePack to clients that
+send ``Accept: application/msgpack``.
+
+Both libraries are optional: without orjson the stock encoder is used, and
+without msgpack the binary format is simply not offered.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+MSGPACK_MEDIA_TYPES = ('application/msgpack', 'application/x-msgpack')
+
+# Objects the fast encoders can't handle themselves are passed to the
+# default() of the encoder each code path used before, so output is unchanged:
+# DRF turns Decimal into a float, Django's JsonResponse into a string.
+_api_default = JSONEncoder().default
+_django_default = DjangoJSONEncoder().default
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+def dumps_json(data, default=_api_default):
+    if orjson is not None:
+        return orjson.dumps(data, default=default, option=ORJSON_OPTIONS)
+    return json.dumps(data, default=default, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def dumps_msgpack(data, default=_api_default):
+    return msgpack.packb(data, default=default, use_bin_type=True)
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=_api_default, option=ORJSON_OPTIONS)
+        # Match JSONRenderer, which escapes these for safe embedding in <script>.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return dumps_msgpack(data)
+
+
+def wants_msgpack(request):
+    if msgpack is None:
+        return False
+    accept = request.headers.get('Accept', '')
+    return any(
+        media_range.split(';')[0].strip() in MSGPACK_MEDIA_TYPES
+        for media_range in accept.split(',')
+    )
+
+
+def negotiated_response(request, data, status=200):
+    """
+    ``JsonResponse`` replacement for plain Django views: MessagePack when the
+    client asks for it, JSON (Decimals as strings, like DjangoJSONEncoder)
+    otherwise.
+    """
+    if wants_msgpack(request):
+        response = HttpResponse(
+            dumps_msgpack(data, default=_django_default),
+            content_type=MSGPACK_MEDIA_TYPES[0], status=status,
+        )
+    else:
+        response = HttpResponse(
+            dumps_json(data, default=_django_default),
+            content_type='application/json', status=status,
+        )
+    patch_vary_headers(response, ('Accept',))
+    return response
@@ -0,0 +1,64 @@
+from django.contrib.auth.models import Group, User
+from django.db.models import Exists, OuterRef
+
+
+class UserRoles:
+    """
+    The HR profile, dean profile (with department) and HR group membership
+    of one user, loaded together in a single query.
+    """
+
+    def __init__(self, user, hr_profile=None, dean=None, in_hr_group=False):
+        self.user = user
+        self.hr_profile = hr_profile
+        self.dean = dean
+        self.in_hr_group = in_hr_group
+
+    @classmethod
+    def load(cls, user):
+        if not user or not user.is_authenticated:
+            return cls(user)
+
+        hr_group = Group.objects.filter(name='HR', user=OuterRef('pk'))
+        row = (
+            User.objects
+            .select_related('hruser', 'dean_profile__department')
+            .annotate(in_hr_group=Exists(hr_group))
+            .get(pk=user.pk)
+        )
+        hr_profile = row.hruser if hasattr(row, 'hruser') else None
+        dean = row.dean_profile if hasattr(row, 'dean_profile') else None
+
+        # Prime the reverse one-to-one caches so user.hruser / user.dean_profile
+        # don't hit the database again for the rest of the request.
+        User.hruser.related.set_cached_value(user, hr_profile)
+        User.dean_profile.related.set_cached_value(user, dean)
+
+        return cls(user, hr_profile=hr_profile, dean=dean, in_hr_group=row.in_hr_group)
+
+    @property
+    def is_hr(self):
+        return self.hr_profile is not None and self.hr_profile.is_hr
+
+    @property
+    def is_dean(self):
+        return self.dean is not None and self.dean.is_dean
+
+    @property
+    def has_hr_access(self):
+        return self.hr_profile is not None or self.in_hr_group
+
+
+def get_roles(request):
+    """
+    Return the cached UserRoles for ``request`` (a Django or DRF request),
+    loading them on first use.
+    """
+    http_request = getattr(request, '_request', request)
+    user = request.user
+    roles = getattr(http_request, '_user_roles', None)
+    if roles is None or roles.user is not user:
+        roles = UserRoles.load(user)
+        http_request._user_roles = roles
+    return roles
+
@@ -0,0 +1,200 @@
+import csv
+import json
+import os
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Department, Employee, EmployeeLeaveBalance, Position
+from .serializers import RosterRowSerializer
+from .utils import invalidate_dashboard_stats
+
+ROSTER_BATCH_SIZE = 500
+ROSTER_CONTENT_TYPES = {
+    'text/csv': 'csv',
+    'application/jsonl': 'jsonl',
+    'application/x-ndjson': 'jsonl',
+}
+SYNC_FIELDS = (
+    'full_name', 'email', 'gender', 'age', 'height', 'weight',
+    'department', 'position', 'motto_in_life',
+)
+
+
+def roster_format(upload):
+    """``'csv'`` or ``'jsonl'`` from the file extension or content type, else None."""
+    extension = os.path.splitext(upload.name or '')[1].lower().lstrip('.')
+    if extension in ('csv', 'jsonl', 'ndjson'):
+        return 'jsonl' if extension == 'ndjson' else extension
+    return ROSTER_CONTENT_TYPES.get(upload.content_type)
+
+
+def read_rows(upload, fmt):
+    """
+    Yield ``(line, data, error)`` for each record of the uploaded roster,
+    reading it line by line instead of loading the whole file.
+    """
+    lines = (line.decode('utf-8-sig') for line in upload)
+
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        for data in reader:
+            yield reader.line_num, data, None
+        return
+
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f'Invalid JSON: {e}'
+            continue
+        if not isinstance(data, dict):
+            yield line_number, None, 'Each line must be a JSON object'
+            continue
+        yield line_number, data, None
+
+
+class RosterSync:
+    """
+    Upserts a roster into ``Employee``: rows are validated one by one against
+    in-memory department/position maps, then each batch is matched to existing
+    employees (by employee_id, else email) with one query and written with
+    ``bulk_create`` / ``bulk_update``.
+
+    Rows that fail validation are skipped and reported. Employees missing from
+    the file are deactivated only when asked to and only if every row was
+    accepted, so a typo can't deactivate someone.
+    """
+
+    def __init__(self, deactivate_missing=False, batch_size=ROSTER_BATCH_SIZE):
+        self.deactivate_missing = deactivate_missing
+        self.batch_size = batch_size
+        self.context = {
+            'departments': {department.code.upper(): department for department in Department.objects.all()},
+            'positions': {position.code.upper(): position for position in Position.objects.all()},
+        }
+        self.seen = set()
+        self.keys = set()
+        self.rows = 0
+        self.created = self.updated = self.unchanged = self.deactivated = 0
+        self.errors = []
+
+    def run(self, rows):
+        with transaction.atomic():
+            batch = []
+            for line, data, error in rows:
+                self.rows += 1
+                row = self.validate(line, data, error)
+                if row is not None:
+                    batch.append((line, row))
+                if len(batch) >= self.batch_size:
+                    self.apply(batch)
+                    batch = []
+            if batch:
+                self.apply(batch)
+
+            if self.deactivate_missing and not self.errors:
+                self.deactivated = (
+                    Employee.objects.filter(is_active=True)
+                    .exclude(pk__in=self.seen)
+                    .update(is_active=False, updated_at=timezone.now())
+                )
+
+        invalidate_dashboard_stats()
+        return self.report()
+
+    def report(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'deactivated': self.deactivated,
+            'errors': sorted(self.errors, key=lambda error: error['line']),
+        }
+
+    def error(self, line, errors):
+        if not isinstance(errors, dict):
+            errors = {'non_field_errors': [errors]}
+        self.errors.append({'line': line, 'errors': errors})
+
+    def validate(self, line, data, error):
+        if error:
+            self.error(line, error)
+            return None
+
+        serializer = RosterRowSerializer(data=data, context=self.context)
+        if not serializer.is_valid():
+            self.error(line, serializer.errors)
+            return None
+        row = serializer.validated_data
+
+        keys = {key for key in (row['employee_id'], row['email']) if key}
+        if keys & self.keys:
+            self.error(line, 'Duplicate of an earlier row (same employee_id or email)')
+            return None
+        self.keys |= keys
+        return row
+
+    def apply(self, batch):
+        employee_ids = {row['employee_id'] for _, row in batch if row['employee_id']}
+        emails = {row['email'] for _, row in batch if row['email']}
+        existing = list(Employee.objects.filter(Q(employee_id__in=employee_ids) | Q(email__in=emails)))
+        by_employee_id = {employee.employee_id: employee for employee in existing}
+        by_email = {employee.email: employee for employee in existing if employee.email}
+
+        now = timezone.now()
+        to_create, to_update, matched = [], [], []
+        for line, row in batch:
+            if row['employee_id']:
+                employee = by_employee_id.get(row['employee_id'])
+                if employee is None:
+                    self.error(line, {'employee_id': [f"Unknown employee_id '{row['employee_id']}'"]})
+                    continue
+            else:
+                employee = by_email.get(row['email'])
+
+            owner = by_email.get(row['email'])
+            if owner is not None and owner is not employee:
+                self.error(line, {'email': [f'Already used by {owner.employee_id}']})
+                continue
+
+            values = {field: row[field] for field in SYNC_FIELDS}
+            if employee is None:
+                to_create.append(Employee(is_active=True, **values))
+                continue
+
+            self.seen.add(employee.pk)
+            matched.append(employee.pk)
+            if employee.is_active and not self.changed(employee, values):
+                self.unchanged += 1
+                continue
+            for field, value in values.items():
+                setattr(employee, field, value)
+            employee.is_active = True
+            employee.updated_at = now
+            to_update.append(employee)
+
+        if to_create:
+            created = Employee.objects.bulk_create(to_create)
+            created_ids = [employee.pk for employee in created]
+            matched += created_ids
+            self.seen.update(created_ids)
+            self.created += len(created)
+        if to_update:
+            Employee.objects.bulk_update(to_update, SYNC_FIELDS + ('is_active', 'updated_at'))
+            self.updated += len(to_update)
+        if matched:
+            # New, reactivated and pre-ledger employees; open_year skips those that have one.
+            EmployeeLeaveBalance.open_year(timezone.now().year, employees=Employee.objects.filter(pk__in=matched))
+
+    @staticmethod
+    def changed(employee, values):
+        for field, value in values.items():
+            attname = Employee._meta.get_field(field).attname
+            if getattr(employee, attname) != getattr(value, 'pk', value):
+                return True
+        return False
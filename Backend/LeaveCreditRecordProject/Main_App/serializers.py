@@ -5,6 +5,26 @@ from django.contrib.auth.models import User
 from django.contrib.auth.hashers import make_password
 import re
 from django.core.exceptions import ValidationError
+from django.urls import reverse
+from .fieldsets import FieldSelection
+
+
+class SparseFieldsMixin:
+    """Drops fields not selected by the request's ``?fields=`` / ``?omit=``."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selection = FieldSelection.from_request(self.context.get('request'))
+        if not selection.is_empty:
+            self._trim_fields(self, selection, '')
+
+    def _trim_fields(self, serializer, selection, prefix):
+        for name in list(serializer.fields):
+            path = prefix + name
+            if not selection.wants(path):
+                serializer.fields.pop(name)
+            elif isinstance(serializer.fields[name], serializers.Serializer):
+                self._trim_fields(serializer.fields[name], selection, path + '.')
 
 
 class DepartmentSerializer(serializers.ModelSerializer):
@@ -17,9 +37,13 @@ class DepartmentSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at']
     
     def get_employee_count(self, obj):
+        if hasattr(obj, 'active_employee_count'):
+            return obj.active_employee_count
         return Employee.objects.filter(department=obj, is_active=True).count()
     
     def get_dean_name(self, obj):
+        if hasattr(obj, 'active_dean_name'):
+            return obj.active_dean_name
         dean = Dean.objects.filter(department=obj, is_active=True).first()
         return dean.full_name if dean else None
 
@@ -34,9 +58,19 @@ class PositionSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at']
     
     def get_occupied(self, obj):
+        if hasattr(obj, 'occupant_id'):
+            return obj.occupant_id is not None
         return Employee.objects.filter(position=obj, is_active=True).exists()
     
     def get_occupied_by(self, obj):
+        if hasattr(obj, 'occupant_id'):
+            if obj.occupant_id is None:
+                return None
+            return {
+                'id': obj.occupant_id,
+                'name': obj.occupant_name,
+                'employee_id': obj.occupant_employee_id
+            }
         employee = Employee.objects.filter(position=obj, is_active=True).first()
         if employee:
             return {
@@ -130,7 +164,30 @@ class EmailValidator:
 
         return value
 
-class EmployeeSerializer(serializers.ModelSerializer):
+class EmployeeMeasurementsMixin:
+    def validate_age(self, value):
+        if value < 18:
+            raise serializers.ValidationError("Employee must be at least 18 years old")
+        if value > 100:
+            raise serializers.ValidationError("Please enter a valid age")
+        return value
+    
+    def validate_height(self, value):
+        if value < 100:
+            raise serializers.ValidationError("Height must be at least 100 cm")
+        if value > 250:
+            raise serializers.ValidationError("Height cannot exceed 250 cm")
+        return value
+    
+    def validate_weight(self, value):
+        if value < 30:
+            raise serializers.ValidationError("Weight must be at least 30 kg")
+        if value > 300:
+            raise serializers.ValidationError("Weight cannot exceed 300 kg")
+        return value
+
+
+class EmployeeSerializer(EmployeeMeasurementsMixin, SparseFieldsMixin, serializers.ModelSerializer):
     department_name = serializers.CharField(source='department.name', read_only=True)
     department_code = serializers.CharField(source='department.code', read_only=True)
     position_title = serializers.CharField(source='position.title', read_only=True)
@@ -167,36 +224,59 @@ class EmployeeSerializer(serializers.ModelSerializer):
             return obj.photo.url
         return None
     
-    def validate_age(self, value):
-        if value < 18:
-            raise serializers.ValidationError("Employee must be at least 18 years old")
-        if value > 100:
-            raise serializers.ValidationError("Please enter a valid age")
-        return value
-    
-    def validate_height(self, value):
-        if value < 100:
-            raise serializers.ValidationError("Height must be at least 100 cm")
-        if value > 250:
-            raise serializers.ValidationError("Height cannot exceed 250 cm")
-        return value
-    
-    def validate_weight(self, value):
-        if value < 30:
-            raise serializers.ValidationError("Weight must be at least 30 kg")
-        if value > 300:
-            raise serializers.ValidationError("Weight cannot exceed 300 kg")
-        return value
-    
     def validate_position(self, value):
         return value
     
     def get_remaining_days(self, obj): 
+        if hasattr(obj, 'current_remaining_days'):
+            return obj.current_remaining_days
         current_year = timezone.now().year 
         balance = obj.leave_balances.filter(year=current_year).first() 
         return balance.remaining_days if balance else None
 
 
+class RosterRowSerializer(EmployeeMeasurementsMixin, serializers.Serializer):
+    """
+    One row of a roster import. Department and position are given by code and
+    resolved from the ``departments`` / ``positions`` maps in the context, so
+    validating a row never touches the database.
+    """
+    employee_id = serializers.CharField(required=False, allow_blank=True, default='')
+    full_name = serializers.CharField(max_length=200)
+    email = serializers.EmailField(
+        required=False,
+        allow_blank=True,
+        default='',
+        validators=[EmailValidator().validate_email]
+    )
+    gender = serializers.ChoiceField(choices=Employee.GENDER_CHOICES)
+    age = serializers.IntegerField()
+    height = serializers.DecimalField(max_digits=5, decimal_places=2)
+    weight = serializers.DecimalField(max_digits=5, decimal_places=2)
+    department = serializers.CharField()
+    position = serializers.CharField()
+    motto_in_life = serializers.CharField(required=False, allow_blank=True, default='')
+
+    def validate_department(self, value):
+        try:
+            return self.context['departments'][value.strip().upper()]
+        except KeyError:
+            raise serializers.ValidationError(f"Unknown department code '{value}'")
+
+    def validate_position(self, value):
+        try:
+            return self.context['positions'][value.strip().upper()]
+        except KeyError:
+            raise serializers.ValidationError(f"Unknown position code '{value}'")
+
+    def validate(self, attrs):
+        attrs['employee_id'] = attrs['employee_id'].strip()
+        attrs['email'] = attrs['email'].strip() or None
+        if not attrs['employee_id'] and not attrs['email']:
+            raise serializers.ValidationError("employee_id or email is required to match the employee")
+        return attrs
+
+
 class LeaveApplicationSerializer(serializers.ModelSerializer):
     employee_name = serializers.CharField(source='employee.full_name', read_only=True)
     employee_id_display = serializers.CharField(source='employee.employee_id', read_only=True)
@@ -248,7 +328,7 @@ class LeaveApplicationSerializer(serializers.ModelSerializer):
         
         return data
 
-class LeaveRequestSerializer(serializers.ModelSerializer):
+class LeaveRequestSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     application = LeaveApplicationSerializer(read_only=True)
     dean_reviewer_name = serializers.CharField(source='dean_reviewer.full_name', read_only=True, allow_null=True)
     dean_reviewer_username = serializers.CharField(source='dean_reviewer.user.username', read_only=True, allow_null=True)
@@ -393,7 +473,7 @@ class HRUserSerializer(serializers.ModelSerializer):
         instance.save()
         return instance
 
-class LeaveRequestArchiveSerializer(serializers.ModelSerializer):
+class LeaveRequestArchiveSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     leave_type_display = serializers.CharField(source='get_leave_type_display', read_only=True)
     final_status_display = serializers.CharField(source='get_final_status_display', read_only=True)
 
@@ -411,3 +491,23 @@ class LeaveRequestArchiveSerializer(serializers.ModelSerializer):
             'leave_balance_before', 'leave_balance_after', 'leave_balance_year',
             'archived_at', 'archived_by_system'
         ]
+
+
+class PdfRenderJobSerializer(serializers.ModelSerializer):
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    progress = serializers.FloatField(read_only=True)
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PdfRenderJob
+        fields = [
+            'id', 'status', 'status_display', 'output',
+            'total', 'rendered', 'progress', 'error', 'download_url',
+            'created_at', 'started_at', 'finished_at',
+        ]
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        if obj.status != 'done':
+            return None
+        return reverse('pdf-job-download', args=[obj.pk])
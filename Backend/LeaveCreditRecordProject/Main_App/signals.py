@@ -0,0 +1,21 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Dean, Employee, LeaveRequest
+from .utils import invalidate_dashboard_stats
+
+
+@receiver([post_save, post_delete], sender=Employee)
+@receiver([post_save, post_delete], sender=LeaveRequest)
+def clear_dashboard_stats(sender, **kwargs):
+    invalidate_dashboard_stats()
+
+
+@receiver(post_save, sender=User)
+def touch_dean(sender, instance, created, update_fields=None, **kwargs):
+    # Deans are serialized with their username; bump the row the ETags read.
+    # Logins only save last_login.
+    if not created and (update_fields is None or 'username' in update_fields):
+        Dean.objects.filter(user=instance).update(updated_at=timezone.now())
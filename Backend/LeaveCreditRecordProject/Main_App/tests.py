@@ -1,3 +1,1598 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import zipfile
+from io import BytesIO, StringIO
+from pathlib import Path
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser, Group, User
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.http import JsonResponse
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from reportlab.pdfgen import canvas
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .bulk_export import PdfWriter, merged_pdf, rendered_pdfs
+from .export_views import TEACHING_TEMPLATE, export_osmena_leave_application_pdf_teaching_format, form_values
+from .models import *
+from .renderers import FastJSONRenderer, msgpack, negotiated_response
+from .roles import UserRoles
+
+
+class LeaveDataMixin:
+    """Builds a department with an HR user and a dean, plus bulk leave data on demand."""
+
+    def create_org(self):
+        self.department = Department.objects.create(code='CCS', name='College of Computer Studies')
+        self.position = Position.objects.create(code='INS', title='Instructor')
+
+        hr_user = User.objects.create_user(username='hr', password='secret123')
+        HRUser.objects.create(user=hr_user, full_name='HR Officer')
+        self.hr_user_id = hr_user.id
+
+        dean_user = User.objects.create_user(username='dean', password='secret123')
+        self.dean = Dean.objects.create(user=dean_user, full_name='Dean Cruz', department=self.department)
+        self.dean_user_id = dean_user.id
+
+    def create_employees(self, count, department=None, position=None):
+        department = department or self.department
+        position = position or self.position
+        start = Employee.objects.count()
+        return Employee.objects.bulk_create([
+            Employee(
+                employee_id=f'OC-TEST{start + i:05d}',
+                full_name=f'Employee {start + i}',
+                gender='female',
+                age=30,
+                height=160,
+                weight=55,
+                department=department,
+                position=position,
+            )
+            for i in range(count)
+        ])
+
+    def create_leave_requests(self, count, status='dean_approved', employees=None):
+        employees = employees or self.create_employees(min(count, 25))
+        hr_user = User.objects.get(pk=self.hr_user_id)
+
+        applications = LeaveApplication.objects.bulk_create([
+            LeaveApplication(
+                employee=employees[i % len(employees)],
+                leave_type='vacation',
+                vacation_location='philippines',
+                number_of_days=1,
+                reason=f'Reason {i}',
+            )
+            for i in range(count)
+        ])
+        now = timezone.now()
+        return LeaveRequest.objects.bulk_create([
+            LeaveRequest(
+                application=application,
+                status=status,
+                dean_reviewer=self.dean,
+                dean_reviewed_at=now,
+                hr_reviewer=hr_user if status in ('approved', 'denied') else None,
+                hr_reviewed_at=now if status in ('approved', 'denied') else None,
+            )
+            for application in applications
+        ])
+
+    def create_leave_reports(self, leave_requests):
+        return LeaveReport.objects.bulk_create([
+            LeaveReport(
+                leave_request=leave_request,
+                employee=leave_request.application.employee,
+                leave_type=leave_request.application.leave_type,
+                number_of_days=leave_request.application.number_of_days,
+                location=leave_request.application.vacation_location,
+                date_filed=leave_request.application.date_filed,
+                dean_status='approved',
+                dean_reviewer=leave_request.dean_reviewer,
+                dean_reviewed_at=leave_request.dean_reviewed_at,
+            )
+            for leave_request in leave_requests
+        ])
+
+    def client_for(self, user_id):
+        client = APIClient()
+        client.force_authenticate(User.objects.get(pk=user_id))
+        return client
+
+
+class LeaveRequestQueryCountTests(LeaveDataMixin, TestCase):
+    # Role resolution, the conditional-GET validator aggregate and the list query.
+    LIST_QUERIES = 3
+    # Custom list actions skip the validator.
+    ACTION_QUERIES = 2
+
+    def setUp(self):
+        self.create_org()
+
+    def assert_constant_queries(self, user_id, url, expected):
+        client = self.client_for(user_id)
+        with self.assertNumQueries(expected):
+            response = client.get(url, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_hr_reports_list_is_constant_at_10_rows(self):
+        self.create_leave_requests(10)
+        response = self.assert_constant_queries(
+            self.hr_user_id, '/api/leave-requests/?view=reports', self.LIST_QUERIES
+        )
+        self.assertEqual(len(response.data), 10)
+        self.assertEqual(response.data[0]['application']['department_name'], 'College of Computer Studies')
+        self.assertEqual(response.data[0]['dean_reviewer_username'], 'dean')
+
+    def test_hr_reports_list_is_constant_at_1000_rows(self):
+        self.create_leave_requests(1000)
+        response = self.assert_constant_queries(
+            self.hr_user_id, '/api/leave-requests/?view=reports', self.LIST_QUERIES
+        )
+        self.assertEqual(len(response.data), 1000)
+
+    def test_dean_list_is_constant_at_10_and_1000_rows(self):
+        self.create_leave_requests(10)
+        self.assert_constant_queries(self.dean_user_id, '/api/leave-requests/?view=reports', self.LIST_QUERIES)
+        self.create_leave_requests(990)
+        response = self.assert_constant_queries(
+            self.dean_user_id, '/api/leave-requests/?view=reports', self.LIST_QUERIES
+        )
+        self.assertEqual(len(response.data), 1000)
+
+    def test_pending_hr_and_dean_approved_are_constant(self):
+        for rows in (10, 1000):
+            LeaveRequest.objects.all().delete()
+            self.create_leave_requests(rows)
+            response = self.assert_constant_queries(
+                self.hr_user_id, '/api/leave-requests/pending_hr/', self.ACTION_QUERIES
+            )
+            self.assertEqual(len(response.data['data']), rows)
+            response = self.assert_constant_queries(
+                self.hr_user_id, '/api/leave-requests/dean_approved/', self.ACTION_QUERIES
+            )
+            self.assertEqual(len(response.data['data']), rows)
+
+    def test_pending_dean_is_constant(self):
+        for rows in (10, 1000):
+            LeaveRequest.objects.all().delete()
+            self.create_leave_requests(rows, status='pending')
+            response = self.assert_constant_queries(
+                self.dean_user_id, '/api/leave-requests/pending_dean/?view=requests', self.ACTION_QUERIES
+            )
+            self.assertEqual(len(response.data['data']), rows)
+
+    def test_detail_is_single_query_after_permissions(self):
+        leave_request = self.create_leave_requests(1)[0]
+        self.assert_constant_queries(
+            self.hr_user_id, f'/api/leave-requests/{leave_request.pk}/', self.LIST_QUERIES
+        )
+
+    def test_employee_leave_requests_is_constant(self):
+        employee = self.create_employees(1)[0]
+        for rows in (10, 1000):
+            LeaveRequest.objects.all().delete()
+            self.create_leave_requests(rows, employees=[employee])
+            response = self.assert_constant_queries(
+                self.hr_user_id, f'/api/employees/{employee.employee_id}/leave-requests/', 2
+            )
+            self.assertEqual(len(response.data), rows)
+
+
+class DepartmentListQueryCountTests(LeaveDataMixin, TestCase):
+    def setUp(self):
+        self.create_org()
+
+    def test_department_list_is_a_single_query(self):
+        for i in range(20):
+            department = Department.objects.create(code=f'D{i}', name=f'Department {i}')
+            self.create_employees(3, department=department)
+        inactive = self.create_employees(2)
+        Employee.objects.filter(pk__in=[e.pk for e in inactive]).update(is_active=False)
+        self.create_employees(4)
+
+        with self.assertNumQueries(1):
+            response = APIClient().get('/api/departments/', secure=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 21)
+        ccs = next(d for d in response.data if d['code'] == 'CCS')
+        self.assertEqual(ccs['employee_count'], 4)
+        self.assertEqual(ccs['dean_name'], 'Dean Cruz')
+        other = next(d for d in response.data if d['code'] == 'D0')
+        self.assertEqual(other['employee_count'], 3)
+        self.assertIsNone(other['dean_name'])
+
+
+class PositionOccupancyQueryCountTests(LeaveDataMixin, TestCase):
+    def setUp(self):
+        self.create_org()
+        for i in range(15):
+            Position.objects.create(code=f'P{i}', title=f'Position {i}')
+        self.occupant = self.create_employees(1)[0]
+
+    def test_position_catalog_is_a_single_query(self):
+        for url in ('/api/positions/', '/positions/'):
+            with self.assertNumQueries(1):
+                response = APIClient().get(url, secure=True)
+            self.assertEqual(response.status_code, 200)
+
+        positions = response.json()
+        self.assertEqual(len(positions), 16)
+        instructor = next(p for p in positions if p['code'] == 'INS')
+        self.assertTrue(instructor['occupied'])
+        self.assertEqual(instructor['occupied_by']['employee_id'], self.occupant.employee_id)
+        vacant = next(p for p in positions if p['code'] == 'P0')
+        self.assertFalse(vacant['occupied'])
+        self.assertIsNone(vacant['occupied_by'])
+
+    def test_delete_position_refuses_occupied_position(self):
+        response = APIClient().delete(f'/positions/delete/{self.position.pk}/', secure=True)
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(Position.objects.filter(pk=self.position.pk).exists())
+
+        vacant = Position.objects.get(code='P0')
+        response = APIClient().delete(f'/positions/delete/{vacant.pk}/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Position.objects.filter(pk=vacant.pk).exists())
+
+
+class EmployeeRosterQueryCountTests(LeaveDataMixin, TestCase):
+    def setUp(self):
+        self.create_org()
+
+    def test_roster_of_5000_takes_two_queries(self):
+        employees = self.create_employees(5000)
+        year = timezone.now().year
+        EmployeeLeaveBalance.objects.bulk_create([
+            EmployeeLeaveBalance(employee=employee, year=year, remaining_days=10)
+            for employee in employees[:4000]
+        ] + [
+            EmployeeLeaveBalance(employee=employee, year=year - 1, remaining_days=3)
+            for employee in employees[4000:]
+        ])
+        client = self.client_for(self.hr_user_id)
+
+        # The conditional-GET validator aggregate plus the roster itself.
+        with self.assertNumQueries(2):
+            response = client.get('/api/employees/', secure=True)
+
+        self.assertEqual(len(response.data), 5000)
+        remaining = {row['employee_id']: row['remaining_days'] for row in response.data}
+        self.assertEqual(remaining[employees[0].employee_id], 10)
+        self.assertIsNone(remaining[employees[4500].employee_id])
+
+    def test_department_and_position_rosters_are_constant(self):
+        self.create_employees(200)
+        client = APIClient()
+        for url in (f'/api/departments/{self.department.pk}/employees/',
+                    f'/api/positions/{self.position.pk}/employees/'):
+            with self.assertNumQueries(2):
+                response = client.get(url, secure=True)
+            self.assertEqual(len(response.data), 200)
+            self.assertEqual(response.data[0]['department_name'], 'College of Computer Studies')
+
+
+class LeaveReportQueryCountTests(LeaveDataMixin, TestCase):
+    def setUp(self):
+        self.create_org()
+    def assert_report_queries(self, user_id, url, expected):
+        client = self.client_for(user_id)
+        with self.assertNumQueries(expected):
+            response = client.get(url, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_list_is_constant_at_10_and_1000_rows(self):
+        for rows in (10, 1000):
+            LeaveReport.objects.all().delete()
+            self.create_leave_reports(self.create_leave_requests(rows))
+            for user_id in (self.hr_user_id, self.dean_user_id):
+                # Role resolution, validator aggregate and the report query.
+                response = self.assert_report_queries(user_id, '/api/leave-reports/', 3)
+                self.assertEqual(len(response.data), rows)
+
+        row = response.data[0]
+        self.assertEqual(row['department_name'], 'College of Computer Studies')
+        self.assertEqual(row['position_title'], 'Instructor')
+        self.assertTrue(row['reason'].startswith('Reason'))
+
+    def test_recent_is_constant(self):
+        self.create_leave_reports(self.create_leave_requests(50))
+        for user_id in (self.hr_user_id, self.dean_user_id):
+            response = self.assert_report_queries(user_id, '/api/leave-reports/recent/?limit=25', 2)
+            self.assertEqual(len(response.data['data']), 25)
+
+    def test_dean_dashboard_does_not_grow_with_rows(self):
+        client = self.client_class()
+        client.force_login(User.objects.get(pk=self.dean_user_id))
+
+        counts = []
+        for rows in (10, 200):
+            self.create_leave_reports(self.create_leave_requests(rows))
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.get('/dean_dashboard_data/?limit=200', secure=True)
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(ctx.captured_queries))
+
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(len(response.json()['data']['leave_reports']), 200)
+
+
+class DeanDashboardWindowTests(LeaveDataMixin, TestCase):
+    def setUp(self):
+        self.create_org()
+        self.requests = self.create_leave_requests(120, status='pending')
+        self.client.force_login(User.objects.get(pk=self.dean_user_id))
+
+    def get(self, query=''):
+        response = self.client.get(f'/dean_dashboard_data/{query}', secure=True)
+        return response.status_code, response.json()
+
+    def test_sections_are_paged_with_cursors(self):
+        status_code, body = self.get('?sections=leave_requests&limit=50')
+        self.assertEqual(status_code, 200)
+        self.assertNotIn('faculty', body['data'])
+
+        seen = [row['id'] for row in body['data']['leave_requests']]
+        cursor = body['data']['cursors']['leave_requests']
+        while cursor:
+            status_code, body = self.get(f'?sections=leave_requests&limit=50&leave_requests_cursor={cursor}')
+            seen += [row['id'] for row in body['data']['leave_requests']]
+            cursor = body['data']['cursors']['leave_requests']
+
+        self.assertEqual(len(seen), 120)
+        self.assertEqual(len(set(seen)), 120)
+
+    def test_summary_mode_returns_counts_only(self):
+        status_code, body = self.get('?summary=1')
+        self.assertEqual(status_code, 200)
+        summary = body['data']['summary']
+        self.assertEqual(summary['leave_requests']['pending'], 120)
+        self.assertEqual(summary['leave_requests_total'], 120)
+        self.assertEqual(summary['faculty_count'], 25)
+        self.assertNotIn('leave_requests', body['data'])
+
+    def test_date_window_filters_requests(self):
+        old = self.requests[:20]
+        LeaveRequest.objects.filter(pk__in=[r.pk for r in old]).update(
+            created_at=timezone.now() - timedelta(days=400)
+        )
+        since = (timezone.now() - timedelta(days=30)).date().isoformat()
+        status_code, body = self.get(f'?summary=1&since={since}')
+        self.assertEqual(body['data']['summary']['leave_requests_total'], 100)
+
+    def test_invalid_parameters_are_rejected(self):
+        for query in ('?limit=abc', '?since=yesterday', '?sections=salaries', '?leave_requests_cursor=zzz'):
+            status_code, body = self.get(query)
+            self.assertEqual(status_code, 400, query)
+            self.assertFalse(body['success'])
+
+
+class DashboardStatsTests(LeaveDataMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.create_org()
+        for i in range(10):
+            department = Department.objects.create(code=f'D{i}', name=f'Department {i}')
+            self.create_employees(2, department=department)
+        self.create_leave_requests(5, status='pending')
+        self.create_leave_requests(3, status='approved')
+        self.create_leave_requests(2, status='denied')
+
+    def test_stats_take_two_queries_then_come_from_cache(self):
+        with self.assertNumQueries(2):
+            response = APIClient().get('/api/dashboard-stats/', secure=True)
+
+        self.assertEqual(response.data['total_employees'], Employee.objects.filter(is_active=True).count())
+        self.assertEqual(response.data['inactive_employees'], 0)
+        self.assertEqual(response.data['pending_leaves'], 5)
+        self.assertEqual(response.data['approved_leaves'], 3)
+        self.assertEqual(response.data['denied_leaves'], 2)
+        self.assertEqual(len(response.data['departments']), 11)
+
+        with self.assertNumQueries(0):
+            cached = APIClient().get('/api/dashboard-stats/', secure=True)
+        self.assertEqual(cached.data, response.data)
+
+    def test_employee_and_leave_request_changes_invalidate_cache(self):
+        APIClient().get('/api/dashboard-stats/', secure=True)
+
+        employee = Employee.objects.first()
+        employee.is_active = False
+        employee.save()
+        response = APIClient().get('/api/dashboard-stats/', secure=True)
+        self.assertEqual(response.data['inactive_employees'], 1)
+
+        leave_request = LeaveRequest.objects.filter(status='pending').first()
+        leave_request.delete()
+        response = APIClient().get('/api/dashboard-stats/', secure=True)
+        self.assertEqual(response.data['pending_leaves'], 4)
+
+    def test_review_transitions_invalidate_cache(self):
+        APIClient().get('/api/dashboard-stats/', secure=True)
+        leave_request = LeaveRequest.objects.with_related().filter(status='pending').first()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            leave_request.dean_approve(self.dean)
+        response = APIClient().get('/api/dashboard-stats/', secure=True)
+        self.assertEqual(response.data['pending_leaves'], 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            leave_request.hr_approve(User.objects.get(pk=self.hr_user_id))
+        response = APIClient().get('/api/dashboard-stats/', secure=True)
+        self.assertEqual(response.data['approved_leaves'], 4)
+
+
+class UserRolesTests(LeaveDataMixin, TestCase):
+    def setUp(self):
+        self.create_org()
+
+    def test_roles_load_in_one_query_and_prime_profile_caches(self):
+        user = User.objects.get(pk=self.dean_user_id)
+        with self.assertNumQueries(1):
+            roles = UserRoles.load(user)
+            self.assertTrue(roles.is_dean)
+            self.assertFalse(roles.is_hr)
+            self.assertFalse(roles.has_hr_access)
+            self.assertEqual(roles.dean.department.code, 'CCS')
+            self.assertFalse(hasattr(user, 'hruser'))
+            self.assertEqual(user.dean_profile, roles.dean)
+
+    def test_hr_group_membership_grants_hr_access(self):
+        user = User.objects.create_user(username='clerk', password='secret123')
+        user.groups.add(Group.objects.create(name='HR'))
+        roles = UserRoles.load(User.objects.get(pk=user.pk))
+        self.assertTrue(roles.in_hr_group)
+        self.assertTrue(roles.has_hr_access)
+        self.assertFalse(roles.is_hr)
+
+    def test_anonymous_user_has_no_roles(self):
+        with self.assertNumQueries(0):
+            roles = UserRoles.load(AnonymousUser())
+        self.assertFalse(roles.is_hr or roles.is_dean or roles.has_hr_access)
+
+
+class KeysetPaginationTests(LeaveDataMixin, TestCase):
+    def setUp(self):
+        self.create_org()
+        self.client = self.client_for(self.hr_user_id)
+
+    def collect(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url, secure=True)
+            self.assertEqual(response.status_code, 200)
+            ids += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+        return ids
+
+    def test_leave_requests_page_through_every_row_once(self):
+        created = self.create_leave_requests(130)
+        # Force timestamp ties so the id tiebreaker is exercised.
+        LeaveRequest.objects.update(created_at=timezone.now())
+
+        ids = self.collect('/api/leave-requests/?view=reports&page_size=40')
+
+        self.assertEqual(sorted(ids), sorted(r.pk for r in created))
+        self.assertEqual(ids, sorted(ids, reverse=True))
+
+    def test_deep_pages_cost_the_same_queries(self):
+        self.create_leave_requests(300)
+        first = self.client.get('/api/leave-requests/?view=reports&page_size=50', secure=True)
+        cursor_url = first.data['next']
+        for _ in range(3):
+            cursor_url = self.client.get(cursor_url, secure=True).data['next']
+
+        client = self.client_for(self.hr_user_id)
+        with self.assertNumQueries(3):
+            response = client.get(cursor_url, secure=True)
+        self.assertEqual(len(response.data['results']), 50)
+
+    def test_unpaginated_mode_is_kept_for_legacy_clients(self):
+        self.create_leave_requests(60)
+        response = self.client.get('/api/leave-requests/?view=reports', secure=True)
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 60)
+
+    def test_page_size_is_capped(self):
+        self.create_employees(250)
+        response = self.client.get('/api/employees/?page_size=1000', secure=True)
+        self.assertEqual(len(response.data['results']), 200)
+        self.assertEqual(len(self.collect('/api/employees/?page_size=1000')), 250)
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get('/api/leave-reports/?cursor=bogus', secure=True)
+        self.assertEqual(response.status_code, 404)
+
+    def test_archives_by_employee_are_paginated(self):
+        now = timezone.now()
+        LeaveRequestArchive.objects.bulk_create([
+            LeaveRequestArchive(
+                original_leave_request_id=i,
+                original_leave_application_id=i,
+                employee_id='OC-20240001',
+                employee_name='Employee',
+                employee_department=self.department.name,
+                employee_position=self.position.title,
+                leave_type='sick',
+                number_of_days=1,
+                date_filed=now.date(),
+                dean_name='Dean Cruz',
+                dean_department=self.department.name,
+                dean_reviewed_at=now,
+                hr_reviewer_username='hr',
+                hr_reviewer_name='HR Officer',
+                hr_reviewed_at=now,
+                final_status='approved',
+                leave_balance_before=15,
+                leave_balance_year=now.year,
+            )
+            for i in range(75)
+        ])
+        ids = self.collect('/api/leave-request-archives/by-employee/OC-20240001/?page_size=20')
+        self.assertEqual(len(set(ids)), 75)
+
+
+class ConditionalGetTests(LeaveDataMixin, TestCase):
+    def setUp(self):
+        self.create_org()
+        self.requests = self.create_leave_requests(20)
+
+    def test_unchanged_list_answers_304_with_one_aggregate(self):
+        client = self.client_for(self.hr_user_id)
+        response = client.get('/api/leave-requests/?view=reports', secure=True)
+        etag = response['ETag']
+        self.assertNotIn('Last-Modified', response)
+
+        client = self.client_for(self.hr_user_id)
+        # Role resolution plus the validator aggregate; nothing is serialized.
+        with self.assertNumQueries(2):
+            response = client.get('/api/leave-requests/?view=reports', secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_and_deletes_produce_a_new_etag(self):
+        client = self.client_for(self.hr_user_id)
+        etag = client.get('/api/leave-requests/?view=reports', secure=True)['ETag']
+
+        self.requests[0].delete()
+        response = client.get('/api/leave-requests/?view=reports', secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        leave_request = LeaveRequest.objects.get(pk=self.requests[1].pk)
+        leave_request.hr_comments = 'Checked'
+        leave_request.save()
+        response = client.get('/api/leave-requests/?view=reports', secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_supports_if_modified_since(self):
+        client = self.client_for(self.hr_user_id)
+        url = f'/api/leave-requests/{self.requests[0].pk}/'
+        last_modified = client.get(url, secure=True)['Last-Modified']
+
+        response = client.get(url, secure=True, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_employee_balance_change_invalidates_roster(self):
+        employee = Employee.objects.first()
+        EmployeeLeaveBalance.open_year(timezone.now().year, employees=Employee.objects.filter(pk=employee.pk))
+        client = self.client_for(self.hr_user_id)
+        etag = client.get('/api/employees/', secure=True)['ETag']
+
+        EmployeeLeaveBalance.deduct(employee.pk, timezone.now().year, 3)
+        response = client.get('/api/employees/', secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def assert_changes(self, url, change):
+        client = self.client_for(self.hr_user_id)
+        etag = client.get(url, secure=True)['ETag']
+        change()
+        response = client.get(url, secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200, url)
+        self.assertNotIn('Last-Modified', response)
+
+    def test_offsetting_balances_and_related_renames_invalidate_lists(self):
+        first, second = self.create_employees(2)
+        year = timezone.now().year
+        EmployeeLeaveBalance.open_year(year, employees=Employee.objects.filter(pk__in=[first.pk, second.pk]))
+
+        def offset_balances():
+            EmployeeLeaveBalance.deduct(first.pk, year, 1)
+            EmployeeLeaveBalance.apply(second.pk, year, 1, 'adjust')
+
+        def rename(obj, **fields):
+            def change():
+                for field, value in fields.items():
+                    setattr(obj, field, value)
+                obj.save()
+            return change
+
+        application = LeaveApplication.objects.get(pk=self.requests[0].application_id)
+        for url, change in (
+            ('/api/employees/', offset_balances),
+            ('/api/employees/', rename(self.department, name='College of Computing')),
+            ('/api/deans/', rename(self.department, name='College of Informatics')),
+            ('/api/deans/', rename(self.dean.user, username='dean.cruz')),
+            ('/api/leave-requests/', rename(self.position, title='Assistant Professor')),
+            ('/api/leave-requests/', rename(self.dean, full_name='Dean Reyes')),
+            ('/api/leave-requests/', rename(application, reason='Medical check-up')),
+            ('/api/leave-requests/', lambda: LeaveRequest.objects.filter(pk=self.requests[-1].pk).delete()),
+        ):
+            self.assert_changes(url, change)
+
+    def test_paginated_validator_reads_only_the_page(self):
+        self.create_leave_requests(200)
+        client = self.client_for(self.hr_user_id)
+        cursor_url = client.get('/api/leave-requests/?view=reports&page_size=5', secure=True).data['next']
+        for _ in range(20):
+            cursor_url = client.get(cursor_url, secure=True).data['next']
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(cursor_url, secure=True)
+        self.assertEqual(len(response.data['results']), 5)
+        validator, = [query['sql'] for query in ctx.captured_queries if 'COUNT(' in query['sql']]
+        # The keyset slice of the page plus the row that decides the next link.
+        self.assertIn('LIMIT 6', validator)
+
+        etag = response['ETag']
+        LeaveRequest.objects.filter(pk=self.requests[0].pk).update(hr_comments='Elsewhere', updated_at=timezone.now())
+        self.assertEqual(client.get(cursor_url, secure=True, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        page_row = response.data['results'][0]['id']
+        LeaveRequest.objects.filter(pk=page_row).update(hr_comments='Here', updated_at=timezone.now())
+        self.assertEqual(client.get(cursor_url, secure=True, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class SparseFieldsetTests(LeaveDataMixin, TestCase):
+    def setUp(self):
+        self.create_org()
+        self.create_leave_requests(5)
+        self.client = self.client_for(self.hr_user_id)
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response.data, ctx.captured_queries[-1]['sql']
+
+    def test_fields_limits_output_and_joins(self):
+        data, sql = self.get('/api/leave-requests/?view=reports&fields=id,status,status_display')
+        self.assertEqual(set(data[0]), {'id', 'status', 'status_display'})
+        self.assertNotIn('JOIN', sql)
+
+    def test_dotted_fields_reach_into_nested_application(self):
+        data, sql = self.get('/api/leave-requests/?view=reports&fields=id,application.reason')
+        self.assertEqual(set(data[0]), {'id', 'application'})
+        self.assertEqual(set(data[0]['application']), {'reason'})
+        self.assertIn('Main_App_leaveapplication', sql)
+        self.assertNotIn('Main_App_employee', sql)
+
+    def test_omit_skips_fields_and_their_relations(self):
+        data, sql = self.get('/api/leave-requests/?view=reports&omit=application,dean_reviewer_username,hr_reviewer_name')
+        self.assertNotIn('application', data[0])
+        self.assertNotIn('dean_reviewer_username', data[0])
+        self.assertIn('dean_reviewer_name', data[0])
+        self.assertIn('Main_App_dean', sql)
+        self.assertNotIn('Main_App_leaveapplication', sql)
+        self.assertNotIn('auth_user', sql)
+
+    def test_employee_fields_skip_balance_subquery(self):
+        data, sql = self.get('/api/employees/?fields=employee_id,full_name')
+        self.assertEqual(set(data[0]), {'employee_id', 'full_name'})
+        self.assertNotIn('leavebalance', sql)
+        self.assertNotIn('JOIN', sql)
+
+    def test_writes_ignore_field_selection(self):
+        employee = Employee.objects.first()
+        response = self.client.patch(
+            f'/api/employees/{employee.pk}/?fields=id', {'motto_in_life': 'Carpe diem'}, secure=True
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('department_name', response.data['data'])
+
+
+class RendererTests(LeaveDataMixin, TestCase):
+    def setUp(self):
+        self.create_org()
+        self.create_leave_requests(10)
+        self.client = self.client_for(self.hr_user_id)
+
+    def test_fast_json_matches_stock_renderer(self):
+        response = self.client.get('/api/leave-requests/?view=reports', secure=True)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+        data = {'height': Decimal('165.50'), 'line': 'a\u2028b', 1: None}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_raw_datetimes_match_stock_encoders(self):
+        moment = timezone.now().replace(microsecond=123456)
+        data = {'at': moment, 'naive': datetime(2024, 5, 1, 8, 30, 0, 654321), 'day': moment.date(),
+                'time': moment.time(), 'local': timezone.localtime(moment, timezone.get_fixed_timezone(480))}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+        request = RequestFactory().get('/')
+        self.assertEqual(json.loads(negotiated_response(request, data).content), json.loads(JsonResponse(data).content))
+
+    @skipIf(msgpack is None, 'msgpack is not installed')
+    def test_accept_msgpack_negotiates_binary_body(self):
+        json_response = self.client.get('/api/leave-requests/?view=reports', secure=True)
+        response = self.client.get(
+            '/api/leave-requests/?view=reports', secure=True, HTTP_ACCEPT='application/msgpack'
+        )
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), json.loads(json_response.content))
+        self.assertIn('Accept', response['Vary'])
+        self.assertNotEqual(response['ETag'], json_response['ETag'])
+
+    @skipIf(msgpack is None, 'msgpack is not installed')
+    def test_dean_dashboard_negotiates_msgpack(self):
+        Dean.objects.filter(pk=self.dean.pk).update(height=Decimal('170.50'))
+        self.client.force_login(User.objects.get(pk=self.dean_user_id))
+
+        body = self.client.get('/dean_dashboard_data/', secure=True).json()
+        self.assertEqual(body['data']['dean']['height'], '170.50')
+
+        response = self.client.get('/dean_dashboard_data/', secure=True, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content, strict_map_key=False), body)
+
+
+class EmployeeIdSequenceTests(LeaveDataMixin, TestCase):
+    def setUp(self):
+        self.create_org()
+        self.year = timezone.now().year
+
+    def new_employee(self, **kwargs):
+        return Employee(
+            full_name='New Hire', gender='male', age=28, height=170, weight=65,
+            department=self.department, position=self.position, **kwargs
+        )
+
+    def test_save_allocates_consecutive_ids(self):
+        first = self.new_employee()
+        first.save()
+        second = self.new_employee()
+        second.save()
+        self.assertEqual(first.employee_id, f'OC-{self.year}0001')
+        self.assertEqual(second.employee_id, f'OC-{self.year}0002')
+
+    def test_sequence_continues_after_existing_ids(self):
+        self.new_employee(employee_id=f'OC-{self.year}0041').save()
+        self.new_employee(employee_id=f'OC-{self.year}0007').save()
+        employee = self.new_employee()
+        employee.save()
+        self.assertEqual(employee.employee_id, f'OC-{self.year}0042')
+
+    def test_allocation_cost_does_not_grow_with_table_size(self):
+        self.new_employee().save()
+        self.create_employees(300)
+        # The sequence UPDATE ... RETURNING and the INSERT.
+        with self.assertNumQueries(2):
+            self.new_employee().save()
+
+    def test_bulk_create_reserves_a_block(self):
+        EmployeeIdSequence.objects.create(year=self.year, last_number=9998)
+        with CaptureQueriesContext(connection) as ctx:
+            employees = Employee.objects.bulk_create([self.new_employee() for _ in range(3)])
+        self.assertEqual(
+            [employee.employee_id for employee in employees],
+            [f'OC-{self.year}9999', f'OC-{self.year}10000', f'OC-{self.year}10001'],
+        )
+        updates = [query for query in ctx.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+
+
+class RosterImportTests(LeaveDataMixin, TestCase):
+    HEADER = 'employee_id,full_name,email,gender,age,height,weight,department,position\n'
+
+    def setUp(self):
+        self.create_org()
+        self.client = self.client_for(self.hr_user_id)
+
+    def upload(self, name, content, **data):
+        roster = SimpleUploadedFile(name, content.encode(), content_type='application/octet-stream')
+        return self.client.post('/api/employees/import/', {'file': roster, **data}, format='multipart', secure=True)
+
+    def csv_rows(self, count, start=0):
+        return ''.join(
+            f',Faculty {i},faculty{i}@gmail.com,female,30,160,55,ccs,INS\n'
+            for i in range(start, start + count)
+        )
+
+    def test_csv_creates_then_updates_by_email(self):
+        response = self.upload('roster.csv', self.HEADER + self.csv_rows(3))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['success'])
+        self.assertEqual(response.data['data']['created'], 3)
+        self.assertTrue(all(employee.employee_id.startswith('OC-') for employee in Employee.objects.all()))
+
+        content = self.HEADER + self.csv_rows(3).replace('Faculty 1,', 'Faculty One,')
+        report = self.upload('roster.csv', content).data['data']
+        self.assertEqual((report['created'], report['updated'], report['unchanged']), (0, 1, 2))
+        self.assertTrue(Employee.objects.filter(full_name='Faculty One').exists())
+
+    def test_jsonl_matches_by_employee_id(self):
+        employee = self.create_employees(1)[0]
+        rows = [
+            {'employee_id': employee.employee_id, 'full_name': 'Renamed', 'gender': 'male', 'age': 40,
+             'height': '170.5', 'weight': 70, 'department': 'CCS', 'position': 'INS'},
+            {'employee_id': 'OC-NOPE', 'full_name': 'Ghost', 'gender': 'male', 'age': 40,
+             'height': 170, 'weight': 70, 'department': 'CCS', 'position': 'INS'},
+        ]
+        content = '\n'.join(json.dumps(row) for row in rows) + '\nnot json\n'
+        report = self.upload('roster.jsonl', content).data['data']
+
+        self.assertEqual(report['updated'], 1)
+        self.assertEqual([error['line'] for error in report['errors']], [2, 3])
+        employee.refresh_from_db()
+        self.assertEqual((employee.full_name, employee.height), ('Renamed', Decimal('170.50')))
+
+    def test_row_errors_are_reported_per_line(self):
+        content = self.HEADER + self.csv_rows(1) + ',Too Young,young@gmail.com,female,12,160,55,CCS,INS\n' \
+            + ',Lost,lost@gmail.com,female,30,160,55,XYZ,INS\n' + self.csv_rows(1)
+        response = self.upload('roster.csv', content)
+
+        self.assertFalse(response.data['success'])
+        errors = {error['line']: error['errors'] for error in response.data['data']['errors']}
+        self.assertEqual(set(errors), {3, 4, 5})
+        self.assertIn('age', errors[3])
+        self.assertIn('department', errors[4])
+        self.assertEqual(response.data['data']['created'], 1)
+
+    def test_deactivate_missing_only_when_every_row_is_valid(self):
+        stale = self.create_employees(2)
+        self.upload('roster.csv', self.HEADER + self.csv_rows(2) + ',Bad,,female,30,160,55,CCS,INS\n',
+                    deactivate_missing='true')
+        self.assertEqual(Employee.objects.filter(is_active=True).count(), 4)
+
+        report = self.upload('roster.csv', self.HEADER + self.csv_rows(2), deactivate_missing='true').data['data']
+        self.assertEqual(report['deactivated'], 2)
+        self.assertFalse(Employee.objects.filter(pk__in=[e.pk for e in stale], is_active=True).exists())
+
+    def test_rows_are_written_in_batches(self):
+        self.upload('roster.csv', self.HEADER + self.csv_rows(20))
+        content = self.HEADER + self.csv_rows(20).replace('Faculty', 'Prof') + self.csv_rows(300, start=20)
+        with CaptureQueriesContext(connection) as ctx:
+            report = self.upload('roster.csv', content).data['data']
+        self.assertEqual((report['created'], report['updated']), (300, 20))
+        self.assertLess(len(ctx), 20)
+
+    def test_requires_hr(self):
+        client = self.client_for(self.dean_user_id)
+        roster = SimpleUploadedFile('roster.csv', self.HEADER.encode())
+        response = client.post('/api/employees/import/', {'file': roster}, format='multipart', secure=True)
+        self.assertEqual(response.status_code, 403)
+
+
+class BatchArchiveTests(LeaveDataMixin, TestCase):
+    URL = '/api/leave-requests/archive_all_processed/'
+
+    def setUp(self):
+        self.create_org()
+        self.client = self.client_for(self.hr_user_id)
+
+    def test_archives_each_processed_request_once(self):
+        approved = self.create_leave_requests(30, status='approved')
+        self.create_leave_requests(5, status='denied', employees=[approved[0].application.employee])
+        self.create_leave_requests(4, status='pending')
+
+        response = self.client.post(self.URL, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['archived_count'], 35)
+        self.assertEqual(LeaveRequestArchive.objects.count(), 35)
+        self.assertEqual(LeaveRequest.objects.filter(is_archived=True).count(), 35)
+
+        response = self.client.post(self.URL, secure=True)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(LeaveRequestArchive.objects.count(), 35)
+
+    def test_query_count_is_per_chunk_not_per_request(self):
+        leave_requests = self.create_leave_requests(40, status='approved')
+        with CaptureQueriesContext(connection) as few:
+            LeaveRequestArchive.archive_processed(
+                LeaveRequest.objects.filter(pk__in=[leave_request.pk for leave_request in leave_requests[:10]])
+            )
+        with CaptureQueriesContext(connection) as many:
+            LeaveRequestArchive.archive_processed(LeaveRequest.objects.all())
+        self.assertEqual(len(few), len(many))
+
+    def test_existing_archives_are_not_duplicated(self):
+        leave_requests = self.create_leave_requests(3, status='approved')
+        earlier = LeaveRequestArchive.archive_leave_request(
+            LeaveRequest.objects.with_related().get(pk=leave_requests[0].pk)
+        )
+
+        archive_ids = LeaveRequestArchive.archive_processed(LeaveRequest.objects.all(), chunk_size=2)
+        self.assertEqual(len(archive_ids), 3)
+        self.assertIn(earlier.id, archive_ids)
+        self.assertEqual(LeaveRequestArchive.objects.filter(original_leave_request_id=leave_requests[0].pk).count(), 1)
+
+
+class AutoArchiveTests(LeaveDataMixin, TestCase):
+    def setUp(self):
+        self.create_org()
+
+    def run_archiver(self, **options):
+        call_command('auto_archive', settle_seconds=0, stdout=StringIO(), **options)
+
+    def test_archives_only_requests_finalized_since_last_run(self):
+        self.create_leave_requests(12, status='approved')
+        self.create_leave_requests(3, status='dean_approved')
+        self.run_archiver(batch_size=5)
+        self.assertEqual(LeaveRequest.objects.filter(is_archived=True).count(), 12)
+        self.assertEqual(LeaveRequestArchive.objects.count(), 12)
+
+        watermark = Watermark.objects.get(name='auto_archive')
+        newest = LeaveRequest.objects.filter(is_archived=True).latest('hr_reviewed_at', 'id')
+        self.assertEqual(watermark.last_id, newest.id)
+
+        LeaveRequest.objects.filter(status='dean_approved').update(
+            status='denied', hr_reviewer_id=self.hr_user_id, hr_reviewed_at=timezone.now()
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            self.run_archiver()
+        self.assertEqual(LeaveRequestArchive.objects.count(), 15)
+        scans = [query['sql'] for query in ctx.captured_queries if 'hr_reviewed_at" >' in query['sql']]
+        self.assertTrue(scans)
+
+    def test_requests_within_settle_window_wait_for_next_run(self):
+        self.create_leave_requests(2, status='approved')
+        call_command('auto_archive', stdout=StringIO())
+        self.assertEqual(LeaveRequestArchive.objects.count(), 0)
+        self.run_archiver()
+        self.assertEqual(LeaveRequestArchive.objects.count(), 2)
+
+
+class LeaveBalanceLedgerTests(LeaveDataMixin, TestCase):
+    def setUp(self):
+        self.create_org()
+        self.employee = self.create_employees(1)[0]
+        self.year = timezone.now().year
+        EmployeeLeaveBalance.open_year(self.year)
+        self.balance = EmployeeLeaveBalance.objects.get(employee=self.employee, year=self.year)
+
+    def submit(self, days):
+        return APIClient().post('/api/leave-applications/', {
+            'employee': self.employee.id,
+            'leave_type': 'vacation',
+            'vacation_location': 'philippines',
+            'number_of_days': days,
+            'reason': 'Rest',
+        }, format='json', secure=True)
+
+    def test_stale_instances_do_not_lose_updates(self):
+        first = EmployeeLeaveBalance.objects.get(pk=self.balance.pk)
+        second = EmployeeLeaveBalance.objects.get(pk=self.balance.pk)
+        first.deduct_days(4)
+        second.deduct_days(5)
+        self.balance.refresh_from_db()
+        self.assertEqual(self.balance.remaining_days, 6)
+        self.assertEqual(second.remaining_days, 6)
+
+    def test_overdraw_changes_nothing(self):
+        EmployeeLeaveBalance.deduct(self.employee.id, self.year, 10)
+        with self.assertRaises(InsufficientLeaveBalance) as raised:
+            EmployeeLeaveBalance.deduct(self.employee.id, self.year, 6)
+        self.assertEqual(raised.exception.remaining_days, 5)
+        self.balance.refresh_from_db()
+        self.assertEqual(self.balance.remaining_days, 5)
+        self.assertEqual(self.balance.transactions.count(), 2)
+
+    def test_ledger_sums_to_balance(self):
+        self.assertEqual(self.submit(3).status_code, 201)
+        self.assertEqual(self.submit(2).data['remaining_days'], 10)
+        leave_request = LeaveRequest.objects.with_related().first()
+        response = self.client_for(self.dean_user_id).post(
+            f'/api/leave-requests/{leave_request.pk}/dean_deny/', {'comments': 'No'}, secure=True
+        )
+        self.assertEqual(response.status_code, 200)
+
+        self.balance.refresh_from_db()
+        ledger = list(self.balance.transactions.order_by('id').values_list('kind', 'days'))
+        self.assertEqual([kind for kind, _ in ledger], ['grant', 'deduct', 'deduct', 'restore'])
+        self.assertEqual(sum(days for _, days in ledger), self.balance.remaining_days)
+        self.assertEqual(self.balance.transactions.first().leave_application, leave_request.application)
+
+    def test_denial_and_cancellation_refund_the_year_charged(self):
+        previous = EmployeeLeaveBalance.open_year(self.year - 1)[0]
+        applications = []
+        for days in (3, 2):
+            application = LeaveApplication.objects.create(
+                employee=self.employee, leave_type='vacation', vacation_location='philippines', number_of_days=days
+            )
+            LeaveApplication.objects.filter(pk=application.pk).update(date_filed=date(self.year - 1, 12, 20))
+            EmployeeLeaveBalance.deduct(self.employee.id, self.year - 1, days, application)
+            applications.append(application)
+        leave_request = LeaveRequest.objects.create(application=applications[0])
+
+        response = self.client_for(self.dean_user_id).post(
+            f'/api/leave-requests/{leave_request.pk}/dean_deny/', {'comments': 'No'}, secure=True
+        )
+        self.assertEqual(response.status_code, 200)
+        previous.refresh_from_db()
+        self.assertEqual(previous.remaining_days, 13)
+
+        response = APIClient().delete(f'/api/leave-applications/{applications[1].pk}/', secure=True)
+        self.assertEqual(response.status_code, 204)
+        previous.refresh_from_db()
+        self.assertEqual(previous.remaining_days, 15)
+        self.balance.refresh_from_db()
+        self.assertEqual(self.balance.remaining_days, 15)
+        self.assertFalse(self.balance.transactions.filter(kind='restore').exists())
+
+    def test_restore_never_exceeds_the_grant(self):
+        leave_request = self.create_leave_requests(1, status='pending', employees=[self.employee])[0]
+        EmployeeLeaveBalance.deduct(self.employee.id, self.year, 1)
+        self.assertEqual(EmployeeLeaveBalance.restore(leave_request.application), 15)
+        self.assertEqual(EmployeeLeaveBalance.restore(leave_request.application), 15)
+
+    def test_insufficient_submission_is_rolled_back(self):
+        EmployeeLeaveBalance.deduct(self.employee.id, self.year, 14)
+        response = self.submit(2)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('only have 1 days', response.data['message'])
+        self.assertFalse(LeaveApplication.objects.exists())
+
+
+class YearRolloverTests(LeaveDataMixin, TestCase):
+    def setUp(self):
+        self.create_org()
+        self.employees = self.create_employees(30)
+        self.year = timezone.now().year
+        EmployeeLeaveBalance.open_year(self.year)
+        EmployeeLeaveBalance.objects.filter(employee=self.employees[0]).update(remaining_days=2)
+        Employee.objects.filter(pk=self.employees[-1].pk).update(is_active=False)
+
+    def rollover(self, *args):
+        out = StringIO()
+        call_command('rollover_leave_balances', *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_reports_without_writing(self):
+        out = self.rollover('--carry-over', '5', '--dry-run')
+        self.assertIn(f'Would create 29 leave balance(s) for {self.year + 1} (29 with carry-over)', out)
+        self.assertIn(f'{self.employees[0].employee_id}: 17 days (2 carried over)', out)
+        self.assertFalse(EmployeeLeaveBalance.objects.filter(year=self.year + 1).exists())
+
+    def test_rollover_is_set_based_and_idempotent(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.rollover('--carry-over', '5')
+        self.assertLess(len(ctx), 10)
+
+        balances = dict(EmployeeLeaveBalance.objects.filter(year=self.year + 1).values_list('employee_id', 'remaining_days'))
+        self.assertEqual(len(balances), 29)
+        self.assertEqual(balances[self.employees[0].pk], 17)
+        self.assertEqual(balances[self.employees[1].pk], 20)
+        balance = EmployeeLeaveBalance.objects.get(employee=self.employees[1], year=self.year + 1)
+        self.assertEqual(sum(balance.transactions.values_list('days', flat=True)), 20)
+
+        self.assertIn('Created 0 leave balance(s)', self.rollover())
+
+    def test_missing_balance_is_an_error_on_request_paths(self):
+        EmployeeLeaveBalance.objects.filter(employee=self.employees[1]).delete()
+        response = APIClient().post('/api/employees/verify-employee/', {
+            'employee_id': self.employees[1].employee_id
+        }, format='json', secure=True)
+        self.assertEqual(response.status_code, 409)
+
+        response = APIClient().post('/api/leave-applications/', {
+            'employee': self.employees[1].id, 'leave_type': 'sick', 'sick_location': 'home', 'number_of_days': 1,
+        }, format='json', secure=True)
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(EmployeeLeaveBalance.objects.filter(employee=self.employees[1]).exists())
+        self.assertFalse(LeaveApplication.objects.exists())
+
+
+    def test_reactivation_opens_the_current_year(self):
+        inactive = self.employees[-1]
+        response = self.client_for(self.hr_user_id).post(f'/api/employees/{inactive.pk}/activate/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(EmployeeLeaveBalance.objects.filter(employee=inactive, year=self.year).exists())
+
+        EmployeeLeaveBalance.objects.filter(employee__in=self.employees[:2]).delete()
+        Employee.objects.filter(pk=self.employees[0].pk).update(is_active=False)
+        rows = [{'employee_id': e.employee_id, 'full_name': e.full_name, 'gender': 'female', 'age': 30,
+                 'height': 160, 'weight': 55, 'department': 'CCS', 'position': 'INS'} for e in self.employees[:2]]
+        roster = SimpleUploadedFile('roster.jsonl', '\n'.join(json.dumps(row) for row in rows).encode())
+        response = self.client_for(self.hr_user_id).post(
+            '/api/employees/import/', {'file': roster}, format='multipart', secure=True
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            EmployeeLeaveBalance.objects.filter(employee__in=self.employees[:2], year=self.year).count(), 2
+        )
+
+    def test_missing_balances_are_reported_on_deploy(self):
+        from django.core.checks import run_checks
+
+        self.assertEqual([m.id for m in run_checks(databases=['default'])], [])
+        EmployeeLeaveBalance.objects.filter(employee=self.employees[1]).delete()
+        warning, = [m for m in run_checks(databases=['default']) if m.id == 'Main_App.W001']
+        self.assertIn(f'--year {self.year}', warning.hint)
+
+
+class WorkflowTransitionTests(LeaveDataMixin, TestCase):
+    def setUp(self):
+        self.create_org()
+        self.leave_request = self.create_leave_requests(1, status='pending')[0]
+
+    def load(self):
+        return LeaveRequest.objects.with_related().get(pk=self.leave_request.pk)
+
+    def statements(self, ctx):
+        return [query['sql'] for query in ctx.captured_queries if 'SAVEPOINT' not in query['sql']]
+
+    def test_second_reviewer_loses_the_race(self):
+        first, second = self.load(), self.load()
+        first.dean_approve(self.dean)
+        with self.assertRaises(StaleTransition):
+            second.dean_deny(self.dean, 'Too late')
+
+        current = self.load()
+        self.assertEqual(current.status, 'dean_approved')
+        self.assertEqual(current.application.status, 'pending')
+        self.assertEqual(current.report.dean_status, 'approved')
+
+    def test_stale_denial_does_not_restore_balance(self):
+        year = timezone.now().year
+        EmployeeLeaveBalance.open_year(year)
+        employee = self.leave_request.application.employee
+        EmployeeLeaveBalance.deduct(employee.id, year, 1, self.leave_request.application)
+        self.load().dean_approve(self.dean)
+
+        LeaveRequest.objects.filter(pk=self.leave_request.pk).update(status='pending')
+        stale = self.load()
+        LeaveRequest.objects.filter(pk=self.leave_request.pk).update(status='dean_approved')
+        with self.assertRaises(StaleTransition):
+            with transaction.atomic():
+                EmployeeLeaveBalance.restore(stale.application)
+                stale.dean_deny(self.dean, 'No')
+        self.assertEqual(EmployeeLeaveBalance.objects.get(employee=employee, year=year).remaining_days, 14)
+
+    def test_transitions_use_narrow_statements(self):
+        leave_request = self.load()
+        with CaptureQueriesContext(connection) as ctx:
+            leave_request.dean_approve(self.dean)
+        # Guarded UPDATE, application status, then the report projection's read and upsert.
+        self.assertEqual([sql.split()[0] for sql in self.statements(ctx)], ['UPDATE', 'UPDATE', 'SELECT', 'INSERT'])
+
+        hr_user = User.objects.get(pk=self.hr_user_id)
+        with CaptureQueriesContext(connection) as ctx:
+            leave_request.hr_approve(hr_user, 'Enjoy')
+        self.assertEqual(len(self.statements(ctx)), 4)
+
+        report = LeaveReport.objects.get(leave_request=leave_request)
+        self.assertEqual((report.hr_status, report.hr_comments), ('approved', 'Enjoy'))
+        self.assertEqual(LeaveApplication.objects.get(pk=leave_request.application_id).status, 'approved')
+
+    def test_endpoint_rejects_already_reviewed_request(self):
+        client = self.client_for(self.dean_user_id)
+        LeaveRequest.objects.filter(pk=self.leave_request.pk).update(status='dean_approved')
+        response = client.post(f'/api/leave-requests/{self.leave_request.pk}/dean_deny/', {'comments': 'x'}, secure=True)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(LeaveRequest.objects.get(pk=self.leave_request.pk).status, 'dean_approved')
+
+
+class BulkReviewTests(LeaveDataMixin, TestCase):
+    def setUp(self):
+        self.create_org()
+        self.year = timezone.now().year
+
+    def test_dean_bulk_deny_restores_balances_and_reports_skips(self):
+        employee = self.create_employees(1)[0]
+        mine = self.create_leave_requests(2, status='pending', employees=[employee])
+        reviewed = self.create_leave_requests(1, status='dean_approved', employees=[employee])[0]
+        other_department = Department.objects.create(code='CBA', name='College of Business')
+        outsider = self.create_leave_requests(
+            1, status='pending', employees=self.create_employees(1, department=other_department)
+        )[0]
+        EmployeeLeaveBalance.open_year(self.year)
+        for leave_request in mine + [reviewed]:
+            EmployeeLeaveBalance.deduct(employee.id, self.year, 1, leave_request.application)
+        APIClient().get('/api/dashboard-stats/', secure=True)
+
+        ids = [mine[0].pk, mine[1].pk, reviewed.pk, outsider.pk, 999999]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client_for(self.dean_user_id).post(
+                '/api/leave-requests/bulk_deny/', {'ids': ids, 'comments': 'Short staffed'}, format='json', secure=True
+            )
+        self.assertEqual(response.status_code, 200)
+        results = {row['id']: row for row in response.json()['data']}
+        self.assertTrue(results[mine[0].pk]['success'])
+        self.assertTrue(results[mine[1].pk]['success'])
+        self.assertEqual(results[reviewed.pk]['message'], 'Request already dean_approved')
+        self.assertFalse(results[outsider.pk]['success'])
+        self.assertFalse(results[999999]['success'])
+
+        self.assertEqual(LeaveRequest.objects.get(pk=outsider.pk).status, 'pending')
+        self.assertEqual(
+            set(LeaveRequest.objects.filter(pk__in=[r.pk for r in mine]).values_list('status', flat=True)),
+            {'dean_denied'},
+        )
+        balance = EmployeeLeaveBalance.objects.get(employee=employee, year=self.year)
+        self.assertEqual(balance.remaining_days, 14)
+        self.assertEqual(
+            list(balance.transactions.filter(kind='restore').order_by('id').values_list('days', 'remaining_after')),
+            [(1, 13), (1, 14)],
+        )
+        self.assertEqual(APIClient().get('/api/dashboard-stats/', secure=True).data['pending_leaves'], 1)
+        report = LeaveReport.objects.get(leave_request_id=mine[0].pk)
+        self.assertEqual((report.dean_status, report.dean_comments), ('denied', 'Short staffed'))
+
+    def test_bulk_deny_refunds_the_year_charged(self):
+        employees = self.create_employees(2)
+        leave_requests = self.create_leave_requests(2, status='dean_approved', employees=employees)
+        EmployeeLeaveBalance.open_year(self.year - 1)
+        EmployeeLeaveBalance.open_year(self.year, employees=Employee.objects.filter(pk=employees[0].pk))
+        LeaveApplication.objects.update(date_filed=date(self.year - 1, 12, 20))
+        for leave_request in leave_requests:
+            EmployeeLeaveBalance.deduct(leave_request.application.employee_id, self.year - 1, 1, leave_request.application)
+
+        results = LeaveRequest.bulk_transition(
+            [r.pk for r in leave_requests], 'denied', 'hr', User.objects.get(pk=self.hr_user_id), 'No'
+        )
+        self.assertEqual(results, {r.pk: None for r in leave_requests})
+        self.assertEqual(
+            set(EmployeeLeaveBalance.objects.filter(year=self.year - 1).values_list('remaining_days', flat=True)), {15}
+        )
+        self.assertEqual(EmployeeLeaveBalance.objects.get(employee=employees[0], year=self.year).remaining_days, 15)
+
+    def test_hr_bulk_approve_uses_constant_queries(self):
+        leave_requests = self.create_leave_requests(30, status='dean_approved')
+        self.create_leave_reports(leave_requests[:10])
+        client = self.client_for(self.hr_user_id)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.post(
+                '/api/leave-requests/bulk_approve/', {'ids': [r.pk for r in leave_requests]}, format='json', secure=True
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(len(ctx.captured_queries), 20)
+        self.assertTrue(all(row['success'] for row in response.json()['data']))
+        self.assertEqual(LeaveReport.objects.filter(hr_status='approved').count(), 30)
+        self.assertEqual(LeaveApplication.objects.filter(status='approved').count(), 30)
+
+    def test_rejects_bad_input(self):
+        leave_request = self.create_leave_requests(1, status='dean_approved')[0]
+        client = self.client_for(self.hr_user_id)
+        for payload in ({'ids': 'all'}, {'ids': []}, {'ids': [leave_request.pk]}):
+            response = client.post('/api/leave-requests/bulk_deny/', payload, format='json', secure=True)
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(LeaveRequest.objects.get(pk=leave_request.pk).status, 'dean_approved')
+
+
+class LeaveReportProjectionTests(LeaveDataMixin, TestCase):
+    def setUp(self):
+        self.create_org()
+        self.leave_request = self.create_leave_requests(1, status='pending')[0]
+        self.hr_user = User.objects.get(pk=self.hr_user_id)
+
+    def load(self):
+        return LeaveRequest.objects.with_related().get(pk=self.leave_request.pk)
+
+    def test_inline_projection_only_rewrites_the_reviewers_columns(self):
+        self.load().dean_approve(self.dean)
+        report = LeaveReport.objects.get(leave_request=self.leave_request)
+        self.assertEqual((report.dean_status, report.hr_status, report.location), ('approved', 'pending', 'philippines'))
+
+        LeaveReport.objects.filter(pk=report.pk).update(dean_comments='kept', location='kept')
+        self.load().hr_approve(self.hr_user, 'Enjoy')
+        report = LeaveReport.objects.get(pk=report.pk)
+        self.assertEqual((report.hr_status, report.hr_comments), ('approved', 'Enjoy'))
+        self.assertEqual((report.dean_comments, report.location), ('kept', 'kept'))
+
+    def test_deferred_projection_is_caught_up_by_the_command(self):
+        with self.settings(LEAVE_REPORT_PROJECTION='deferred'):
+            self.load().dean_approve(self.dean)
+        self.assertFalse(LeaveReport.objects.exists())
+
+        call_command('project_leave_reports', settle_seconds=0, stdout=StringIO())
+        self.assertEqual(LeaveReport.objects.get(leave_request=self.leave_request).dean_status, 'approved')
+
+        out = StringIO()
+        call_command('project_leave_reports', settle_seconds=0, stdout=out)
+        self.assertIn('Projected 0', out.getvalue())
+
+    def test_rebuild_repairs_drift_in_one_pass(self):
+        self.load().dean_approve(self.dean)
+        report = LeaveReport.objects.get(leave_request=self.leave_request)
+        LeaveReport.objects.filter(pk=report.pk).update(dean_status='denied', location='drifted')
+        others = self.create_leave_requests(3, status='approved')
+        stale = self.create_leave_requests(1, status='pending')
+        self.create_leave_reports(stale)
+
+        out = StringIO()
+        call_command('project_leave_reports', rebuild=True, batch_size=2, stdout=out)
+        self.assertIn('Rebuilt 4', out.getvalue())
+
+        rebuilt = LeaveReport.objects.get(pk=report.pk)
+        self.assertEqual((rebuilt.dean_status, rebuilt.location, rebuilt.created_at), ('approved', 'philippines', report.created_at))
+        self.assertEqual(LeaveReport.objects.filter(leave_request__in=others, hr_status='approved').count(), 3)
+        self.assertFalse(LeaveReport.objects.filter(leave_request__in=stale).exists())
+
+
+def one_page_pdf(text):
+    buffer = BytesIO()
+    page = canvas.Canvas(buffer)
+    page.drawString(72, 720, text)
+    page.save()
+    return buffer.getvalue()
+
+
+class ArchivePDFMixin(LeaveDataMixin):
+    """Archives plus a temporary PDF cache, with ReportLab rendering replaced by a fixed document."""
+    PDF = one_page_pdf('cached leave form')
+
+    def setUp(self):
+        self.create_org()
+        self.client = self.client_for(self.hr_user_id)
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        overrides = self.settings(ARCHIVE_PDF_CACHE_DIR=self.cache_dir.name)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        render = mock.patch('Main_App.pdf_cache.render_archive_pdf', return_value=self.PDF)
+        self.render = render.start()
+        self.addCleanup(render.stop)
+
+    def create_archive(self, pk, **fields):
+        now = timezone.now()
+        values = dict(
+            original_leave_request_id=pk,
+            original_leave_application_id=pk,
+            employee_id='OC-20240001',
+            employee_name='Employee',
+            employee_department=self.department.name,
+            employee_position=self.position.title,
+            leave_type='sick',
+            number_of_days=1,
+            date_filed=now.date(),
+            dean_name='Dean Cruz',
+            dean_department=self.department.name,
+            dean_reviewed_at=now,
+            hr_reviewer_username='hr',
+            hr_reviewer_name='HR Officer',
+            hr_reviewed_at=now,
+            final_status='approved',
+            leave_balance_before=15,
+            leave_balance_year=now.year,
+        )
+        values.update(fields)
+        return LeaveRequestArchive.objects.create(**values)
+
+
+class ArchivePDFCacheTests(ArchivePDFMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.archive = self.create_archive(1)
+        self.url = f'/leave-request-archives/{self.archive.pk}/export-pdf/'
+
+    def download(self, **headers):
+        return self.client.get(self.url, secure=True, **headers)
+
+    def test_first_download_renders_and_repeats_are_served_from_disk(self):
+        first = self.download()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(b''.join(first.streaming_content), self.PDF)
+        self.assertIn('leave_archive_', first['Content-Disposition'])
+
+        second = self.download()
+        self.assertEqual(b''.join(second.streaming_content), self.PDF)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(self.render.call_count, 1)
+
+    def test_matching_etag_is_not_modified_without_rendering(self):
+        etag = self.download()['ETag']
+        self.render.reset_mock()
+        response = self.download(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.render.assert_not_called()
+
+    def test_byte_ranges(self):
+        etag = self.download()['ETag']
+        response = self.download(HTTP_RANGE='bytes=0-7')
+        self.assertEqual((response.status_code, response.content), (206, self.PDF[:8]))
+        self.assertEqual(response['Content-Range'], f'bytes 0-7/{len(self.PDF)}')
+
+        self.assertEqual(self.download(HTTP_RANGE='bytes=-6').content, self.PDF[-6:])
+        self.assertEqual(self.download(HTTP_RANGE=f'bytes={len(self.PDF)}-').status_code, 416)
+        self.assertEqual(self.download(HTTP_RANGE='bytes=0-7', HTTP_IF_RANGE='"stale"').status_code, 200)
+        self.assertEqual(self.download(HTTP_RANGE='bytes=0-7', HTTP_IF_RANGE=etag).status_code, 206)
+
+    def test_changed_row_gets_a_new_entry_and_drops_the_old_one(self):
+        etag = self.download()['ETag']
+        LeaveRequestArchive.objects.filter(pk=self.archive.pk).update(final_status='denied')
+
+        response = self.download(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.render.call_count, 2)
+        self.assertEqual(len(list(Path(self.cache_dir.name).glob('*.pdf'))), 1)
+
+
+class BulkArchiveExportTests(ArchivePDFMixin, TestCase):
+    url = '/api/leave-request-archives/export/'
+
+    def setUp(self):
+        super().setUp()
+        today = timezone.now().date()
+        self.archives = [self.create_archive(i, date_filed=today - timedelta(days=i)) for i in range(1, 6)]
+        self.create_archive(99, employee_department='College of Business')
+
+    def export(self, **params):
+        return self.client.get(self.url, params, secure=True)
+
+    def test_zip_streams_one_entry_per_archive(self):
+        with self.settings(PDF_EXPORT_WORKERS=1):
+            response = self.export(department=self.department.name)
+            content = b''.join(response.streaming_content)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+
+        with zipfile.ZipFile(BytesIO(content)) as exported:
+            names = exported.namelist()
+            self.assertEqual(len(names), 5)
+            self.assertEqual(exported.read(names[0]), self.PDF)
+        # Oldest filing first.
+        self.assertTrue(names[0].endswith(f'_{self.archives[-1].pk}.pdf'))
+
+    def test_cache_misses_render_in_worker_processes(self):
+        with self.settings(PDF_EXPORT_WORKERS=2):
+            response = self.export(department=self.department.name)
+            content = b''.join(response.streaming_content)
+        with zipfile.ZipFile(BytesIO(content)) as exported:
+            self.assertEqual(len(exported.namelist()), 5)
+        # Rendering happened in the children; the parent only streamed their cache files.
+        self.render.assert_not_called()
+        self.assertEqual(len(list(Path(self.cache_dir.name).glob('*.pdf'))), 5)
+
+    @skipIf(PdfWriter is None, 'pypdf is not installed')
+    def test_merged_pdf_has_a_page_per_archive(self):
+        from pypdf import PdfReader
+
+        today = timezone.now().date()
+        with self.settings(PDF_EXPORT_WORKERS=1):
+            response = self.export(output='pdf', date_from=str(today - timedelta(days=3)))
+            content = b''.join(response.streaming_content)
+        self.assertEqual(len(PdfReader(BytesIO(content)).pages), 4)
+
+    @skipIf(PdfWriter is None or not Path('/proc/self/fd').is_dir(), 'needs pypdf and /proc')
+    def test_merged_pdf_closes_each_source_and_is_capped(self):
+        items = list(rendered_pdfs(self.archives, workers=1))
+        open_files = []
+        write = PdfWriter.write
+
+        def counting_write(writer, stream):
+            open_files.append(len(os.listdir('/proc/self/fd')))
+            return write(writer, stream)
+
+        before = len(os.listdir('/proc/self/fd'))
+        with mock.patch.object(PdfWriter, 'write', counting_write):
+            merged_pdf(items).close()
+        # Only the temporary output file is open while pypdf writes.
+        self.assertEqual(open_files, [before + 1])
+
+        with mock.patch('Main_App.bulk_export.MERGED_PDF_LIMIT', 3), self.assertRaises(ValueError):
+            merged_pdf(items)
+
+    def test_rejects_bad_filters_and_other_users(self):
+        self.assertEqual(self.export(date_from='yesterday').status_code, 400)
+        self.assertEqual(self.export(output='tar').status_code, 400)
+        self.assertEqual(self.export(department='Nowhere').status_code, 404)
+
+        employee_user = User.objects.create_user(username='staff', password='secret123')
+        self.client = self.client_for(employee_user.pk)
+        self.assertEqual(self.export().status_code, 403)
+
+
+class LeaveFormTemplateTests(ArchivePDFMixin, TestCase):
+    @skipIf(PdfWriter is None, 'pypdf is not installed')
+    def test_forms_render_from_the_precompiled_templates(self):
+        from pypdf import PdfReader
+
+        archive = self.create_archive(1, employee_name='Juan Dela Cruz', leave_type='vacation',
+                                      vacation_location='abroad', reason='Family visit')
+        pages = PdfReader(export_osmena_leave_application_pdf_teaching_format(archive)).pages
+        self.assertEqual(len(pages), 1)
+        text = pages[0].extract_text()
+        self.assertIn('Juan Dela Cruz', text)
+        self.assertIn('Family visit', text)
+        self.assertIn(TEACHING_TEMPLATE.constants['recommending_name'], text)
+
+    def test_renders_are_byte_identical(self):
+        archive = self.create_archive(1)
+        LeaveRequestArchive.objects.filter(pk=archive.pk).update(archived_at=timezone.now() - timedelta(days=40))
+        archive.refresh_from_db()
+
+        first = export_osmena_leave_application_pdf_teaching_format(archive).getvalue()
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(days=1)):
+            second = export_osmena_leave_application_pdf_teaching_format(archive).getvalue()
+        self.assertEqual(first, second)
+        self.assertEqual(form_values(archive)['current_date'], archive.archived_at.strftime('%B %d, %Y'))
+
+    def test_form_values(self):
+        archive = self.create_archive(1, leave_type='sick', sick_location='hospital', reason='Surgery',
+                                      number_of_days=3, leave_balance_after=None)
+        values = form_values(archive)
+        self.assertEqual((values['sick_check'], values['vacation_check']), ('[✔]', '[ ]'))
+        self.assertEqual(values['hospital_reason'], '<u>Surgery</u>')
+        self.assertEqual((values['sick_days'], values['vacation_days']), ('3', '0'))
+        self.assertEqual(values['leave_balance_after'], '15')
+
+
+class PdfRenderJobTests(ArchivePDFMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        job_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(job_dir.cleanup)
+        overrides = self.settings(PDF_JOB_DIR=job_dir.name, PDF_EXPORT_WORKERS=1)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.archives = [self.create_archive(i) for i in range(1, 13)]
+
+    def enqueue(self, **data):
+        return self.client.post('/api/pdf-jobs/', data, format='json', secure=True)
+
+    def run_worker(self):
+        out = StringIO()
+        call_command('run_pdf_jobs', stdout=out)
+        return out.getvalue()
+
+    def test_enqueue_poll_and_download(self):
+        response = self.enqueue(department=self.department.name)
+        self.assertEqual(response.status_code, 202)
+        job = response.json()['data']
+        self.assertEqual((job['status'], job['total'], job['download_url']), ('queued', 12, None))
+        self.render.assert_not_called()
+
+        status_url = f"/api/pdf-jobs/{job['id']}/"
+        self.assertEqual(self.client.get(status_url + 'download/', secure=True).status_code, 409)
+
+        self.assertIn(f"Job {job['id']}: done (12/12)", self.run_worker())
+        job = self.client.get(status_url, secure=True).json()
+        self.assertEqual((job['status'], job['progress']), ('done', 1.0))
+
+        download = self.client.get(job['download_url'], secure=True)
+        with zipfile.ZipFile(BytesIO(b''.join(download.streaming_content))) as exported:
+            self.assertEqual(len(exported.namelist()), 12)
+        self.assertEqual(self.client.get(job['download_url'], secure=True, HTTP_RANGE='bytes=0-1').content, b'PK')
+
+    def test_failed_render_marks_the_job_failed(self):
+        self.render.side_effect = RuntimeError('font missing')
+        job_id = self.enqueue().json()['data']['id']
+        self.run_worker()
+
+        job = PdfRenderJob.objects.get(pk=job_id)
+        self.assertEqual((job.status, job.error), ('failed', 'RuntimeError: font missing'))
+        self.assertEqual(list(Path(settings.PDF_JOB_DIR).iterdir()), [])
+
+    def test_merged_jobs_are_capped_below_zip_jobs(self):
+        with mock.patch('Main_App.archive_views.MERGED_PDF_LIMIT', 10):
+            self.assertEqual(self.enqueue(output='pdf').status_code, 400)
+            self.assertEqual(self.enqueue(output='zip').status_code, 202)
+
+    def test_claims_are_exclusive_and_stale_jobs_are_requeued(self):
+        job_id = self.enqueue().json()['data']['id']
+        self.assertEqual(PdfRenderJob.claim('a').pk, job_id)
+        self.assertIsNone(PdfRenderJob.claim('b'))
+
+        self.assertEqual(PdfRenderJob.requeue_stale(timezone.now() + timedelta(seconds=1)), 1)
+        self.assertEqual(PdfRenderJob.claim('b').worker, 'b')
+
+    def test_jobs_are_private_to_their_requester(self):
+        job_id = self.enqueue().json()['data']['id']
+        staff = User.objects.create_user(username='staff', password='secret123')
+        self.client = self.client_for(staff.pk)
+        self.assertEqual(self.client.get(f'/api/pdf-jobs/{job_id}/', secure=True).status_code, 404)
+        self.assertEqual(self.enqueue().status_code, 403)
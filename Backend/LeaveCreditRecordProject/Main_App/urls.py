@@ -15,6 +15,7 @@ router.register(r'hruser', HRUserViewSet, basename='hruser')
 router.register(r'deans', DeanViewSet, basename='dean')
 
 router.register(r'leave-request-archives', LeaveRequestArchiveViewSet, basename='leave-request-archive')
+router.register(r'pdf-jobs', PdfRenderJobViewSet, basename='pdf-job')
 
 urlpatterns = [
     path('', starting_view, name='starting_page'),
@@ -1,9 +1,17 @@
 from django.contrib.auth.hashers import check_password, make_password
+from django.core.cache import cache
 from .models import AccessKey
 
+DASHBOARD_STATS_CACHE_KEY = 'main_app:dashboard_stats'
+# Upper bound on staleness for writes that never call invalidate_dashboard_stats().
+DASHBOARD_STATS_CACHE_TTL = 30
+
 def verify_secret_key(input_key):
     try:
         access_key = AccessKey.objects.latest('created_at')
         return check_password(input_key, access_key.key_hash)
     except AccessKey.DoesNotExist:
         return False
+
+def invalidate_dashboard_stats():
+    cache.delete(DASHBOARD_STATS_CACHE_KEY)
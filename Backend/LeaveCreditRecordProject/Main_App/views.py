@@ -7,6 +7,8 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib.auth.hashers import make_password, check_password
 from django.db import transaction
+from django.db.models import Count, Q
+from django.core.cache import cache
 
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action, api_view, permission_classes
@@ -20,47 +22,34 @@ from django.http import JsonResponse
 
 from .models import *
 from .serializers import *
+from .conditional import ConditionalGetMixin
+from .fieldsets import FieldSelection
+from .pagination import KeysetPagination, PaginatedActionMixin
+from .renderers import negotiated_response
+from .roles import get_roles
+from .roster import RosterSync, read_rows, roster_format
+from .utils import DASHBOARD_STATS_CACHE_KEY, DASHBOARD_STATS_CACHE_TTL
 
-MAX_ANNUAL_LEAVE_DAYS = 15
+BULK_REVIEW_LIMIT = 200
+
+
+def success_response(data):
+    return Response({'success': True, 'data': data})
 
 
 class IsHRUser(permissions.BasePermission):
     def has_permission(self, request, view):
-        return (
-            request.user.is_authenticated and 
-            hasattr(request.user, 'hruser') and 
-            request.user.hruser.is_hr
-        )
+        return get_roles(request).is_hr
 
 
 class IsDean(permissions.BasePermission):
     def has_permission(self, request, view):
-            
-        return (
-            request.user.is_authenticated and 
-            hasattr(request.user, 'dean_profile') and 
-            request.user.dean_profile.is_dean
-        )
+        return get_roles(request).is_dean
 
 class IsHROrDean(permissions.BasePermission):
     def has_permission(self, request, view):
-        user = request.user
-        if not user.is_authenticated:
-            return False
-        
-        is_hr = (
-            hasattr(user, 'hruser') and 
-            getattr(user.hruser, 'is_hr', False)
-        )
-        
-        is_dean = (
-            hasattr(user, 'dean_profile') and 
-            getattr(user.dean_profile, 'is_dean', False)
-        )
-        
-        in_hr_group = user.groups.filter(name='HR').exists()
-        
-        return is_hr or is_dean or in_hr_group
+        roles = get_roles(request)
+        return roles.is_hr or roles.is_dean or roles.in_hr_group
     
 
 def test_approve(request, pk):
@@ -80,19 +69,25 @@ def update_access_key(request, key_id):
     return Response({"message": "Access key updated successfully"}, status=status.HTTP_200_OK)
 
 
-class LeaveRequestViewSet(viewsets.ModelViewSet):
+class LeaveRequestViewSet(ConditionalGetMixin, PaginatedActionMixin, viewsets.ModelViewSet):
     queryset = LeaveRequest.objects.all()
     serializer_class = LeaveRequestSerializer
     permission_classes = [permissions.IsAuthenticated, IsHROrDean]
+    pagination_class = KeysetPagination
+    validator_fields = (
+        'updated_at', 'application__updated_at', 'application__employee__updated_at',
+        'application__employee__department__updated_at', 'application__employee__position__updated_at',
+        'dean_reviewer__updated_at',
+    )
 
     def get_queryset(self):
-        user = self.request.user
-        queryset = LeaveRequest.objects.all()
+        roles = get_roles(self.request)
+        queryset = LeaveRequest.objects.with_related(FieldSelection.from_request(self.request))
 
-        if hasattr(user, 'dean_profile'):
-            dean = user.dean_profile
+        if roles.dean is not None:
+            dean = roles.dean
             queryset = queryset.filter(
-                application__employee__department=dean.department
+                application__employee__department_id=dean.department_id
             )
 
             view_type = self.request.query_params.get('view')
@@ -106,7 +101,7 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
             else:
                 queryset = queryset.exclude(status='pending').filter(is_archived=False)
 
-        elif hasattr(user, 'hruser') or user.groups.filter(name='HR').exists():
+        elif roles.has_hr_access:
             view_type = self.request.query_params.get('view')
 
             if view_type == 'dashboard':
@@ -122,7 +117,7 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
 
     
     def hr_dash_queryset(self):
-        return LeaveRequest.objects.filter(
+        return LeaveRequest.objects.with_related().filter(
             status='dean_approved'
         )
 
@@ -134,32 +129,29 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def pending_dean(self, request):
         requests = self.get_queryset().filter(status='pending')
-        serializer = self.get_serializer(requests, many=True)
-        return Response({'success': True, 'data': serializer.data})
+        return self.paginated_or(requests, success_response)
 
     @action(detail=False, methods=['get'])
     def pending_hr(self, request):
-        if not (hasattr(request.user, 'hruser') or request.user.groups.filter(name='HR').exists()):
+        if not get_roles(request).has_hr_access:
             return Response({'success': False, 'message': 'HR only'}, status=403)
         
-        requests = LeaveRequest.objects.filter(status='dean_approved')
+        requests = LeaveRequest.objects.with_related().filter(status='dean_approved')
         
-        serializer = self.get_serializer(requests, many=True)
-        return Response({'success': True, 'data': serializer.data})
+        return self.paginated_or(requests, success_response)
 
     @action(detail=True, methods=['post'])
     def dean_approve(self, request, pk=None):
         try:
-            leave_request = LeaveRequest.objects.get(pk=pk)
+            leave_request = LeaveRequest.objects.with_related().get(pk=pk)
         except LeaveRequest.DoesNotExist:
             return Response({'success': False, 'message': 'Leave request not found'}, status=404)
 
-        if not hasattr(request.user, 'dean_profile'):
+        dean = get_roles(request).dean
+        if dean is None:
             return Response({'success': False, 'message': 'Dean only'}, status=403)
 
-        dean = request.user.dean_profile
-
-        if leave_request.application.employee.department != dean.department:
+        if leave_request.application.employee.department_id != dean.department_id:
             return Response({
                 'success': False,
                 'message': 'You can only approve requests from your department'
@@ -178,6 +170,8 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
                 'message': 'Leave request approved and forwarded to HR',
                 'data': self.get_serializer(leave_request).data
             })
+        except StaleTransition as e:
+            return Response({'success': False, 'message': str(e)}, status=409)
         except Exception as e:
             return Response({
                 'success': False,
@@ -188,16 +182,15 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def dean_deny(self, request, pk=None):
         try:
-            leave_request = LeaveRequest.objects.get(pk=pk)
+            leave_request = LeaveRequest.objects.with_related().get(pk=pk)
         except LeaveRequest.DoesNotExist:
             return Response({'success': False, 'message': 'Leave request not found'}, status=404)
 
-        if not hasattr(request.user, 'dean_profile'):
+        dean = get_roles(request).dean
+        if dean is None:
             return Response({'success': False, 'message': 'Dean only'}, status=403)
 
-        dean = request.user.dean_profile
-
-        if leave_request.application.employee.department != dean.department:
+        if leave_request.application.employee.department_id != dean.department_id:
             return Response({
                 'success': False,
                 'message': 'You can only deny requests from your department'
@@ -212,23 +205,19 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
         comments = request.data.get('comments', '')
 
         try:
-            current_year = timezone.now().year
-            balance, _ = EmployeeLeaveBalance.objects.get_or_create(
-                employee=leave_request.application.employee,
-                year=current_year,
-                defaults={'remaining_days': MAX_ANNUAL_LEAVE_DAYS}
-            )
-            days = leave_request.application.number_of_days
-            balance.remaining_days = min(balance.remaining_days + days, MAX_ANNUAL_LEAVE_DAYS)
-            balance.save()
-
-            leave_request.dean_deny(dean, comments)
+            application = leave_request.application
+            days = application.number_of_days
+            with transaction.atomic():
+                EmployeeLeaveBalance.restore(application)
+                leave_request.dean_deny(dean, comments)
 
             return Response({
                 'success': True,
                 'message': f'Leave request denied. {days} days restored to employee balance.',
                 'data': self.get_serializer(leave_request).data
             })
+        except StaleTransition as e:
+            return Response({'success': False, 'message': str(e)}, status=409)
         except Exception as e:
             #print("Dean deny error:", e)
             return Response({
@@ -238,7 +227,7 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'])
     def hr_approve(self, request, pk=None):
-        if not (hasattr(request.user, 'hruser') or request.user.groups.filter(name='HR').exists()):
+        if not get_roles(request).has_hr_access:
             return Response({'success': False, 'message': 'HR only'}, status=403)
         
         leave_request = self.get_object()
@@ -252,16 +241,15 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
         comments = request.data.get('comments', '')
         
         try:
-            leave_request.hr_approve(request.user)
-            if comments:
-                leave_request.hr_comments = comments
-                leave_request.save()
+            leave_request.hr_approve(request.user, comments or None)
             
             return Response({
                 'success': True,
                 'message': 'Leave request approved by HR',
                 'data': self.get_serializer(leave_request).data
             })
+        except StaleTransition as e:
+            return Response({'success': False, 'message': str(e)}, status=409)
         except Exception as e:
             return Response({
                 'success': False,
@@ -270,7 +258,7 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'])
     def hr_deny(self, request, pk=None):
-        if not (hasattr(request.user, 'hruser') or request.user.groups.filter(name='HR').exists()):
+        if not get_roles(request).has_hr_access:
             return Response({'success': False, 'message': 'HR only'}, status=403)
         
         leave_request = self.get_object()
@@ -289,23 +277,19 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
             }, status=400)
         
         try:
-            current_year = timezone.now().year
-            balance, _ = EmployeeLeaveBalance.objects.get_or_create(
-                employee=leave_request.application.employee,
-                year=current_year,
-                defaults={'remaining_days': MAX_ANNUAL_LEAVE_DAYS}
-            )
-            days = leave_request.application.number_of_days
-            balance.remaining_days = min(balance.remaining_days + days, MAX_ANNUAL_LEAVE_DAYS)
-            balance.save()
-            
-            leave_request.hr_deny(request.user, comments)
+            application = leave_request.application
+            days = application.number_of_days
+            with transaction.atomic():
+                EmployeeLeaveBalance.restore(application)
+                leave_request.hr_deny(request.user, comments)
             
             return Response({
                 'success': True,
                 'message': f'Leave request denied by HR. {days} days restored to employee balance.',
                 'data': self.get_serializer(leave_request).data
             })
+        except StaleTransition as e:
+            return Response({'success': False, 'message': str(e)}, status=409)
         except Exception as e:
             return Response({
                 'success': False,
@@ -314,40 +298,97 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
             
     @action(detail=False, methods=['get'])
     def dean_approved(self, request):
-        if not (hasattr(request.user, 'dean_profile') or 
-                hasattr(request.user, 'hruser') or 
-                request.user.groups.filter(name='HR').exists()):
+        roles = get_roles(request)
+        if not (roles.dean is not None or roles.has_hr_access):
             return Response({'success': False, 'message': 'Dean or HR only'}, status=403)
 
-        queryset = LeaveRequest.objects.filter(status='dean_approved')
+        queryset = LeaveRequest.objects.with_related().filter(status='dean_approved')
         
-        if hasattr(request.user, 'dean_profile'):
-            dean = request.user.dean_profile
-            queryset = queryset.filter(application__employee__department=dean.department)
+        if roles.dean is not None:
+            dean = roles.dean
+            queryset = queryset.filter(application__employee__department_id=dean.department_id)
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({'success': True, 'data': serializer.data})
+        return self.paginated_or(queryset, success_response)
 
 
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
-        if hasattr(request.user, 'dean_profile'):
+        roles = get_roles(request)
+        if roles.dean is not None:
             return self.dean_approve(request, pk)
-        elif hasattr(request.user, 'hruser') or request.user.groups.filter(name='HR').exists():
+        elif roles.has_hr_access:
             return self.hr_approve(request, pk)
         return Response({'success': False, 'message': 'Unauthorized'}, status=403)
 
     @action(detail=True, methods=['post'])
     def reject(self, request, pk=None):
-        if hasattr(request.user, 'dean_profile'):
+        roles = get_roles(request)
+        if roles.dean is not None:
             return self.dean_deny(request, pk)
-        elif hasattr(request.user, 'hruser') or request.user.groups.filter(name='HR').exists():
+        elif roles.has_hr_access:
             return self.hr_deny(request, pk)
         return Response({'success': False, 'message': 'Unauthorized'}, status=403)
 
+    @action(detail=False, methods=['post'])
+    def bulk_approve(self, request):
+        return self._bulk_review(request, approve=True)
+
+    @action(detail=False, methods=['post'])
+    def bulk_deny(self, request):
+        return self._bulk_review(request, approve=False)
+
+    def _bulk_review(self, request, approve):
+        """
+        Approve or deny up to BULK_REVIEW_LIMIT requests in one transaction.
+        Requests that can't be moved (outside the dean's department, already
+        reviewed, ...) are skipped and reported without failing the rest.
+        """
+        roles = get_roles(request)
+        ids = request.data.get('ids')
+        if (not isinstance(ids, list) or not ids
+                or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids)):
+            return Response({'success': False, 'message': 'ids must be a non-empty list of integers'}, status=400)
+        if len(ids) > BULK_REVIEW_LIMIT:
+            return Response({
+                'success': False,
+                'message': f'At most {BULK_REVIEW_LIMIT} requests can be reviewed at once'
+            }, status=400)
+        ids = list(dict.fromkeys(ids))
+        comments = request.data.get('comments', '')
+
+        if roles.dean is not None:
+            reviewer_type, reviewer = 'dean', roles.dean
+            status_to = 'dean_approved' if approve else 'dean_denied'
+            queryset = LeaveRequest.objects.filter(
+                application__employee__department_id=roles.dean.department_id
+            )
+        elif roles.has_hr_access:
+            reviewer_type, reviewer = 'hr', request.user
+            status_to = 'approved' if approve else 'denied'
+            queryset = LeaveRequest.objects.all()
+            if not approve and not comments:
+                return Response({'success': False, 'message': 'Comments required for denial'}, status=400)
+        else:
+            return Response({'success': False, 'message': 'Unauthorized'}, status=403)
+
+        results = LeaveRequest.bulk_transition(
+            ids, status_to, reviewer_type, reviewer,
+            comments=comments if comments or not approve else None,
+            queryset=queryset,
+        )
+        done = sum(1 for error in results.values() if error is None)
+        return Response({
+            'success': True,
+            'message': f'{done} of {len(ids)} leave request(s) {"approved" if approve else "denied"}',
+            'data': [
+                {'id': pk, 'success': error is None, 'status': status_to if error is None else None, 'message': error}
+                for pk, error in results.items()
+            ]
+        })
+
     @action(detail=True, methods=['post'])
     def archive(self, request, pk=None):
-        if not (hasattr(request.user, 'hruser') or request.user.groups.filter(name='HR').exists()):
+        if not get_roles(request).has_hr_access:
             return Response({
                 'success': False, 
                 'message': 'Only HR users can archive leave requests'
@@ -365,7 +406,7 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
             archive = LeaveRequestArchive.archive_leave_request(leave_request)
 
             leave_request.is_archived = True
-            leave_request.save(update_fields=['is_archived'])
+            leave_request.save(update_fields=['is_archived', 'updated_at'])
 
             return Response({
                 'success': True,
@@ -388,18 +429,18 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['post'])
     def archive_all_processed(self, request):
-        if not (hasattr(request.user, 'hruser') or request.user.groups.filter(name='HR').exists()):
+        if not get_roles(request).has_hr_access:
             return Response({
                 'success': False, 
                 'message': 'Only HR can perform batch archiving'
             }, status=403)
         
-        processed_requests = LeaveRequest.objects.filter(status__in=['approved', 'denied'])
+        processed_requests = LeaveRequest.objects.filter(status__in=['approved', 'denied'], is_archived=False)
         
-        if hasattr(request.user, 'dean_profile'):
-            dean = request.user.dean_profile
+        dean = get_roles(request).dean
+        if dean is not None:
             processed_requests = processed_requests.filter(
-                application__employee__department=dean.department
+                application__employee__department_id=dean.department_id
             )
         
         if not processed_requests.exists():
@@ -409,20 +450,10 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
             }, status=404)
         
         try:
-            from .models import LeaveRequestArchive
-            archived_count = 0
-            failed_count = 0
-            archived_ids = []
-            
-            for leave_request in processed_requests:
-                try:
-                    archive = LeaveRequestArchive.archive_leave_request(leave_request)
-                    archived_ids.append(archive.id)
-                    archived_count += 1
-                    
-                except Exception as e:
-                    failed_count += 1
-                    print(f"Failed to archive LeaveRequest {leave_request.id}: {str(e)}")
+            archived_ids = LeaveRequestArchive.archive_processed(processed_requests)
+            archived_count = len(archived_ids)
+            # Requests missing a dean or HR reviewer can't be archived and stay behind.
+            failed_count = processed_requests.count()
             
             return Response({
                 'success': True,
@@ -445,6 +476,9 @@ class DepartmentViewSet(viewsets.ModelViewSet):
     serializer_class = DepartmentSerializer
     permission_classes = [permissions.AllowAny]
 
+    def get_queryset(self):
+        return Department.objects.with_stats()
+
     def destroy(self, request, *args, **kwargs):
         department = self.get_object()
         employee_count = department.employees.count()
@@ -471,7 +505,9 @@ class DepartmentViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def employees(self, request, pk=None):
         department = self.get_object()
-        employees = department.employees.filter(is_active=True)
+        employees = Employee.objects.with_related().with_current_balance().filter(
+            department=department, is_active=True
+        )
         serializer = EmployeeSerializer(employees, many=True, context={'request': request})
         return Response(serializer.data)
     
@@ -490,6 +526,9 @@ class PositionViewSet(viewsets.ModelViewSet):
     serializer_class = PositionSerializer
     permission_classes = [permissions.AllowAny]
 
+    def get_queryset(self):
+        return Position.objects.with_occupancy()
+
     def destroy(self, request, *args, **kwargs):
         position = self.get_object()
         employee_count = position.employees.count()
@@ -509,7 +548,9 @@ class PositionViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def employees(self, request, pk=None):
         position = self.get_object()
-        employees = position.employees.filter(is_active=True)
+        employees = Employee.objects.with_related().with_current_balance().filter(
+            position=position, is_active=True
+        )
         serializer = EmployeeSerializer(employees, many=True, context={'request': request})
         return Response(serializer.data)
 
@@ -517,13 +558,15 @@ class IsDeanOrHR(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         return (
             request.user == obj.user or
-            request.user.groups.filter(name='HR').exists()
+            get_roles(request).in_hr_group
         )
 
-class DeanViewSet(viewsets.ModelViewSet):
+class DeanViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Dean.objects.all()
     serializer_class = DeanSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Username changes bump Dean.updated_at (see signals.touch_dean).
+    validator_fields = ('updated_at', 'department__updated_at')
     
     @action(detail=True, methods=['get'])
     def profile(self, request, pk=None):
@@ -615,13 +658,24 @@ class DeanViewSet(viewsets.ModelViewSet):
             return Response({'success': False, 'message': 'No dean found for this department'})
         return Response({'success': False, 'message': 'Department ID required'}, status=400)
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+class EmployeeViewSet(ConditionalGetMixin, PaginatedActionMixin, viewsets.ModelViewSet):
     queryset = Employee.objects.all()
     serializer_class = EmployeeSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_field = 'date_created'
+
+    validator_fields = ('updated_at', 'department__updated_at', 'position__updated_at', 'balance_changed_at')
+
+    def validator_queryset(self, queryset):
+        # Balance changes don't touch Employee.updated_at but show up in remaining_days.
+        return queryset.with_balance_changed_at()
 
     def get_queryset(self):
-        queryset = Employee.objects.all()
+        selection = FieldSelection.from_request(self.request)
+        queryset = Employee.objects.with_related(selection)
+        if selection.wants('remaining_days'):
+            queryset = queryset.with_current_balance()
         is_active = self.request.query_params.get('is_active')
         if is_active is not None:
             queryset = queryset.filter(is_active=is_active.lower() == 'true')
@@ -636,7 +690,9 @@ class EmployeeViewSet(viewsets.ModelViewSet):
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            employee = serializer.save(is_active=True)
+            with transaction.atomic():
+                employee = serializer.save(is_active=True)
+                EmployeeLeaveBalance.open_year(timezone.now().year, employees=Employee.objects.filter(pk=employee.pk))
             return Response({
                 'success': True,
                 'message': 'Employee registered successfully!',
@@ -685,8 +741,11 @@ class EmployeeViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def activate(self, request, pk=None):
         employee = self.get_object()
-        employee.is_active = True
-        employee.save()
+        with transaction.atomic():
+            employee.is_active = True
+            employee.save()
+            # Employees inactive through a rollover have no balance for this year.
+            EmployeeLeaveBalance.open_year(timezone.now().year, employees=Employee.objects.filter(pk=employee.pk))
         return Response({
             'success': True,
             'message': 'Employee activated successfully',
@@ -696,17 +755,35 @@ class EmployeeViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def by_department(self, request):
         department_code = request.query_params.get('department')
-        employees = self.queryset.filter(is_active=True)
+        employees = Employee.objects.with_related().with_current_balance().filter(is_active=True)
         if department_code:
             employees = employees.filter(department__code=department_code)
-        serializer = self.get_serializer(employees, many=True)
-        return Response(serializer.data)
+        return self.paginated_or(employees, Response)
 
     @action(detail=False, methods=['get'])
     def inactive(self, request):
-        inactive_employees = self.queryset.filter(is_active=False)
-        serializer = self.get_serializer(inactive_employees, many=True)
-        return Response(serializer.data)
+        inactive_employees = Employee.objects.with_related().with_current_balance().filter(is_active=False)
+        return self.paginated_or(inactive_employees, Response)
+
+    @action(detail=False, methods=['post'], url_path='import', permission_classes=[IsHRUser])
+    def import_roster(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'success': False, 'message': 'Upload the roster as "file"'}, status=status.HTTP_400_BAD_REQUEST)
+        fmt = roster_format(upload)
+        if fmt is None:
+            return Response({'success': False, 'message': 'Roster must be a .csv or .jsonl file'}, status=status.HTTP_400_BAD_REQUEST)
+
+        deactivate_missing = str(request.data.get('deactivate_missing', '')).lower() in ('1', 'true')
+        try:
+            report = RosterSync(deactivate_missing=deactivate_missing).run(read_rows(upload, fmt))
+        except UnicodeDecodeError:
+            return Response({'success': False, 'message': 'Roster must be UTF-8 encoded'}, status=status.HTTP_400_BAD_REQUEST)
+
+        message = f"{report['created']} created, {report['updated']} updated, {report['deactivated']} deactivated"
+        if report['errors']:
+            message += f", {len(report['errors'])} row(s) rejected"
+        return Response({'success': not report['errors'], 'message': message, 'data': report})
 
     @action(detail=True, methods=['get'])
     def leave_history(self, request, pk=None):
@@ -729,11 +806,7 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         try:
             employee = Employee.objects.get(employee_id=employee_code, is_active=True)
             current_year = timezone.now().year
-            balance, _ = EmployeeLeaveBalance.objects.get_or_create(
-                employee=employee,
-                year=current_year,
-                defaults={'remaining_days': 15}
-            )
+            balance = EmployeeLeaveBalance.objects.get(employee=employee, year=current_year)
             return Response({
                 'success': True,
                 'employee_id': employee.id,
@@ -744,6 +817,11 @@ class EmployeeViewSet(viewsets.ModelViewSet):
             })
         except Employee.DoesNotExist:
             return Response({'success': False, 'message': 'Employee not found'}, status=status.HTTP_404_NOT_FOUND)
+        except EmployeeLeaveBalance.DoesNotExist:
+            return Response({
+                'success': False,
+                'message': f'No leave balance for {current_year} yet. Please contact HR.'
+            }, status=status.HTTP_409_CONFLICT)
 
 
 class LeaveApplicationViewSet(viewsets.ModelViewSet):
@@ -763,19 +841,6 @@ class LeaveApplicationViewSet(viewsets.ModelViewSet):
                 'message': 'Employee not found in records. Please verify your name.'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        current_year = timezone.now().year
-        try:
-            balance = EmployeeLeaveBalance.objects.get(
-                employee=employee,
-                year=current_year
-            )
-        except EmployeeLeaveBalance.DoesNotExist:
-            balance = EmployeeLeaveBalance.objects.create(
-                employee=employee,
-                year=current_year,
-                remaining_days=15
-            )
-        
         try:
             days = int(number_of_days)
         except (ValueError, TypeError):
@@ -790,25 +855,30 @@ class LeaveApplicationViewSet(viewsets.ModelViewSet):
                 'message': 'Maximum leave application is 15 days per request'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        if days > balance.remaining_days:
-            return Response({
-                'success': False,
-                'message': f'Insufficient leave balance. You only have {balance.remaining_days} days remaining for {current_year}.'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            application = serializer.save()
-            
-            balance.deduct_days(days)
-            
-            LeaveRequest.objects.create(application=application, status='pending')
+            current_year = timezone.now().year
+            try:
+                with transaction.atomic():
+                    application = serializer.save()
+                    remaining_days = EmployeeLeaveBalance.deduct(employee.id, current_year, days, application)
+                    LeaveRequest.objects.create(application=application, status='pending')
+            except InsufficientLeaveBalance as e:
+                return Response({
+                    'success': False,
+                    'message': f'Insufficient leave balance. You only have {e.remaining_days} days remaining for {current_year}.'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            except EmployeeLeaveBalance.DoesNotExist:
+                return Response({
+                    'success': False,
+                    'message': f'No leave balance for {current_year} yet. Please contact HR.'
+                }, status=status.HTTP_409_CONFLICT)
             
             return Response({
                 'success': True,
-                'message': f'Leave application submitted successfully! Pending dean approval. {balance.remaining_days} days remaining.',
+                'message': f'Leave application submitted successfully! Pending dean approval. {remaining_days} days remaining.',
                 'data': serializer.data,
-                'remaining_days': balance.remaining_days
+                'remaining_days': remaining_days
             }, status=status.HTTP_201_CREATED)
         
         return Response({
@@ -837,37 +907,36 @@ class LeaveApplicationViewSet(viewsets.ModelViewSet):
                 'message': f'Cannot delete {application.status} leave application'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        try:
-            current_year = timezone.now().year
-            balance = EmployeeLeaveBalance.objects.get(
-                employee=application.employee,
-                year=current_year
-            )
-            balance.remaining_days += application.number_of_days
-            balance.save()
-        except EmployeeLeaveBalance.DoesNotExist:
-            pass
-        
-        application.delete()
+        with transaction.atomic():
+            try:
+                EmployeeLeaveBalance.restore(application)
+            except EmployeeLeaveBalance.DoesNotExist:
+                pass
+            application.delete()
         return Response({
             'success': True,
             'message': 'Leave application deleted successfully'
         }, status=status.HTTP_204_NO_CONTENT)
 
-class LeaveReportViewSet(viewsets.ModelViewSet):
+class LeaveReportViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = LeaveReport.objects.all()
     serializer_class = LeaveReportSerializer
     permission_classes = [permissions.IsAuthenticated, IsHROrDean]
+    pagination_class = KeysetPagination
+    validator_fields = (
+        'updated_at', 'employee__updated_at', 'employee__department__updated_at',
+        'employee__position__updated_at', 'dean_reviewer__updated_at',
+    )
 
     def get_queryset(self):
-        user = self.request.user
-        queryset = LeaveReport.objects.all()
+        roles = get_roles(self.request)
+        queryset = LeaveReport.objects.with_related()
 
-        if hasattr(user, 'dean_profile'):
-            dean = user.dean_profile
-            queryset = queryset.filter(employee__department=dean.department).exclude(dean_status='pending')
+        if roles.dean is not None:
+            dean = roles.dean
+            queryset = queryset.filter(employee__department_id=dean.department_id).exclude(dean_status='pending')
 
-        elif user.groups.filter(name='HR').exists():
+        elif roles.in_hr_group:
             queryset = queryset.exclude(dean_status='pending')
 
         else:
@@ -924,38 +993,47 @@ def verify_key(request):
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def dashboard_stats(request):
-    total_employees = Employee.objects.filter(is_active=True).count()
-    inactive_employees = Employee.objects.filter(is_active=False).count()
-    pending_leaves = LeaveRequest.objects.filter(status='pending').count()
-    approved_leaves = LeaveRequest.objects.filter(status='approved').count()
-    denied_leaves = LeaveRequest.objects.filter(status='denied').count()
-    
-    departments = Department.objects.all()
+    stats = cache.get(DASHBOARD_STATS_CACHE_KEY)
+    if stats is not None:
+        return Response(stats)
+
+    leave_counts = LeaveRequest.objects.aggregate(
+        pending_leaves=Count('pk', filter=Q(status='pending')),
+        approved_leaves=Count('pk', filter=Q(status='approved')),
+        denied_leaves=Count('pk', filter=Q(status='denied')),
+    )
+
+    departments = Department.objects.annotate(
+        count=Count('employees', filter=Q(employees__is_active=True)),
+        inactive_count=Count('employees', filter=Q(employees__is_active=False)),
+    ).values('code', 'name', 'count', 'inactive_count')
+
     dept_stats = []
+    total_employees = 0
+    inactive_employees = 0
     for dept in departments:
-        count = Employee.objects.filter(department=dept, is_active=True).count()
+        total_employees += dept['count']
+        inactive_employees += dept['inactive_count']
         dept_stats.append({
-            'code': dept.code,
-            'name': dept.name,
-            'count': count
+            'code': dept['code'],
+            'name': dept['name'],
+            'count': dept['count']
         })
 
-    return Response({
+    stats = {
         'total_employees': total_employees,
         'inactive_employees': inactive_employees,
-        'pending_leaves': pending_leaves,
-        'approved_leaves': approved_leaves,
-        'denied_leaves': denied_leaves,
+        **leave_counts,
         'departments': dept_stats
-    })
+    }
+    cache.set(DASHBOARD_STATS_CACHE_KEY, stats, DASHBOARD_STATS_CACHE_TTL)
+    return Response(stats)
 
 @csrf_exempt
 @require_http_methods(["DELETE"])
 @login_required
 def delete_leave_request_if_denied(request, pk):
-    user = request.user
-
-    if not (hasattr(user, 'dean_profile') and getattr(user.dean_profile, 'is_dean', False)):
+    if not get_roles(request).is_dean:
         return JsonResponse(
             {"error": "Only Dean accounts can delete this request."},
             status=403
@@ -999,7 +1077,7 @@ def get_employee_leave_requests(request, employee_id):
             status=status.HTTP_404_NOT_FOUND
         )
 
-    leave_requests = LeaveRequest.objects.filter(application__employee=employee)
+    leave_requests = LeaveRequest.objects.with_related().filter(application__employee=employee)
 
     serializer = LeaveRequestSerializer(leave_requests, many=True)
     return Response(serializer.data, status=status.HTTP_200_OK)
@@ -1122,16 +1200,16 @@ def org_chart_api(request):
         ]
     }
 
-    return JsonResponse(data, safe=True)
+    return negotiated_response(request, data)
 
 def get_positions(request):
-    positions = Position.objects.all().values("id", "code", "title", "description", "created_at")
-    return JsonResponse(list(positions), safe=False)
+    positions = PositionSerializer(Position.objects.with_occupancy(), many=True).data
+    return JsonResponse(positions, safe=False)
 
 @csrf_exempt
 def update_position(request, id):
     if request.method in ["PUT", "PATCH"]:
-        position = get_object_or_404(Position, id=id)
+        position = get_object_or_404(Position.objects.with_occupancy(), id=id)
 
         try:
             data = json.loads(request.body)
@@ -1155,11 +1233,9 @@ def update_position(request, id):
 @csrf_exempt
 def delete_position(request, id):
     if request.method == "DELETE":
-        position = get_object_or_404(Position, id=id)
-        serializer = PositionSerializer(position)
+        position = get_object_or_404(Position.objects.with_occupancy(), id=id)
 
-        if serializer.data.get("occupied"):
-            occupied_by = serializer.data.get("occupied_by")
+        if position.occupant_id is not None:
             message = "Cannot delete position. It is currently occupied."
             return JsonResponse({"success": False, "message": message}, status=400)
 
@@ -20,10 +20,22 @@ from .models import Dean, Employee, LeaveRequest, LeaveReport, Department
 from .serializers import EmployeeSerializer, LeaveRequestSerializer, LeaveReportSerializer
 
 from django.contrib.auth import logout
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import datetime, time
+
+from .pagination import keyset_page
+from .renderers import negotiated_response
+from .roles import get_roles
+
+DEAN_DASHBOARD_PAGE_SIZE = 50
+DEAN_DASHBOARD_MAX_PAGE_SIZE = 200
+DEAN_DASHBOARD_SECTIONS = ('faculty', 'leave_requests', 'leave_reports')
 
 @csrf_exempt
 def create_dean(request):
-    if not request.user.is_authenticated or not hasattr(request.user, 'hruser'):
+    if get_roles(request).hr_profile is None:
         return JsonResponse({'success': False, 'message': 'Unauthorized: HR only'}, status=403)
 
     if request.method != "POST":
@@ -123,26 +135,21 @@ def dean_logout_view(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def dean_me(request):
-    user = request.user
-
-    if not hasattr(user, 'dean_profile'):
+    dean = get_roles(request).dean
+    if dean is None:
         return Response({'success': False, 'message': 'You are not a Dean'}, status=403)
 
-    dean = user.dean_profile
     serializer = DeanSerializer(dean, context={'request': request})
     return Response({'success': True, 'data': serializer.data})
 
 @login_required
 def dean_dashboard_data(request):
-    user = request.user
-
-    try:
-        dean = Dean.objects.get(user=user, is_active=True)
-    except Dean.DoesNotExist:
+    dean = get_roles(request).dean
+    if dean is None or not dean.is_active:
         return JsonResponse({'success': False, 'message': 'Dean profile not found'}, status=404)
 
     if not dean.department:
-        return JsonResponse({
+        return negotiated_response(request, {
             'success': True,
             'data': {
                 'dean': {
@@ -160,35 +167,86 @@ def dean_dashboard_data(request):
             }
         })
 
-    faculty_qs = Employee.objects.filter(department=dean.department, is_active=True)
-    faculty_data = EmployeeSerializer(faculty_qs, many=True, context={'request': request}).data
+    params = request.GET
+
+    try:
+        limit = int(params.get('limit', DEAN_DASHBOARD_PAGE_SIZE))
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'limit must be an integer'}, status=400)
+    if limit < 1:
+        return JsonResponse({'success': False, 'message': 'limit must be at least 1'}, status=400)
+    limit = min(limit, DEAN_DASHBOARD_MAX_PAGE_SIZE)
+
+    window = {}
+    for param, lookup, day_time in (('since', 'created_at__gte', time.min), ('until', 'created_at__lte', time.max)):
+        if params.get(param):
+            day = parse_date(params[param])
+            if day is None:
+                return JsonResponse({'success': False, 'message': f'{param} must be a YYYY-MM-DD date'}, status=400)
+            window[lookup] = timezone.make_aware(datetime.combine(day, day_time))
+
+    sections = params.get('sections')
+    sections = sections.split(',') if sections else list(DEAN_DASHBOARD_SECTIONS)
+    unknown = [section for section in sections if section not in DEAN_DASHBOARD_SECTIONS]
+    if unknown:
+        return JsonResponse({'success': False, 'message': f'Unknown section(s): {", ".join(unknown)}'}, status=400)
+
+    department_id = dean.department_id
+    faculty_qs = Employee.objects.with_related().with_current_balance().filter(
+        department_id=department_id, is_active=True
+    )
+    leave_requests_qs = LeaveRequest.objects.with_related().filter(
+        application__employee__department_id=department_id, **window
+    )
+    leave_reports_qs = LeaveReport.objects.with_related().filter(
+        employee__department_id=department_id, **window
+    )
+
+    dean_data = {
+        'full_name': dean.full_name,
+        'department': dean.department.id,
+        'department_name': dean.department.name,
+        'gender': dean.gender,
+        'age': dean.age,
+        'height': dean.height,
+        'weight': dean.weight,
+        'photo_url': request.build_absolute_uri(dean.photo.url) if dean.photo else None
+    }
+
+    if params.get('summary') in ('1', 'true'):
+        status_counts = dict(
+            leave_requests_qs.order_by().values_list('status').annotate(count=Count('id'))
+        )
+        return negotiated_response(request, {
+            'success': True,
+            'data': {
+                'dean': dean_data,
+                'summary': {
+                    'faculty_count': faculty_qs.count(),
+                    'leave_requests': {
+                        status_key: status_counts.get(status_key, 0)
+                        for status_key, _ in LeaveRequest.STATUS_CHOICES
+                    },
+                    'leave_requests_total': sum(status_counts.values()),
+                    'leave_reports': leave_reports_qs.count(),
+                }
+            }
+        })
+
+    pages = {
+        'faculty': (faculty_qs, EmployeeSerializer, 'date_created'),
+        'leave_requests': (leave_requests_qs, LeaveRequestSerializer, 'created_at'),
+        'leave_reports': (leave_reports_qs, LeaveReportSerializer, 'created_at'),
+    }
 
-    leave_requests_qs = LeaveRequest.objects.filter(
-        application__employee__department=dean.department
-    ).order_by('-created_at')
-    leave_requests_data = LeaveRequestSerializer(leave_requests_qs, many=True, context={'request': request}).data
+    data = {'dean': dean_data, 'cursors': {}}
+    for section in sections:
+        queryset, serializer_class, field = pages[section]
+        try:
+            rows, next_cursor = keyset_page(queryset, params.get(f'{section}_cursor'), limit, field=field)
+        except ValueError:
+            return JsonResponse({'success': False, 'message': f'Invalid {section}_cursor'}, status=400)
+        data[section] = serializer_class(rows, many=True, context={'request': request}).data
+        data['cursors'][section] = next_cursor
 
-    leave_reports_qs = LeaveReport.objects.filter(
-        employee__department=dean.department
-    ).order_by('-created_at')
-    leave_reports_data = LeaveReportSerializer(leave_reports_qs, many=True, context={'request': request}).data
-    
-    #print(f"Data: {faculty_data}, {leave_requests_data}, {leave_reports_data}")
-    return JsonResponse({
-        'success': True,
-        'data': {
-            'dean': {
-                'full_name': dean.full_name,
-                'department': dean.department.id,
-                'department_name': dean.department.name,
-                'gender': dean.gender,
-                'age': dean.age,
-                'height': dean.height,
-                'weight': dean.weight,
-                'photo_url': request.build_absolute_uri(dean.photo.url) if dean.photo else None
-            },
-            'faculty': faculty_data,
-            'leave_requests': leave_requests_data,
-            'leave_reports': leave_reports_data
-        }
-    })
+    return negotiated_response(request, {'success': True, 'data': data})